@@ -0,0 +1,72 @@
+"""Benchmark of the conversion of a Historical_Data file to an OHLC.
+
+Usage: python -m benchmarks.historical_data_benchmark [--bars N]
+
+It compares the DataFrame path used before ``OHLC.from_mt_candles``
+(``DataFrame.from_dict``, ``strptime`` of the last time and ``OHLC(df)``)
+with the direct parser, with and without the conversion to UTC, on the
+decoded candles of a ``Historical_Data_<symbol>.json`` file with N M5 bars.
+"""
+import argparse
+import json
+
+from pandas import DataFrame
+
+from benchmarks.json_codec_benchmark import (
+    best_time, historical_data_payload
+)
+from tradeo.config import Config
+from tradeo.ohlc import OHLC
+from tradeo.utils import string_to_date_utc
+
+
+def main() -> None:
+  """Run the benchmark and print the results."""
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--bars', type=int, default=2880)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  candles = json.loads(historical_data_payload(args.bars))['SP500_M5']
+  timezone = Config.broker_timezone
+  print(  # noqa: T201
+      f'Historical_Data: {args.bars} bars, broker timezone {timezone}.'
+  )
+
+  results = {
+      'dataframe': {
+          'naive': best_time(
+              lambda: dataframe_path(candles, None), args.repeat
+          ),
+          'utc': best_time(
+              lambda: dataframe_path(candles, timezone), args.repeat
+          ),
+      },
+      'from_mt_candles': {
+          'naive': best_time(
+              lambda: OHLC.from_mt_candles(candles), args.repeat
+          ),
+          'utc': best_time(
+              lambda: OHLC.from_mt_candles(candles, timezone), args.repeat
+          ),
+      },
+  }
+
+  baseline = results['dataframe']
+  for name, times in results.items():
+    columns = [
+        f'{operation} {value:8.3f} ms (x{baseline[operation] / value:5.1f})'
+        for operation, value in times.items()
+    ]
+    print(f'{name:>16}: ' + ' | '.join(columns))  # noqa: T201
+
+
+def dataframe_path(candles: dict, timezone: object) -> OHLC:
+  """Convert the candles as ``_process_historical_data`` used to."""
+  df = DataFrame.from_dict(candles, orient='index')
+  string_to_date_utc(df.index[-1], from_timezone=Config.broker_timezone)
+  return OHLC(df, convert_to_utc=timezone)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,124 @@
+"""Benchmark of the JSON codecs on realistic MT bridge payloads.
+
+Usage: python -m benchmarks.json_codec_benchmark [--orders N] [--bars N]
+
+It builds an ``Orders.json`` file with N open orders and a
+``Historical_Data_<symbol>.json`` file with N M5 bars, in the format written
+by the expert advisor, and reports the time to decode them (and to encode the
+orders, as done for ``Orders_Stored.json``) with every installed codec.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+import argparse
+import json
+import timeit
+
+from tradeo.json_codec import available_codecs, decode_typed, get_codec
+
+
+def main() -> None:
+  """Run the benchmark and print the results."""
+  parser = argparse.ArgumentParser(description=__doc__)
+  parser.add_argument('--orders', type=int, default=200)
+  parser.add_argument('--bars', type=int, default=2880)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  orders = orders_payload(args.orders).encode()
+  historical_data = historical_data_payload(args.bars).encode()
+  orders_data = json.loads(orders)
+  print(  # noqa: T201
+      f'Orders.json: {args.orders} orders, {len(orders)} bytes. '
+      f'Historical_Data: {args.bars} bars, {len(historical_data)} bytes.'
+  )
+
+  results: Dict[str, Dict[str, float]] = {}
+  for name in available_codecs():
+    codec = get_codec(name)
+    results[name] = {
+        'orders loads': best_time(
+            lambda codec=codec: codec.loads(orders), args.repeat
+        ),
+        'historical loads': best_time(
+            lambda codec=codec: codec.loads(historical_data), args.repeat
+        ),
+        'orders dumps': best_time(
+            lambda codec=codec: codec.dumps(orders_data), args.repeat
+        ),
+    }
+  if 'msgspec' in results:
+    results['msgspec typed'] = {
+        'orders loads': best_time(
+            lambda: decode_typed(orders, 'orders'), args.repeat
+        ),
+    }
+
+  print_results(results)
+
+
+def orders_payload(num_orders: int) -> str:
+  """Return an Orders.json file with ``num_orders`` open orders."""
+  orders = {
+      str(2023993175 + i): {
+          'magic': 1705617043 + i,
+          'symbol': ['EURUSD', 'AUDUSD', 'USDJPY', 'GBPCAD'][i % 4],
+          'lots': 0.01,
+          'type': ['buy', 'sell', 'buylimit', 'selllimit'][i % 4],
+          'open_price': 0.65754 + i / 1e5,
+          'open_time': '2024.01.19 00:30:43',
+          'SL': 0.65443,
+          'TP': 0.66543,
+          'pnl': -0.59,
+          'swap': 0.0,
+          'comment': 'this is a comment',
+      } for i in range(num_orders)
+  }
+  return json.dumps({
+      'account_info': {
+          'name': 'Foo',
+          'number': -999999999,
+          'currency': 'EUR',
+          'leverage': 200,
+          'free_margin': 999999.99,
+          'balance': 999999.99,
+          'equity': 999999.99,
+      },
+      'orders': orders,
+  }, indent=2)
+
+
+def historical_data_payload(num_bars: int) -> str:
+  """Return a Historical_Data file with ``num_bars`` M5 bars."""
+  start = datetime(2025, 2, 10, 1, 0)
+  bars = {
+      (start + timedelta(minutes=5 * i)).strftime('%Y.%m.%d %H:%M'): {
+          'open': 5996.9 + i % 50,
+          'high': 6021.1 + i % 50,
+          'low': 5996.4 + i % 50,
+          'close': 6018.2 + i % 50,
+          'volume': 1075.0 + i % 100,
+      } for i in range(num_bars)
+  }
+  return json.dumps({'SP500_M5': bars}, indent=4)
+
+
+def best_time(function: Callable, repeat: int) -> float:
+  """Return the best time in milliseconds of a function call."""
+  number = 20
+  times = timeit.repeat(function, number=number, repeat=repeat)
+  return min(times) / number * 1000
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+  """Print the times of each codec and the speedup over the stdlib."""
+  baseline = results['json']
+  for name, times in results.items():
+    columns = [
+        f'{operation} {value:8.3f} ms (x{baseline[operation] / value:4.1f})'
+        for operation, value in times.items()
+    ]
+    print(f'{name:>14}: ' + ' | '.join(columns))  # noqa: T201
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,183 @@
+from unittest.mock import MagicMock, patch
+from time import sleep
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tradeo.async_mt_client import AsyncMT_Client
+from tradeo.command import CommandHandle, CommandTimeoutError
+from tradeo.mt_client import MT_Client
+from tradeo.order import Order
+from tradeo.updates import MARKET_DATA, UpdateNotifier
+
+
+def test_get_bid_ask():
+  mt_client = _mock_mt_client()
+  mt_client.check_market_data.side_effect = [
+      {},
+      {'EURUSD': {'bid': 1.1, 'ask': 1.2}},
+  ]
+  client = AsyncMT_Client(mt_client, poll_interval=0.001)
+
+  assert asyncio.run(client.get_bid_ask('EURUSD')) == (1.1, 1.2)
+  assert mt_client.check_market_data.call_count == 2
+
+
+@patch('tradeo.async_mt_client.log')
+def test_get_bid_ask_timeout(mock_log):
+  mt_client = _mock_mt_client()
+  mt_client.check_market_data.return_value = {}
+  client = AsyncMT_Client(mt_client, poll_interval=0.001)
+
+  assert asyncio.run(client.get_bid_ask('EURUSD', timeout=0.01)) == (0, 0)
+  assert mock_log.warning.called
+
+
+def test_send_command_and_subscribe_symbols():
+  mt_client = MagicMock(spec=MT_Client)
+  client = AsyncMT_Client(mt_client)
+
+  asyncio.run(client.subscribe_symbols(['EURUSD', 'USDJPY']))
+
+  mt_client.subscribe_symbols.assert_called_once_with(['EURUSD', 'USDJPY'])
+
+
+def test_wait_historical_data():
+  mt_client = MagicMock(spec=MT_Client)
+  mt_client.successful_symbols = set()
+  mt_client.get_remaining_symbols.side_effect = lambda symbols: symbols
+  mt_client.check_historical_data.side_effect = (
+      mt_client.successful_symbols.add
+  )
+  client = AsyncMT_Client(mt_client)
+
+  remaining = asyncio.run(client.wait_historical_data(['EURUSD', 'EURUSD']))
+
+  assert remaining == []
+  mt_client.check_historical_data.assert_called_once_with('EURUSD')
+  with pytest.raises(ValueError, match='cannot be negative'):
+    asyncio.run(client.wait_historical_data(['EURUSD'], timeout_seconds=-1))
+
+
+def test_ensure_historical_trades_current_requests_once():
+  mt_client = MagicMock(spec=MT_Client)
+  mt_client.check_historical_trades_current.side_effect = [False, True]
+  client = AsyncMT_Client(mt_client)
+
+  assert asyncio.run(client.ensure_historical_trades_current())
+  mt_client.get_historical_trades.assert_called_once_with(2)
+  mt_client.check_historical_trades_current.assert_called_with(120)
+  with pytest.raises(ValueError, match='lookback_days must be positive'):
+    asyncio.run(client.ensure_historical_trades_current(lookback_days=0))
+
+
+def test_checks_run_out_of_the_event_loop_thread():
+  threads = []
+
+  def check_market_data():
+    threads.append(threading.current_thread())
+    return {'EURUSD': {'bid': 1.1, 'ask': 1.2}}
+
+  mt_client = _mock_mt_client()
+  mt_client.check_market_data.side_effect = check_market_data
+  client = AsyncMT_Client(mt_client)
+
+  assert asyncio.run(client.get_bid_ask('EURUSD')) == (1.1, 1.2)
+  assert len(threads) == 1
+  assert threads[0] is not threading.main_thread()
+
+
+def test_ticks_yield_only_changes():
+  mt_client = _mock_mt_client()
+  mt_client.check_market_data.side_effect = [
+      {'EURUSD': {'bid': 1.1, 'ask': 1.2}, 'USDJPY': {'bid': 1, 'ask': 2}},
+      {'EURUSD': {'bid': 1.1, 'ask': 1.2}, 'USDJPY': {'bid': 1, 'ask': 2}},
+      {'EURUSD': {'bid': 1.3, 'ask': 1.4}, 'USDJPY': {'bid': 1, 'ask': 2}},
+  ]
+  client = AsyncMT_Client(mt_client, poll_interval=0.001)
+
+  async def take(n):
+    ticks = []
+    async for tick in client.ticks(['EURUSD']):
+      ticks.append(tick)
+      if len(ticks) == n:
+        break
+    return ticks
+
+  assert asyncio.run(take(2)) == [('EURUSD', 1.1, 1.2), ('EURUSD', 1.3, 1.4)]
+
+
+def test_bars_and_order_events():
+  bar = {'time': '2023.01.01 00:00', 'open': 1.0}
+  mt_client = _mock_mt_client()
+  mt_client.check_bar_data.return_value = {'EURUSD_M5': bar}
+  mt_client.account_info = {'balance': 100}
+  order = MagicMock(spec=Order)
+  order.ticket = 1
+  mt_client.check_open_orders.side_effect = [[], [], [order]]
+  client = AsyncMT_Client(mt_client, poll_interval=0.001)
+
+  async def first_bar():
+    async for event in client.bars():
+      return event
+
+  async def take_order_events(n):
+    events = []
+    async for event in client.order_events():
+      events.append(event)
+      if len(events) == n:
+        return events
+
+  assert asyncio.run(first_bar()) == ('EURUSD', 'M5', bar)
+  assert asyncio.run(take_order_events(2)) == [
+      ({'balance': 100}, []),
+      ({'balance': 100}, [order]),
+  ]
+
+
+def test_ticks_wake_on_market_data_update():
+  mt_client = _mock_mt_client()
+  mt_client.check_market_data.side_effect = [
+      {'EURUSD': {'bid': 1.1, 'ask': 1.2}},
+      {'EURUSD': {'bid': 1.3, 'ask': 1.4}},
+  ]
+  # Only a notification of the poller can wake up the iterator in time
+  client = AsyncMT_Client(mt_client, poll_interval=10)
+
+  def poller():
+    sleep(0.05)
+    mt_client.updates.notify([MARKET_DATA])
+
+  async def take(n):
+    ticks = []
+    async for tick in client.ticks():
+      ticks.append(tick)
+      if len(ticks) == 1:
+        threading.Thread(target=poller).start()
+      if len(ticks) == n:
+        return ticks
+
+  started = time.monotonic()
+  assert asyncio.run(take(2)) == [('EURUSD', 1.1, 1.2), ('EURUSD', 1.3, 1.4)]
+  assert time.monotonic() - started < 5
+
+
+def test_wait_command(tmp_path):
+  file_path = tmp_path / 'Commands_0.txt'
+  file_path.write_text('<:1|TEST|content:>')
+  handle = CommandHandle(1, 'TEST', 'content')
+  handle.mark_written(file_path)
+  client = AsyncMT_Client(MagicMock(spec=MT_Client), poll_interval=0.001)
+
+  with pytest.raises(CommandTimeoutError, match='not consumed'):
+    asyncio.run(client.wait_command(handle, timeout=0.01))
+  file_path.unlink()
+  assert asyncio.run(client.wait_command(handle)) >= 0
+
+
+def _mock_mt_client():
+  mt_client = MagicMock(spec=MT_Client)
+  mt_client.updates = UpdateNotifier()
+  return mt_client
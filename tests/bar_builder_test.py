@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+import pytz
+
+from tradeo.bar_builder import BarBuilder, BarSeries
+
+
+def test_bar_series_aggregates_ticks():
+  series = BarSeries(60, capacity=10)
+
+  assert not series.update(0, 1.0)
+  assert not series.update(30, 1.5)
+  assert not series.update(59, 0.5)
+  assert not series.update(10, 9.9)
+  assert series.update(60, 1.2)
+  assert not series.update(20, 9.9)  # older than the current bar
+
+  ohlc = series.ohlc()
+  assert len(ohlc) == 1
+  assert ohlc.open[0] == 1.0
+  assert ohlc.high[0] == 9.9
+  assert ohlc.low[0] == 0.5
+  assert ohlc.close[0] == 9.9
+  assert ohlc.volume[0] == 4
+  assert np.shares_memory(ohlc.close, series.close)
+  assert ohlc.datetime[0] == datetime(1970, 1, 1, tzinfo=pytz.utc)
+  assert len(series.ohlc(include_current=True)) == 2
+
+
+def test_bar_series_discards_older_bars_when_full():
+  series = BarSeries(60, capacity=4)
+  for minute in range(6):
+    series.update(minute * 60, float(minute))
+
+  assert list(series.ohlc(include_current=True).epoch) == [120, 180, 240, 300]
+  with pytest.raises(ValueError, match='at least 2'):
+    BarSeries(60, capacity=1)
+
+
+def test_bar_builder():
+  builder = BarBuilder(['M1', 'M5'])
+
+  assert builder.update('EURUSD', 0, 1.0) == []
+  assert builder.update('EURUSD', 60, 1.1) == [('EURUSD', 'M1')]
+  assert builder.update('EURUSD', 300, 1.2) == [
+      ('EURUSD', 'M1'), ('EURUSD', 'M5')
+  ]
+
+  assert list(builder.ohlc('EURUSD', 'M1').close) == [1.0, 1.1]
+  assert list(builder.ohlc('EURUSD', 'M5').high) == [1.1]
+  assert len(builder.ohlc('USDJPY', 'M5')) == 0
+  with pytest.raises(ValueError, match='Unknown time frames'):
+    BarBuilder(['M2'])
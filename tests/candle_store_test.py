@@ -0,0 +1,72 @@
+import numpy as np
+import pytz
+
+from tradeo.candle_store import (
+    CandleStore, EPOCH, CLOSE, VOLUME, parse_candles
+)
+
+
+def _candle(close, volume=1.0):
+  return {
+      'open': close, 'high': close, 'low': close, 'close': close,
+      'volume': volume,
+  }
+
+
+def test_parse_candles():
+  candles = parse_candles({
+      '1970.01.01 00:05': _candle(1.5, 10.0),
+      '1970.01.01 00:10': _candle(2.5),
+  })
+
+  assert candles.shape == (6, 2)
+  assert list(candles[EPOCH]) == [300, 600]
+  assert list(candles[CLOSE]) == [1.5, 2.5]
+  assert list(candles[VOLUME]) == [10.0, 1.0]
+  assert parse_candles({}).shape == (6, 0)
+
+
+def test_candle_store_merges_and_persists(tmp_path):
+  store = CandleStore(tmp_path / 'candles', lookback_days=1)
+  assert store.last_epoch('EURUSD', 'M5') is None
+
+  store.merge('EURUSD', 'M5', parse_candles({
+      '2024.01.01 10:00': _candle(1.0),
+      '2024.01.01 10:05': _candle(1.1),
+  }))
+  # The last candle is received again with its final values
+  merged = store.merge('EURUSD', 'M5', parse_candles({
+      '2024.01.01 10:05': _candle(1.2),
+      '2024.01.01 10:10': _candle(1.3),
+  }))
+
+  assert list(merged[CLOSE]) == [1.0, 1.2, 1.3]
+  assert store.last_epoch('EURUSD', 'M5') == int(
+      np.datetime64('2024-01-01T10:10', 's').astype(np.int64)
+  )
+  assert (tmp_path / 'candles' / 'EURUSD_M5.npy').exists()
+
+  # A new store reads the candles from disk
+  reloaded = CandleStore(tmp_path / 'candles', lookback_days=1)
+  assert list(reloaded.candles('EURUSD', 'M5')[CLOSE]) == [1.0, 1.2, 1.3]
+
+  # Candles older than the lookback window are discarded
+  merged = reloaded.merge('EURUSD', 'M5', parse_candles({
+      '2024.01.02 10:10': _candle(1.4),
+  }))
+  assert list(merged[CLOSE]) == [1.3, 1.4]
+
+
+def test_candle_store_ohlc(tmp_path):
+  store = CandleStore(tmp_path)
+  store.merge('EURUSD', 'M5', parse_candles({
+      '2024.01.01 10:00': _candle(1.0),
+  }))
+
+  ohlc = store.ohlc('EURUSD', 'M5')
+  assert ohlc.close[0] == 1.0
+  assert ohlc.datetime[0].isoformat() == '2024-01-01T10:00:00'
+
+  ohlc = store.ohlc('EURUSD', 'M5', pytz.timezone('Etc/GMT-2'))
+  assert ohlc.datetime[0].isoformat() == '2024-01-01T08:00:00+00:00'
+  assert len(store.ohlc('GBPUSD', 'M5')) == 0
@@ -0,0 +1,109 @@
+import pytest
+
+from tradeo.command import (
+    CommandHandle, CommandIndex, CommandSlots, CommandTimeoutError
+)
+
+
+def test_command_handle_is_consumed_when_the_file_disappears(tmp_path):
+  consumed = []
+  file_path = tmp_path / 'Commands_0.txt'
+  handle = CommandHandle(1, 'TEST', 'content', on_consumed=consumed.append)
+  assert handle.status == 'pending'
+
+  file_path.write_text('<:1|TEST|content:>')
+  handle.mark_written(file_path)
+  assert handle.status == 'written'
+  assert not handle.done()
+  with pytest.raises(CommandTimeoutError, match='not consumed'):
+    handle.result(timeout=0.01)
+
+  file_path.unlink()
+  assert handle.result(timeout=1) >= 0
+  assert handle.status == 'consumed'
+  assert handle.enqueued_at <= handle.written_at <= handle.consumed_at
+  # The callback only runs once
+  handle.mark_consumed()
+  assert consumed == [handle]
+
+
+def test_failed_command_handle():
+  handle = CommandHandle(1, 'CLOSE_ORDER', '1,0')
+  handle.mark_failed('not delivered')
+
+  assert handle.done()
+  assert handle.status == 'failed'
+  assert handle.latency is None
+  with pytest.raises(CommandTimeoutError, match='not delivered'):
+    handle.result()
+
+
+def test_command_slots_seeded_with_existing_files(tmp_path):
+  (tmp_path / 'Commands_0.txt').touch()
+  (tmp_path / 'Commands_2.txt').touch()
+  (tmp_path / 'Commands_99.txt').touch()
+  (tmp_path / 'Other_1.txt').touch()
+  slots = CommandSlots(tmp_path / 'Commands_', 4)
+
+  assert slots.acquire() == 1
+  assert slots.acquire() == 3
+  (tmp_path / 'Commands_1.txt').touch()
+  (tmp_path / 'Commands_3.txt').touch()
+  assert slots.acquire(first_slot=2) is None
+  assert slots.stats()['busy'] == 4
+  assert slots.stats()['full'] == 1
+
+  # The files are consumed in order by the MQL side
+  for i in range(3):
+    (tmp_path / f'Commands_{i}.txt').unlink(missing_ok=True)
+  slots.release(str(tmp_path / 'Commands_1.txt'))
+  slots.release(str(tmp_path / 'Unknown_1.txt'))
+  # The lowest busy slot has been consumed, so the slots are refreshed
+  assert slots.acquire() == 0
+  assert slots.refreshes == 3
+  stats = slots.stats()
+  assert stats['allocations'] == 3
+  assert 0 < stats['pressure'] <= 1
+
+
+def test_command_slots_without_directory(tmp_path):
+  slots = CommandSlots(tmp_path / 'missing' / 'Commands_', 2)
+
+  assert slots.acquire() == 0
+  assert slots.path(0) == f'{tmp_path}/missing/Commands_0.txt'
+
+
+def test_command_index():
+  index = CommandIndex()
+  index.add('Commands_0.txt', [
+      ('GET_HISTORICAL_DATA', 'EURUSD,M5,1'), ('SUBSCRIBE_SYMBOLS', 'EURUSD')
+  ])
+  index.add('Commands_1.txt', [('GET_HISTORICAL_DATA', 'EURUSD,M5,2')])
+
+  assert index.files('GET_HISTORICAL_DATA', 'EURUSD') == [
+      'Commands_0.txt', 'Commands_1.txt'
+  ]
+  assert index.files('GET_HISTORICAL_DATA', 'USDJPY') == []
+
+  index.discard('Commands_0.txt')
+  assert index.files('GET_HISTORICAL_DATA', 'EURUSD') == ['Commands_1.txt']
+  assert index.files('SUBSCRIBE_SYMBOLS', 'EURUSD') == []
+
+  index.retain([])
+  assert index.files('GET_HISTORICAL_DATA', 'EURUSD') == []
+
+
+def test_command_slots_index_existing_commands(tmp_path):
+  (tmp_path / 'Commands_0.txt').write_text(
+      '<:1|GET_HISTORICAL_DATA|USDJPY,M5,1:><:2|GET_BAR_DATA|EURUSD:>'
+  )
+  slots = CommandSlots(tmp_path / 'Commands_', 4)
+  path = str(tmp_path / 'Commands_0.txt')
+
+  assert slots.index.files('GET_HISTORICAL_DATA', 'USDJPY') == [path]
+  assert slots.index.files('GET_BAR_DATA', 'EURUSD') == [path]
+
+  # The consumed file is dropped from the index
+  (tmp_path / 'Commands_0.txt').unlink()
+  slots.release(path)
+  assert slots.index.files('GET_HISTORICAL_DATA', 'USDJPY') == []
@@ -0,0 +1,109 @@
+from pathlib import Path
+from unittest.mock import patch
+import json
+import os
+import time
+
+import pytest
+
+from tradeo.file_watcher import FileWatcher, inotify_available
+
+
+@pytest.mark.skipif(not inotify_available(), reason='inotify not available')
+def test_watch_runs_callback_on_close_write(tmp_path):
+  calls = []
+  watcher = FileWatcher(poll_interval=0.005, timeout=0.05)
+  watcher.watch(tmp_path / 'Orders.json', calls.append)
+  assert watcher.start()
+
+  try:
+    with open(tmp_path / 'Orders.json', 'w') as f:
+      f.write(json.dumps({}))
+    # A file that is not watched does not trigger anything
+    with open(tmp_path / 'Other.json', 'w') as f:
+      f.write(json.dumps({}))
+
+    assert _wait_until(lambda: len(calls) == 1)
+    assert calls == [tmp_path / 'Orders.json']
+  finally:
+    watcher.stop()
+
+
+@pytest.mark.skipif(not inotify_available(), reason='inotify not available')
+def test_watch_prefix_runs_callback_on_rename(tmp_path):
+  calls = []
+  watcher = FileWatcher(poll_interval=0.005, timeout=0.05)
+  watcher.watch_prefix(tmp_path / 'Historical_Data_', calls.append)
+  assert watcher.start()
+
+  try:
+    tmp_file = tmp_path / 'tmp.json'
+    with open(tmp_file, 'w') as f:
+      f.write(json.dumps({}))
+    os.replace(tmp_file, tmp_path / 'Historical_Data_EURUSD.json')
+
+    assert _wait_until(lambda: len(calls) == 1)
+    assert calls == [tmp_path / 'Historical_Data_EURUSD.json']
+  finally:
+    watcher.stop()
+
+
+def test_resync_dispatches_existing_files(tmp_path):
+  (tmp_path / 'Messages.json').touch()
+  (tmp_path / 'Historical_Data_USDJPY.json').touch()
+  calls = []
+  watcher = FileWatcher()
+  watcher.watch(tmp_path / 'Messages.json', calls.append)
+  watcher.watch(tmp_path / 'Market_Data.json', calls.append)
+  watcher.watch_prefix(tmp_path / 'Historical_Data_', calls.append)
+
+  watcher.resync()
+
+  assert sorted(calls) == sorted([
+      tmp_path / 'Messages.json',
+      tmp_path / 'Historical_Data_USDJPY.json',
+  ])
+  assert watcher.stats()['Messages.json']['reads'] == 1
+  assert watcher.stats()['Market_Data.json']['reads'] == 0
+  assert watcher.stats()['Historical_Data_*']['reads'] == 1
+
+
+def test_stats_report_avoided_reads(tmp_path):
+  watcher = FileWatcher(poll_interval=0.001)
+  watcher.watch(tmp_path / 'Orders.json', lambda _: None)
+  watcher._started_at = time.monotonic() - 1
+
+  assert watcher.stats()['Orders.json']['reads_avoided'] >= 900
+  assert watcher.dispatch(str(tmp_path), 'Orders.json')
+  assert not watcher.dispatch(str(tmp_path), 'Unknown.json')
+  assert watcher.stats()['Orders.json']['reads'] == 1
+  assert watcher.reads_avoided >= 900
+
+
+def test_callback_errors_do_not_stop_the_dispatch(tmp_path):
+  def callback(_: Path):
+    raise ValueError('error')
+
+  watcher = FileWatcher()
+  watcher.watch(tmp_path / 'Orders.json', callback)
+  with patch('tradeo.file_watcher.log') as mock_log:
+    assert watcher.dispatch(str(tmp_path), 'Orders.json')
+  assert mock_log.error.called
+
+
+def test_start_falls_back_when_inotify_is_not_available(tmp_path):
+  watcher = FileWatcher()
+  watcher.watch(tmp_path / 'Orders.json', lambda _: None)
+  with patch('tradeo.file_watcher._load_libc', return_value=None), \
+       patch('tradeo.file_watcher.log'):
+    assert not watcher.start()
+  assert not watcher.active
+
+
+def _wait_until(condition, timeout=2.0):
+  end_time = time.monotonic() + timeout
+  while time.monotonic() < end_time:
+    if condition():
+      return True
+    time.sleep(0.01)
+  return False
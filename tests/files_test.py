@@ -3,6 +3,7 @@ import tradeo.files as f
 from pathlib import Path
 import tempfile
 import os
+from unittest.mock import patch
 
 
 def test_file_exists():
@@ -73,3 +74,99 @@ def test_remove_file(tmp_path):
   assert file.exists()
   f.remove_file(file_name, file_path=file_path)
   assert not file.exists()
+
+
+def test_json_file_cache(tmp_path):
+  file = tmp_path / 'Orders.json'
+  with open(file, 'w') as fi:
+    fi.write('{"test": "test"}')
+  cache = f.JsonFileCache()
+
+  data = cache.load_if_changed(file)
+  assert data == {'test': 'test'}
+  assert cache.misses == 1
+
+  # Unchanged file is neither read nor parsed
+  with patch('tradeo.files.load_json') as mock_load:
+    assert cache.load_if_changed(file) is f.NOT_MODIFIED
+    assert cache.load(file) is data
+    assert not mock_load.called
+  assert cache.hits == 2
+
+  # A change in the stat signature forces a new read
+  with open(file, 'w') as fi:
+    fi.write('{"test": "changed"}')
+  assert cache.load_if_changed(file) == {'test': 'changed'}
+
+  cache.invalidate(file)
+  assert cache.load(file) == {'test': 'changed'}
+
+  # Missing files return an empty dict
+  os.remove(file)
+  assert cache.load_if_changed(file) == {}
+
+
+def test_json_file_cache_skips_partial_file_until_it_changes(tmp_path):
+  file = tmp_path / 'Orders.json'
+  file.write_text('{"test": "test"}')
+  cache = f.JsonFileCache()
+  assert cache.load_if_changed(file) == {'test': 'test'}
+
+  # A partially written file is read once and then skipped without sleeping
+  file.write_text('{"test": "cha')
+  assert cache.load_if_changed(file) is f.NOT_MODIFIED
+  with patch('tradeo.files.load_json') as mock_load:
+    assert cache.load_if_changed(file) is f.NOT_MODIFIED
+    assert not mock_load.called
+  assert cache.load(file) == {'test': 'test'}
+  assert cache.parse_errors == 1
+
+  file.write_text('{"test": "changed"}')
+  assert cache.load_if_changed(file) == {'test': 'changed'}
+
+
+def test_atomic_write_file(tmp_path):
+  file = tmp_path / 'Orders_Stored.json'
+
+  assert f.atomic_write_file(file, 'first')
+  assert f.atomic_write_file(file, 'second')
+  assert file.read_text() == 'second'
+
+  # Without overwrite an existing file is kept
+  assert not f.atomic_write_file(file, 'third', overwrite=False)
+  assert f.atomic_write_file(tmp_path / 'Commands_0.txt', 'new', False)
+  assert file.read_text() == 'second'
+  assert sorted(os.listdir(tmp_path)) == [
+      'Commands_0.txt', 'Orders_Stored.json'
+  ]
+
+
+def test_atomic_write_file_without_hard_links(tmp_path):
+  file = tmp_path / 'Commands_0.txt'
+  with patch('tradeo.files.os.link', side_effect=PermissionError):
+    assert f.atomic_write_file(file, 'first', overwrite=False)
+    assert not f.atomic_write_file(file, 'second', overwrite=False)
+  assert file.read_text() == 'first'
+  assert os.listdir(tmp_path) == ['Commands_0.txt']
+
+
+def test_write_file_not_atomic(tmp_path):
+  with patch.object(f.Config, 'atomic_writes', False):
+    f.write_file('test.txt', 'test', file_path=tmp_path)
+  assert (tmp_path / 'test.txt').read_text() == 'test'
+
+
+def test_json_file_cache_is_modified(tmp_path):
+  file = tmp_path / 'Historical_Data_EURUSD.json'
+  cache = f.JsonFileCache()
+  assert not cache.is_modified(file)
+
+  file.write_text('{"test": "test"}')
+  assert cache.is_modified(file)
+  cache.load_if_changed(file)
+  with patch('tradeo.files.load_json') as mock_load:
+    assert not cache.is_modified(file)
+    assert not mock_load.called
+
+  file.write_text('{"test": "changed"}')
+  assert cache.is_modified(file)
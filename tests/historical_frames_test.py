@@ -0,0 +1,51 @@
+import json
+
+from pandas import DataFrame
+import pytest
+
+from tradeo.historical_frames import HistoricalDataFrames, mt_dataframe
+from tradeo.ohlc import OHLC
+from tradeo.paths import resources_test_path
+
+
+def test_mt_dataframe_matches_the_file_dataframe():
+  candles = _candles()
+  expected = DataFrame.from_dict(candles, orient='index')
+  frame = mt_dataframe(OHLC.from_mt_candles(candles))
+  assert frame.equals(expected)
+
+
+def test_dataframes_are_built_on_first_read():
+  frames = HistoricalDataFrames()
+  frames.set_ohlc('SP500', OHLC.from_mt_candles(_candles()))
+  assert list(frames) == ['SP500']
+  assert len(frames) == 1
+
+  frame = frames['SP500']
+  assert frames['SP500'] is frame
+  assert list(frames.keys()) == ['SP500']
+
+  # New data replaces the built DataFrame
+  frames.set_ohlc('SP500', OHLC.from_mt_candles(_candles()))
+  assert frames['SP500'] is not frame
+
+
+def test_dataframes_can_be_set_and_deleted():
+  frames = HistoricalDataFrames()
+  frames['EURUSD'] = DataFrame()
+  frames.set_ohlc('SP500', OHLC.from_mt_candles(_candles()))
+  assert dict(frames).keys() == {'EURUSD', 'SP500'}
+
+  del frames['SP500']
+  frames.pop('EURUSD')
+  assert len(frames) == 0
+  with pytest.raises(KeyError, match='SP500'):
+    frames['SP500']
+  with pytest.raises(KeyError, match='SP500'):
+    del frames['SP500']
+
+
+def _candles():
+  path = f'{resources_test_path()}/AgentFiles/Historical_Data_SP500.json'
+  with open(path) as f:
+    return json.load(f)['SP500_M5']
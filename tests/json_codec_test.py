@@ -0,0 +1,79 @@
+from pathlib import Path
+from unittest.mock import patch
+import json
+
+import pytest
+
+from tradeo.paths import resources_test_path
+from tradeo import json_codec
+from tradeo.files import load_json
+
+
+@pytest.mark.parametrize('name', json_codec.available_codecs())
+def test_codecs_decode_and_encode(name):
+  codec = json_codec.get_codec(name)
+  data = {'orders': {'1': {'lots': 0.01, 'comment': 'comment'}}}
+
+  assert codec.name == name
+  assert codec.loads(codec.dumps(data)) == data
+  assert codec.loads(json.dumps(data).encode()) == data
+  with pytest.raises(codec.decode_errors):
+    codec.loads(b'{"orders": {"1"')
+
+
+@pytest.mark.parametrize('name', json_codec.available_codecs())
+def test_load_json_with_codec(name, tmp_path):
+  file = Path(f'{resources_test_path()}/AgentFiles/Orders.json')
+  partial_file = tmp_path / 'Orders.json'
+  partial_file.write_bytes(file.read_bytes()[:100])
+
+  with patch.object(json_codec, '_default_codec', json_codec.get_codec(name)):
+    assert load_json(file)['account_info']['currency'] == 'EUR'
+    assert load_json(partial_file) is None
+    assert load_json(tmp_path / 'missing.json') is None
+
+
+def test_get_codec():
+  assert json_codec.available_codecs()[-1] == 'json'
+  assert json_codec.get_codec('auto').name == (
+      json_codec.available_codecs()[0]
+  )
+  with pytest.raises(ValueError, match='Unknown JSON codec'):
+    json_codec.get_codec('dummy')
+
+  with patch.object(json_codec, '_import_optional', return_value=None):
+    assert json_codec.available_codecs() == ['json']
+    with pytest.raises(ValueError, match='is not installed'):
+      json_codec.get_codec('orjson')
+
+
+def test_set_codec():
+  previous_codec = json_codec.get_codec()
+  try:
+    json_codec.set_codec('json')
+    assert json_codec.get_codec().name == 'json'
+  finally:
+    json_codec._default_codec = previous_codec
+
+
+def test_decode_typed():
+  pytest.importorskip('msgspec')
+  path = Path(f'{resources_test_path()}/AgentFiles')
+
+  orders = json_codec.decode_typed(
+      (path / 'Orders.json').read_bytes(), 'orders'
+  )
+  trades = json_codec.decode_typed(
+      (path / 'Historical_Trades.json').read_bytes(), 'trades'
+  )
+  ticks = json_codec.decode_typed(
+      (path / 'Market_Data.json').read_bytes(), 'ticks'
+  )
+
+  assert orders.account_info['currency'] == 'EUR'
+  assert orders.orders['2023993175'].order_type == 'buy'
+  assert orders.orders['2023993175'].SL == 0.65443
+  assert trades['2015257378'].entry == 'entry_out'
+  assert ticks['EURUSD'].bid == 1.08973
+  with pytest.raises(ValueError, match='Unknown typed JSON kind'):
+    json_codec.decode_typed(json.dumps({}), 'dummy')
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+
+from tradeo.message_store import MessageStore, MessagesView
+from tradeo.mt_message import MT_MessageError, MT_MessageInfo
+
+
+def test_store_is_bounded():
+  store = MessageStore(capacity=3)
+  for i in range(5):
+    store.add_info(_info(i))
+    store.add_error(_error(i, 'ODD' if i % 2 else 'EVEN'))
+
+  assert [m.message for m in store.info] == ['2', '3', '4']
+  assert [m.description for m in store.errors] == ['2', '3', '4']
+  # The dropped errors are not indexed anymore
+  assert [m.description for m in store.errors_of_type('EVEN')] == ['2', '4']
+  assert [m.description for m in store.errors_of_type('ODD')] == ['3']
+  assert store.errors_of_type('OTHER') == []
+
+  store.add_error(_error(5, 'OTHER'))
+  store.add_error(_error(6, 'OTHER'))
+  assert store.error_types() == ['EVEN', 'OTHER']
+
+
+def test_replace_and_clear():
+  store = MessageStore(capacity=2)
+  store.replace(
+      [_info(i) for i in range(3)],
+      [_error(i, 'TYPE') for i in range(3)],
+  )
+
+  assert store.as_dict() == {
+      'INFO': [_info(1), _info(2)],
+      'ERROR': [_error(1, 'TYPE'), _error(2, 'TYPE')],
+  }
+  assert len(store.errors_of_type('TYPE')) == 2
+
+  store.clear()
+  assert store.as_dict() == {'INFO': [], 'ERROR': []}
+  assert store.error_types() == []
+
+
+def test_invalid_capacity():
+  with pytest.raises(ValueError, match='capacity'):
+    MessageStore(capacity=0)
+
+
+def test_messages_view_is_live():
+  store = MessageStore()
+  messages = MessagesView(store)
+  store.add_info(_info(0))
+  assert messages == {'INFO': [_info(0)], 'ERROR': []}
+
+  messages['ERROR'] = [_error(1, 'ODD')]
+  assert store.errors_of_type('ODD') == [_error(1, 'ODD')]
+  assert messages['INFO'] == [_info(0)]
+
+  del messages['INFO']
+  assert list(store.info) == []
+  assert list(messages) == ['INFO', 'ERROR']
+
+  messages.update({'INFO': [_info(2)]})
+  messages.clear()
+  assert store.as_dict() == {'INFO': [], 'ERROR': []}
+  with pytest.raises(KeyError, match='OTHER'):
+    messages['OTHER'] = []
+
+
+def _info(i: int) -> MT_MessageInfo:
+  return MT_MessageInfo(datetime(2024, 1, 1, 0, 0, i), str(i))
+
+
+def _error(i: int, error_type: str) -> MT_MessageError:
+  return MT_MessageError(datetime(2024, 1, 1, 0, 0, i), error_type, str(i))
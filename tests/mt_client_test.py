@@ -1,5 +1,5 @@
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 import shutil
 from pandas import DataFrame
 import json
@@ -8,9 +8,18 @@ import pytz
 import pytest
 from freezegun import freeze_time
 from os.path import join, exists
+import os
+from time import sleep
+import time
+import threading
 
 from tradeo.paths import resources_test_path
 from tradeo.mt_client import MT_Client
+from tradeo.command import CommandTimeoutError
+from tradeo.bar_builder import BarBuilder
+from tradeo.candle_store import CandleStore, parse_candles
+from tradeo.orders_writer import OrdersStoredWriter
+from tradeo.poll_scheduler import HistoricalRequests
 from tradeo.config import Config
 from tradeo.files import try_load_json, try_read_file
 from tradeo.order import (
@@ -29,7 +38,8 @@ from tradeo.mt_message import MT_MessageError, MT_MessageInfo
 from tradeo.order_type import OrderType
 from tradeo.event_handlers.basic_event_handler import BasicEventHandler
 from tradeo.log import log
-from tradeo.utils import string_to_date_utc
+from tradeo.updates import BAR_DATA, MARKET_DATA, OPEN_ORDERS
+from tradeo.utils import mt_dates_to_utc, string_to_date_utc
 
 
 def test_set_agent_paths():
@@ -242,6 +252,54 @@ def test_check_market_data(tmp_path):
   assert mt_client.market_data == data
 
 
+def test_check_market_data_fills_tick_store(tmp_path):
+  market_data_path = tmp_path / 'Market_Data.json'
+  mt_client = MT_Client()
+  mt_client.path_market_data = market_data_path
+  mt_client.market_data = {}
+  mt_client.tick_store.clear()
+
+  for bid in [1.1, 1.1, 1.2]:
+    with open(market_data_path, 'w') as f:
+      f.write(json.dumps({
+          'EURUSD': {'bid': bid, 'ask': bid + 0.1},
+          'USDJPY': {'bid': 100, 'ask': 100.5},
+      }))
+    mt_client.check_market_data()
+
+  assert list(mt_client.tick_store.buffer('EURUSD').bids) == [1.1, 1.2]
+  assert len(mt_client.tick_store.buffer('USDJPY')) == 1
+  mt_client.tick_store.clear()
+
+
+@patch('tradeo.mt_client.time.time')
+def test_check_market_data_builds_bars(mock_time, tmp_path):
+  market_data_path = tmp_path / 'Market_Data.json'
+  mt_client = MT_Client()
+  mt_client.path_market_data = market_data_path
+  mt_client.market_data = {}
+  mt_client.bar_builder = BarBuilder(['M1'])
+  event_handler = MagicMock()
+  mt_client.event_handler = event_handler
+
+  try:
+    for timestamp, bid in [(0, 1.1), (30, 1.3), (60, 1.2)]:
+      mock_time.return_value = timestamp
+      with open(market_data_path, 'w') as f:
+        f.write(json.dumps({'EURUSD': {'bid': bid, 'ask': bid + 0.1}}))
+      mt_client.check_market_data()
+  finally:
+    mt_client.bar_builder = None
+    mt_client.event_handler = None
+    mt_client.tick_store.clear()
+
+  assert event_handler.on_tick.call_count == 3
+  event_handler.on_bar_close.assert_called_once()
+  _, symbol, time_frame, ohlc = event_handler.on_bar_close.call_args.args
+  assert (symbol, time_frame) == ('EURUSD', 'M1')
+  assert list(ohlc.high) == [1.3]
+
+
 def test_check_bar_data(tmp_path):
 
   # Copy the Bar_Data.json file to the temporary folder
@@ -707,6 +765,11 @@ def test_clean_messages(tmp_path):
   mt_client.clean_messages()
   assert mt_client.messages == {'INFO': [], 'ERROR': []}
 
+  mt_client.messages['ERROR'] = ['error_test']  # type: ignore
+  assert mt_client.get_error_messages() == ['error_test']
+  mt_client.messages.clear()
+  assert mt_client.get_error_messages() == []
+
 
 def test_get_bid_ask(tmp_path):
   market_data_path = tmp_path / 'Market_Data.json'
@@ -728,6 +791,128 @@ def test_get_bid_ask(tmp_path):
   assert ask == 0
 
 
+def test_check_market_data_from_several_threads():
+  mt_client = MT_Client()
+  json_cache = mt_client.json_cache
+  mt_client.market_data = {}
+  # Every thread reads the same new tick
+  mt_client.json_cache = MagicMock()
+  mt_client.json_cache.load_if_changed.side_effect = lambda _: {
+      'EURUSD': {'bid': 1.1, 'ask': 1.2}
+  }
+  mt_client.event_handler = MagicMock()
+  # A slow handler leaves time for the other threads to check the data
+  mt_client.event_handler.on_tick.side_effect = lambda *_: sleep(0.05)
+  threads = [
+      threading.Thread(target=mt_client.check_market_data) for _ in range(4)
+  ]
+  try:
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    assert mt_client.event_handler.on_tick.call_count == 1
+  finally:
+    mt_client.event_handler = None
+    mt_client.json_cache = json_cache
+    mt_client.market_data = {}
+
+
+def test_handlers_run_out_of_the_data_lock(tmp_path):
+  market_data_path = tmp_path / 'Market_Data.json'
+  market_data_path.write_text(json.dumps({'EURUSD': {'bid': 1.1, 'ask': 1.2}}))
+  orders_path = tmp_path / 'Orders.json'
+  shutil.copyfile(
+      Path(f'{resources_test_path()}/AgentFiles/Orders.json'), orders_path
+  )
+  mt_client = MT_Client()
+  mt_client.path_market_data = market_data_path
+  mt_client.path_orders = orders_path
+  mt_client.path_orders_stored = tmp_path / 'Orders_Stored.json'
+  mt_client.market_data = {}
+  mt_client.open_orders = []
+  locked = []
+
+  def handler(*_):
+    # Another thread can take the lock while the handler runs
+    thread = threading.Thread(target=lambda: locked.append(
+        mt_client.data_lock.acquire(timeout=1) and
+        mt_client.data_lock.release() is None
+    ))
+    thread.start()
+    thread.join()
+
+  mt_client.event_handler = MagicMock()
+  mt_client.event_handler.on_tick.side_effect = handler
+  mt_client.event_handler.on_order_event.side_effect = handler
+  try:
+    mt_client.check_market_data()
+    orders = mt_client.check_open_orders()
+    assert locked == [True, True]
+    assert mt_client.event_handler.on_order_event.call_args[0][2] is orders
+  finally:
+    mt_client.event_handler = None
+    mt_client.market_data = {}
+
+
+def test_checks_notify_their_updates(tmp_path):
+  mt_client = MT_Client()
+  for name in ('Market_Data', 'Bar_Data', 'Orders'):
+    shutil.copyfile(
+        Path(f'{resources_test_path()}/AgentFiles/{name}.json'),
+        tmp_path / f'{name}.json',
+    )
+  mt_client.path_market_data = tmp_path / 'Market_Data.json'
+  mt_client.path_bar_data = tmp_path / 'Bar_Data.json'
+  mt_client.path_orders = tmp_path / 'Orders.json'
+  mt_client.path_orders_stored = tmp_path / 'Orders_Stored.json'
+  mt_client.market_data = {}
+  mt_client.bar_data = {}
+  mt_client.open_orders = []
+  mt_client.event_handler = None
+  keys = [MARKET_DATA, BAR_DATA, OPEN_ORDERS]
+  versions = [mt_client.updates.version(key) for key in keys]
+
+  for _ in range(2):
+    mt_client.check_market_data()
+    mt_client.check_bar_data()
+    mt_client.check_open_orders()
+  # The unchanged files are not notified again
+  assert [mt_client.updates.version(key) for key in keys] == [
+      version + 1 for version in versions
+  ]
+  mt_client.market_data = {}
+
+
+def test_get_bid_ask_wakes_on_market_data_update(tmp_path):
+  market_data_path = tmp_path / 'Market_Data.json'
+  market_data_path.write_text(json.dumps({'EURUSD': {'bid': 1.1, 'ask': 1.2}}))
+  mt_client = MT_Client()
+  mt_client.path_market_data = market_data_path
+  mt_client.market_data = {}
+  poll_intervals = mt_client.poll_intervals
+  # Only a notification of the poller can wake up the getter in time
+  mt_client.poll_intervals = {**poll_intervals, 'market_data': 10}
+
+  def poller() -> None:
+    sleep(0.05)
+    market_data_path.write_text(json.dumps({
+        'EURUSD': {'bid': 1.1, 'ask': 1.2},
+        'USDJPY': {'bid': 150.1, 'ask': 150.2},
+    }))
+    mt_client.check_market_data()
+
+  thread = threading.Thread(target=poller)
+  try:
+    start = time.monotonic()
+    thread.start()
+    assert mt_client.get_bid_ask('USDJPY', timeout=5) == (150.1, 150.2)
+    assert time.monotonic() - start < 1
+  finally:
+    thread.join()
+    mt_client.poll_intervals = poll_intervals
+
+
 def test_transform_json_orders_to_orders():
   mt_client = MT_Client()
   order = Order(
@@ -1030,3 +1215,784 @@ def test_get_lot_size(bid_ask_mock, balance_mock):
   stop_loss = 1.08033
   lots = mt_client.get_lot_size(symbol, price, stop_loss, risk_ratio=1)
   assert lots == 0.03
+
+
+@patch.object(log, 'debug')
+def test_start_file_watcher(mock_debug, tmp_path):
+  market_data_path = tmp_path / 'Market_Data.json'
+  mt_client = MT_Client()
+  mt_client.path_market_data = market_data_path
+  mt_client.market_data = {}
+  mt_client.watch_files = True
+  mt_client.set_pollers({
+      'messages': False,
+      'market_data': True,
+      'bar_data': False,
+      'open_orders': False,
+      'historical_data': False,
+      'historical_trades': False,
+  })
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+
+  try:
+    mt_client.start()
+    if mt_client.file_watcher is not None:
+      assert mt_client.file_watcher.watched_directories == {str(tmp_path)}
+
+    shutil.copyfile(
+        Path(f'{resources_test_path()}/AgentFiles/Market_Data.json'),
+        market_data_path
+    )
+    end_time = datetime.now() + timedelta(seconds=2)
+    while 'EURUSD' not in mt_client.market_data and datetime.now() < end_time:
+      sleep(0.01)
+    assert 'EURUSD' in mt_client.market_data
+  finally:
+    mt_client.stop()
+    mt_client.deactivate()
+    mt_client.watch_files = False
+    mt_client.set_pollers({})
+  assert mt_client.file_watcher is None
+
+
+def test_check_open_orders_skips_unchanged_file(tmp_path):
+  orders_path = tmp_path / 'Orders.json'
+  shutil.copyfile(
+      Path(f'{resources_test_path()}/AgentFiles/Orders.json'), orders_path
+  )
+  mt_client = MT_Client()
+  mt_client.path_orders = orders_path
+  mt_client.path_orders_stored = tmp_path / 'Orders_Stored.json'
+
+  orders = mt_client.check_open_orders()
+  assert len(orders) == 2
+
+  with patch.object(
+      mt_client, '_transform_json_orders_to_orders'
+  ) as mock_transform:
+    assert mt_client.check_open_orders() is orders
+    assert mt_client.check_market_data() is mt_client.market_data
+    assert not mock_transform.called
+
+
+def test_set_poll_intervals():
+  mt_client = MT_Client()
+  mt_client.set_poll_intervals({'open_orders': 0.05, 'historical_trades': 1})
+
+  assert mt_client.poll_intervals['open_orders'] == 0.05
+  assert mt_client.poll_intervals['historical_trades'] == 1
+  assert mt_client.poll_intervals['market_data'] == mt_client.sleep_delay
+  with pytest.raises(ValueError, match='Unknown poller'):
+    mt_client.set_poll_intervals({'dummy': 1})
+  with pytest.raises(ValueError, match='must be positive'):
+    mt_client.set_poll_intervals({'messages': 0})
+  mt_client.set_poll_intervals({})
+
+
+def test_start_poll_scheduler(tmp_path):
+  market_data_path = tmp_path / 'Market_Data.json'
+  shutil.copyfile(
+      Path(f'{resources_test_path()}/AgentFiles/Market_Data.json'),
+      market_data_path
+  )
+  mt_client = MT_Client()
+  mt_client.path_market_data = market_data_path
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client.market_data = {}
+  mt_client.set_pollers({
+      'messages': False,
+      'market_data': True,
+      'bar_data': False,
+      'open_orders': False,
+      'historical_data': False,
+      'historical_trades': False,
+  })
+
+  try:
+    mt_client.start()
+    end_time = datetime.now() + timedelta(seconds=2)
+    while 'EURUSD' not in mt_client.market_data and datetime.now() < end_time:
+      sleep(0.01)
+
+    assert 'EURUSD' in mt_client.market_data
+    assert list(mt_client.poll_stats()) == ['market_data']
+    assert mt_client.poll_stats()['market_data']['polls'] > 0
+  finally:
+    mt_client.stop()
+    mt_client.deactivate()
+    mt_client.set_pollers({})
+  assert mt_client.poll_stats() == {}
+
+
+def test_send_command_returns_handle(tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client.pending_commands = {}
+
+  handle = mt_client.send_command('TEST', 'test content')
+
+  assert handle.status == 'written'
+  assert handle.file_path == tmp_path / 'Commands_0.txt'
+  assert mt_client.check_pending_commands() == 1
+
+  # The MQL side deletes the file after reading it
+  handle.file_path.unlink()
+  assert mt_client.check_pending_commands() == 0
+  assert handle.status == 'consumed'
+  assert mt_client.command_stats()['TEST']['count'] >= 1
+  assert mt_client.command_stats()['TEST']['mean_seconds'] >= 0
+
+
+def test_send_command_reuses_consumed_slot(tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client.pending_commands = {}
+
+  first = mt_client.send_command('TEST', 'first')
+  first.file_path.unlink()
+  second = mt_client.send_command('TEST', 'second')
+
+  assert second.file_path == first.file_path
+  assert first.status == 'consumed'
+  assert mt_client.pending_commands == {str(second.file_path): [second]}
+  mt_client.pending_commands = {}
+
+
+@patch('tradeo.mt_client.log')
+def test_send_command_fails_when_command_files_are_busy(mock_log, tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client.pending_commands = {}
+  mt_client.num_command_files = 1
+  mt_client.max_retry_command_seconds = 0.05
+
+  try:
+    mt_client.send_command('TEST', 'first')
+    handle = mt_client.send_command('CLOSE_ORDER', '1,0')
+  finally:
+    mt_client.num_command_files = 50
+    mt_client.max_retry_command_seconds = 10
+    mt_client.pending_commands = {}
+
+  assert handle.status == 'failed'
+  assert mock_log.error.called
+  assert mt_client.command_stats()['CLOSE_ORDER']['failed'] >= 1
+  with pytest.raises(CommandTimeoutError, match='not delivered'):
+    handle.result()
+
+
+def test_send_commands_packs_frames_in_order(tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client.pending_commands = {}
+  mt_client.command_batch_size = 2
+  commands_written = mt_client.commands_written
+
+  try:
+    handles = mt_client.send_commands([
+        ('CLOSE_ORDER', '1,0'), ('CLOSE_ORDER', '2,0'), ('CLOSE_ORDER', '3,0')
+    ])
+  finally:
+    mt_client.command_batch_size = 100
+
+  ids = [handle.command_id for handle in handles]
+  assert try_read_file(tmp_path / 'Commands_0.txt') == (
+      f'<:{ids[0]}|CLOSE_ORDER|1,0:><:{ids[1]}|CLOSE_ORDER|2,0:>'
+  )
+  assert try_read_file(tmp_path / 'Commands_1.txt') == (
+      f'<:{ids[2]}|CLOSE_ORDER|3,0:>'
+  )
+  assert mt_client.check_pending_commands() == 3
+  assert mt_client.commands_written == commands_written + 3
+  assert mt_client.command_throughput()['commands_per_file'] > 0
+  mt_client.pending_commands = {}
+
+
+def test_command_batch(tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client.pending_commands = {}
+
+  with mt_client.command_batch() as handles:
+    mt_client.send_close_order_command(1)
+    with mt_client.command_batch():
+      mt_client.send_close_orders_by_symbol_command('EURUSD')
+    assert not exists(tmp_path / 'Commands_0.txt')
+
+  assert [handle.command for handle in handles] == [
+      'CLOSE_ORDER', 'CLOSE_ORDERS_BY_SYMBOL'
+  ]
+  assert try_read_file(tmp_path / 'Commands_0.txt').count('<:') == 2
+  assert not exists(tmp_path / 'Commands_1.txt')
+  mt_client.pending_commands = {}
+
+
+def test_send_command_skips_slot_written_by_someone_else(tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client.pending_commands = {}
+  mt_client.send_command('TEST', 'first')
+
+  # Written after the slots have been seeded
+  (tmp_path / 'Commands_1.txt').write_text('<:0|OTHER|content:>')
+  handle = mt_client.send_command('TEST', 'second')
+
+  assert handle.file_path == tmp_path / 'Commands_2.txt'
+  assert '|OTHER|' in try_read_file(tmp_path / 'Commands_1.txt')
+  assert mt_client.command_slot_stats()['busy'] == 3
+  mt_client.pending_commands = {}
+
+
+def test_send_command_without_atomic_writes(tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client.pending_commands = {}
+  mt_client.atomic_writes = False
+
+  try:
+    first = mt_client.send_command('TEST', 'first')
+    (tmp_path / 'Commands_1.txt').write_text('<:0|OTHER|content:>')
+    second = mt_client.send_command('TEST', 'second')
+  finally:
+    mt_client.atomic_writes = True
+    mt_client.pending_commands = {}
+
+  assert first.file_path == tmp_path / 'Commands_0.txt'
+  assert second.file_path == tmp_path / 'Commands_2.txt'
+  assert sorted(os.listdir(tmp_path)) == [
+      'Commands_0.txt', 'Commands_1.txt', 'Commands_2.txt'
+  ]
+
+
+def test_check_historical_data_with_candle_store(tmp_path):
+  symbol = 'USDJPY'
+  prefix = 'AgentFiles'
+  Path(tmp_path / prefix).mkdir()
+  historical_path = tmp_path / f'{prefix}/Historical_Data_{symbol}.json'
+
+  mt_client = MT_Client()
+  mt_client.event_handler = MagicMock()
+  mt_client.candle_store = CandleStore(tmp_path / 'candles')
+  mt_client.path_historical_data_prefix = Path(
+      tmp_path / f'{prefix}/Historical_Data_'
+  )
+  mt_client.path_commands_prefix = tmp_path / f'{prefix}/Commands_'
+  mt_client._successful_symbols = set()
+
+  now_date = datetime.now(Config.broker_timezone)
+  rounded_now_date = now_date - timedelta(
+      minutes=now_date.minute % 5,
+      seconds=now_date.second,
+      microseconds=now_date.microsecond,
+  )
+  dates = [
+      (rounded_now_date - timedelta(minutes=5 * i)).strftime('%Y.%m.%d %H:%M')
+      for i in (2, 1, 0)
+  ]
+
+  def candle(close):
+    return {
+        'open': close, 'high': close, 'low': close, 'close': close,
+        'volume': 1.0,
+    }
+
+  # First response with the old candles
+  historical_path.write_text(json.dumps({
+      f'{symbol}_{Config.timeframe}': {dates[0]: candle(1.0)}
+  }))
+  mt_client.check_historical_data(symbol)
+  assert symbol not in mt_client.successful_symbols
+
+  # Only the candles since the last stored one are requested
+  try:
+    handle = mt_client.get_historical_data(symbol, Config.timeframe)
+    last_epoch = mt_client.candle_store.last_epoch(symbol, Config.timeframe)
+    assert handle.content.split(',')[2] == str(last_epoch)
+
+    historical_path.write_text(json.dumps({
+        f'{symbol}_{Config.timeframe}': {
+            dates[1]: candle(2.0), dates[2]: candle(3.0)
+        }
+    }))
+    data = mt_client.check_historical_data(symbol)
+    assert len(data[f'{symbol}_{Config.timeframe}']) == 2
+    assert mt_client.successful_symbols == {symbol}
+    frame = mt_client.historical_data[symbol]
+    assert list(frame.index) == dates
+    assert list(frame.close) == [1.0, 2.0, 3.0]
+
+    ohlc = mt_client.event_handler.on_historical_data.call_args[0][2]
+    assert list(ohlc.close) == [1.0, 2.0, 3.0]
+    assert mt_client.historical_ohlc[symbol] is ohlc
+  finally:
+    mt_client.candle_store = None
+    mt_client.event_handler = None
+    mt_client.pending_commands = {}
+
+
+@freeze_time('2024-01-19 12:00:00')
+def test_get_historical_data_with_candle_store_in_broker_time(tmp_path):
+  symbol = 'USDJPY'
+  mt_client = MT_Client()
+  mt_client.candle_store = CandleStore(tmp_path / 'candles')
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  broker_timezone = pytz.timezone('Etc/GMT-2')
+  # Start of the requested window, as a UTC time
+  start = datetime(2024, 1, 19, 22, tzinfo=pytz.utc) - timedelta(
+      days=Config.lookback_days
+  )
+
+  def last_candle_at(broker_time: datetime) -> None:
+    mt_client.candle_store._candles = {}
+    mt_client.candle_store.merge(symbol, Config.timeframe, parse_candles({
+        broker_time.strftime('%Y.%m.%d %H:%M'): {
+            'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0, 'volume': 1.0,
+        }
+    }))
+
+  try:
+    with patch.object(Config, 'broker_timezone', broker_timezone):
+      # One hour after the start in broker time is one hour before it in UTC
+      last_candle_at(start.replace(tzinfo=None) + timedelta(hours=1))
+      handle = mt_client.get_historical_data(symbol, Config.timeframe)
+      assert handle.content.split(',')[2] == str(int(start.timestamp()))
+
+      last_candle_at(start.replace(tzinfo=None) + timedelta(hours=3))
+      last_epoch = mt_client.candle_store.last_epoch(symbol, Config.timeframe)
+      handle = mt_client.get_historical_data(symbol, Config.timeframe)
+      assert handle.content.split(',')[2] == str(last_epoch)
+  finally:
+    mt_client.candle_store = None
+    mt_client.pending_commands = {}
+
+
+def test_wait_historical_data_in_parallel(tmp_path):
+  symbols = ['USDJPY', 'EURUSD']
+  prefix = 'AgentFiles'
+  Path(tmp_path / prefix).mkdir()
+
+  mt_client = MT_Client()
+  mt_client.path_historical_data_prefix = Path(
+      tmp_path / f'{prefix}/Historical_Data_'
+  )
+  mt_client.path_commands_prefix = tmp_path / f'{prefix}/Commands_'
+  mt_client._successful_symbols = set()
+
+  now_date = datetime.now(Config.broker_timezone)
+  rounded_now_date = now_date - timedelta(
+      minutes=now_date.minute % 5,
+      seconds=now_date.second,
+      microseconds=now_date.microsecond,
+  )
+  for symbol in symbols:
+    path = tmp_path / f'{prefix}/Historical_Data_{symbol}.json'
+    path.write_text(json.dumps({
+        f'{symbol}_{Config.timeframe}': {
+            rounded_now_date.strftime('%Y.%m.%d %H:%M'): {
+                'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0,
+                'volume': 1.0,
+            }
+        }
+    }))
+
+  # Both symbols must be handled at the same time to cross the barrier
+  barrier = threading.Barrier(len(symbols), timeout=5)
+  mt_client.event_handler = MagicMock()
+  mt_client.event_handler.on_historical_data.side_effect = (
+      lambda *args: barrier.wait()
+  )
+  try:
+    with pytest.raises(ValueError, match='max_workers'):
+      mt_client.wait_historical_data(symbols, max_workers=0)
+    remaining_symbols = mt_client.wait_historical_data(
+        symbols, timeout_seconds=0, max_workers=2
+    )
+  finally:
+    mt_client.event_handler = None
+
+  assert remaining_symbols == []
+  assert mt_client.successful_symbols == set(symbols)
+
+
+def test_iter_historical_data(tmp_path):
+  prefix = 'AgentFiles'
+  Path(tmp_path / prefix).mkdir()
+
+  mt_client = MT_Client()
+  mt_client.event_handler = None
+  mt_client.path_historical_data_prefix = Path(
+      tmp_path / f'{prefix}/Historical_Data_'
+  )
+  mt_client.path_commands_prefix = tmp_path / f'{prefix}/Commands_'
+  mt_client._successful_symbols = set()
+
+  now_date = datetime.now(Config.broker_timezone)
+  rounded_now_date = now_date - timedelta(
+      minutes=now_date.minute % 5,
+      seconds=now_date.second,
+      microseconds=now_date.microsecond,
+  )
+
+  def write_historical_data(symbol):
+    path = tmp_path / f'{prefix}/Historical_Data_{symbol}.json'
+    path.write_text(json.dumps({
+        f'{symbol}_{Config.timeframe}': {
+            rounded_now_date.strftime('%Y.%m.%d %H:%M'): {
+                'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0,
+                'volume': 1.0,
+            }
+        }
+    }))
+
+  with pytest.raises(ValueError, match='negative'):
+    mt_client.iter_historical_data(['USDJPY'], timeout_seconds=-1)
+
+  # Only the symbol whose file is current is yielded before the timeout
+  write_historical_data('USDJPY')
+  items = list(mt_client.iter_historical_data(
+      ['USDJPY', 'EURUSD'], timeout_seconds=0
+  ))
+  assert [symbol for symbol, _ in items] == ['USDJPY']
+  assert items[0][1].close[0] == 1.0
+
+  # Already current symbols are yielded first
+  write_historical_data('EURUSD')
+  items = list(mt_client.iter_historical_data(
+      ['USDJPY', 'EURUSD'], timeout_seconds=0
+  ))
+  assert [symbol for symbol, _ in items] == ['USDJPY', 'EURUSD']
+  assert mt_client.wait_historical_data(
+      ['USDJPY', 'EURUSD'], timeout_seconds=0
+  ) == []
+
+
+def test_written_historical_data_is_checked_on_a_worker(tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_historical_data_prefix = tmp_path / 'Historical_Data_'
+  release = threading.Event()
+  checked = []
+
+  def check_historical_data(symbol):
+    checked.append((symbol, threading.current_thread()))
+    release.wait(2)
+
+  def wait_checks(count):
+    end_time = time.monotonic() + 2
+    while len(checked) < count and time.monotonic() < end_time:
+      sleep(0.01)
+
+  mt_client.START = True
+  try:
+    with patch.object(
+        mt_client, 'check_historical_data', side_effect=check_historical_data
+    ):
+      mt_client._on_historical_data_written(
+          tmp_path / 'Historical_Data_EURUSD.json'
+      )
+      wait_checks(1)
+      # Written while the previous check is running
+      for _ in range(2):
+        mt_client._on_historical_data_written(
+            tmp_path / 'Historical_Data_USDJPY.json'
+        )
+      assert len(checked) == 1
+      release.set()
+      wait_checks(2)
+      mt_client._written_symbols_worker.shutdown(wait=True)
+    assert [symbol for symbol, _ in checked] == ['EURUSD', 'USDJPY']
+    assert checked[0][1] is not threading.current_thread()
+  finally:
+    mt_client.START = False
+    mt_client._written_symbols_worker = None
+
+
+def test_iter_historical_data_yields_symbols_completed_elsewhere(tmp_path):
+  mt_client = MT_Client()
+  mt_client.event_handler = None
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client._successful_symbols = set()
+  ohlc = MagicMock()
+  checked = []
+
+  def check_historical_data(symbol):
+    checked.append(symbol)
+    if len(checked) == 2:
+      # The poller completes the first symbol of the round meanwhile
+      mt_client._on_historical_data_current(checked[0], ohlc)
+      mt_client._on_historical_data_current(symbol, ohlc)
+    return {}
+
+  try:
+    with patch.object(
+        mt_client, 'check_historical_data', side_effect=check_historical_data
+    ):
+      items = list(mt_client.iter_historical_data(
+          ['USDJPY', 'EURUSD'], timeout_seconds=0, max_workers=1
+      ))
+    assert sorted(symbol for symbol, _ in items) == ['EURUSD', 'USDJPY']
+    assert all(item is ohlc for _, item in items)
+  finally:
+    for symbol in ('USDJPY', 'EURUSD'):
+      mt_client.historical_ohlc.pop(symbol, None)
+    mt_client._successful_symbols = set()
+
+
+def test_historical_data_poller_reads_changed_files_by_priority(tmp_path):
+  prefix = 'AgentFiles'
+  Path(tmp_path / prefix).mkdir()
+
+  mt_client = MT_Client()
+  mt_client.event_handler = None
+  mt_client.path_historical_data_prefix = Path(
+      tmp_path / f'{prefix}/Historical_Data_'
+  )
+  mt_client._successful_symbols = set()
+  mt_client.historical_requests = HistoricalRequests()
+  mt_client.historical_requests.requested('USDJPY', now=0)
+  mt_client.historical_requests.requested('EURUSD', now=1)
+
+  for symbol in ('USDJPY', 'EURUSD'):
+    (tmp_path / f'{prefix}/Historical_Data_{symbol}.json').write_text(
+        json.dumps({f'{symbol}_{Config.timeframe}': {}})
+    )
+
+  with patch.object(Config, 'symbols', ['EURUSD', 'GBPUSD', 'USDJPY']):
+    # The oldest request is read first, then the other changed file
+    assert f'USDJPY_{Config.timeframe}' in mt_client.check_historical_data()
+    assert f'EURUSD_{Config.timeframe}' in mt_client.check_historical_data()
+    # No file has changed since it was read
+    assert mt_client.check_historical_data() == {}
+
+  stats = mt_client.historical_data_wait_stats()
+  assert stats['USDJPY']['reads'] == 1
+  assert stats['USDJPY']['skips'] == 2
+  assert stats['GBPUSD']['skips'] == 1
+  assert stats['EURUSD']['waiting_seconds'] > 0
+  mt_client.historical_requests = HistoricalRequests()
+
+
+def test_check_open_orders_sends_order_delta(tmp_path):
+  orders_path = tmp_path / 'Orders.json'
+  shutil.copyfile(
+      Path(f'{resources_test_path()}/AgentFiles/Orders.json'), orders_path
+  )
+  mt_client = MT_Client()
+  mt_client.path_orders = orders_path
+  mt_client.path_orders_stored = tmp_path / 'Orders_Stored.json'
+  mt_client.open_orders = []
+  mt_client.event_handler = MagicMock()
+  try:
+    first_orders = mt_client.check_open_orders()
+    delta = mt_client.event_handler.on_order_delta.call_args[0][2]
+    assert len(delta.opened) == 2
+    assert mt_client.event_handler.on_order_event.call_count == 1
+
+    # Only the PnL of one order changes
+    data = json.loads(orders_path.read_text())
+    data['orders']['2023993175']['pnl'] = 10.5
+    orders_path.write_text(json.dumps(data))
+    orders = mt_client.check_open_orders()
+
+    delta = mt_client.event_handler.on_order_delta.call_args[0][2]
+    assert [o.ticket for o in delta.pnl_changed] == [2023993175]
+    assert not delta.opened_or_closed
+    assert mt_client.event_handler.on_order_event.call_count == 1
+    # The unchanged order is the same object
+    assert orders[1] is first_orders[1]
+    assert orders[0].pnl == 10.5
+  finally:
+    mt_client.event_handler = None
+
+
+def test_check_open_orders_writes_orders_stored_on_stop(tmp_path):
+  orders_path = tmp_path / 'Orders.json'
+  shutil.copyfile(
+      Path(f'{resources_test_path()}/AgentFiles/Orders.json'), orders_path
+  )
+  mt_client = MT_Client()
+  writer = mt_client.orders_stored_writer
+  mt_client.orders_stored_writer = OrdersStoredWriter(interval_ms=60000)
+  mt_client.path_orders = orders_path
+  mt_client.path_orders_stored = tmp_path / 'Orders_Stored.json'
+  mt_client.open_orders = []
+  try:
+    mt_client.check_open_orders()
+    mt_client.stop()
+
+    assert try_load_json(mt_client.path_orders_stored) == json.loads(
+        orders_path.read_text()
+    )
+  finally:
+    mt_client.orders_stored_writer = writer
+
+
+def test_order_book_follows_open_orders(tmp_path):
+  orders_path = tmp_path / 'Orders.json'
+  shutil.copyfile(
+      Path(f'{resources_test_path()}/AgentFiles/Orders.json'), orders_path
+  )
+  mt_client = MT_Client()
+  mt_client.path_orders = orders_path
+  mt_client.path_orders_stored = tmp_path / 'Orders_Stored.json'
+  mt_client.open_orders = []
+  orders = mt_client.check_open_orders()
+
+  book = mt_client.order_book
+  assert book.ticket.tolist() == [order.ticket for order in orders]
+  assert mt_client.order_book is book
+
+  mt_client.open_orders = orders[:1]
+  assert mt_client.order_book.ticket.tolist() == [orders[0].ticket]
+
+
+def test_check_historical_trades_only_builds_new_trades(tmp_path):
+  historical_trades_path = tmp_path / 'Historical_Trades.json'
+  shutil.copyfile(
+      Path(f'{resources_test_path()}/AgentFiles/Historical_Trades.json'),
+      historical_trades_path,
+  )
+  mt_client = MT_Client()
+  mt_client.path_historical_trades = historical_trades_path
+  mt_client.historical_trades_by_ticket = {}
+  mt_client._seen_trade_tickets = set()
+  mt_client.event_handler = MagicMock()
+  try:
+    first_trades = mt_client.check_historical_trades()
+    new_trades = mt_client.event_handler.on_historical_trades.call_args[0][1]
+    assert [t.ticket for t in new_trades] == [2015257378]
+
+    # The unchanged file is not read again
+    mt_client.check_historical_trades()
+    assert mt_client.event_handler.on_historical_trades.call_count == 1
+
+    data = json.loads(historical_trades_path.read_text())
+    data['2015257379'] = dict(data['2015257378'], symbol='EURUSD')
+    historical_trades_path.write_text(json.dumps(data))
+    trades = mt_client.check_historical_trades()
+
+    new_trades = mt_client.event_handler.on_historical_trades.call_args[0][1]
+    assert [t.ticket for t in new_trades] == [2015257379]
+    assert trades[0] is first_trades[0]
+    assert set(mt_client.historical_trades_by_ticket) == {
+        2015257378, 2015257379
+    }
+
+    # Trades out of a shorter snapshot are dropped from the trades
+    short_data = {'2015257379': data['2015257379']}
+    historical_trades_path.write_text(json.dumps(short_data))
+    assert [t.ticket for t in mt_client.check_historical_trades()] == [
+        2015257379
+    ]
+    assert mt_client.event_handler.on_historical_trades.call_count == 2
+
+    # but they are not reported again when a longer snapshot has them
+    data['2015257380'] = dict(data['2015257378'], symbol='USDJPY')
+    historical_trades_path.write_text(json.dumps(data))
+    assert [t.ticket for t in mt_client.check_historical_trades()] == [
+        2015257378, 2015257379, 2015257380
+    ]
+    new_trades = mt_client.event_handler.on_historical_trades.call_args[0][1]
+    assert [t.ticket for t in new_trades] == [2015257380]
+  finally:
+    mt_client.event_handler = None
+
+
+def test_check_historical_trades_calls_handlers_without_trades(tmp_path):
+  historical_trades_path = tmp_path / 'Historical_Trades.json'
+  shutil.copyfile(
+      Path(f'{resources_test_path()}/AgentFiles/Historical_Trades.json'),
+      historical_trades_path,
+  )
+  calls = []
+
+  class LegacyEventHandler(BasicEventHandler):
+    def on_historical_trades(self, mt_client: MT_Client) -> None:
+      calls.append(mt_client)
+
+  mt_client = MT_Client()
+  mt_client.path_historical_trades = historical_trades_path
+  mt_client.historical_trades_by_ticket = {}
+  mt_client._seen_trade_tickets = set()
+  mt_client.event_handler = LegacyEventHandler()
+  try:
+    mt_client.check_historical_trades()
+    assert calls == [mt_client]
+  finally:
+    mt_client.event_handler = None
+
+
+def test_check_messages_only_parses_new_entries(tmp_path):
+  messages_path = tmp_path / 'Messages.json'
+  shutil.copyfile(
+      Path(f'{resources_test_path()}/AgentFiles/Messages.json'), messages_path
+  )
+  broker_dt = datetime(
+      2024, 1, 18, 22, 26, 30,
+      tzinfo=pytz.timezone(str(Config.broker_timezone))
+  )
+  mt_client = MT_Client()
+  mt_client.path_messages = messages_path
+  mt_client.messages = {'INFO': [], 'ERROR': []}
+  mt_client._last_messages_millis = 0
+  with freeze_time(broker_dt):
+    mt_client.check_messages()
+
+    data = json.loads(messages_path.read_text())
+    data['33333333'] = dict(data['22222222'], description='New Error')
+    messages_path.write_text(json.dumps(data))
+    with patch(
+        'tradeo.mt_client.mt_dates_to_utc', wraps=mt_dates_to_utc
+    ) as mock_dates:
+      mt_client.check_messages()
+
+  assert mock_dates.call_args[0][0] == ['2024.01.18 22:26:30']
+  errors = mt_client.get_error_messages('WRONG_FORMAT_START_IDENTIFIER')
+  assert [e.description for e in errors] == ['Dummy Error', 'New Error']
+  assert mt_client.get_error_messages('OTHER') == []
+  assert len(mt_client.get_info_messages()) == 1
+
+
+def test_command_file_exist_uses_the_command_index(tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  handle = mt_client.get_historical_data('EURUSD', 'M5')
+  command_file = tmp_path / 'Commands_0.txt'
+
+  with patch('tradeo.command.try_read_file') as mock_read:
+    assert mt_client.command_file_exist('EURUSD') == [command_file]
+    assert mt_client.command_file_exist('USDJPY') == []
+  mock_read.assert_not_called()
+
+  try:
+    mt_client._on_historical_data_current('EURUSD', MagicMock())
+    assert not command_file.exists()
+    assert mt_client.command_file_exist('EURUSD') == []
+    # The command was never read by the expert advisor
+    assert handle.status == 'failed'
+    assert handle.latency is None
+    assert str(command_file) not in mt_client.pending_commands
+    assert 0 not in mt_client._get_command_slots()._busy
+  finally:
+    mt_client.successful_symbols.discard('EURUSD')
+    mt_client.historical_ohlc.pop('EURUSD', None)
+
+
+def test_historical_data_current_keeps_batched_command_files(tmp_path):
+  mt_client = MT_Client()
+  mt_client.path_commands_prefix = tmp_path / 'Commands_'
+  mt_client.pending_commands = {}
+  with mt_client.command_batch() as handles:
+    mt_client.get_historical_data('EURUSD', 'M5')
+    mt_client.send_command('TEST', 'test content')
+  command_file = tmp_path / 'Commands_0.txt'
+
+  try:
+    mt_client._on_historical_data_current('EURUSD', MagicMock())
+    # The other command of the file has not been read yet
+    assert command_file.exists()
+    assert [handle.status for handle in handles] == ['written', 'written']
+  finally:
+    command_file.unlink()
+    mt_client.check_pending_commands()
+    mt_client.successful_symbols.discard('EURUSD')
+    mt_client.historical_ohlc.pop('EURUSD', None)
@@ -149,3 +149,58 @@ def test_ohlc_raises_when_convert_to_utc_type_is_invalid():
 
   with pytest.raises(TypeError, match='convert_to_utc must be'):
     OHLC(df, datetime_column_name='datetime', convert_to_utc=123)
+
+
+def test_ohlc_from_arrays():
+  epoch = np.array([1704103200, 1704106800], dtype=np.int64)
+  prices = np.array([1.0, 2.0])
+
+  ohlc = OHLC.from_arrays(epoch, prices, prices, prices, prices)
+
+  assert ohlc.open is prices
+  assert np.array_equal(ohlc.volume, np.array([0.0, 0.0]))
+  assert ohlc._datetime is None
+  assert ohlc.datetime[0] == pd.Timestamp('2024-01-01 10:00:00+00:00')
+  assert ohlc.to_dataframe().index[1] == pd.Timestamp(
+      '2024-01-01 11:00:00+00:00'
+  )
+
+  naive = OHLC.from_arrays(epoch, prices, prices, prices, prices, utc=False)
+  assert naive.datetime[0] == datetime(2024, 1, 1, 10, 0)
+
+
+def test_ohlc_epoch_from_dataframe():
+  df = pd.DataFrame({
+      'datetime': ['2024-01-01 10:00', '2024-01-01 11:00'],
+      'open': [1.0, 2.0],
+      'high': [1.5, 2.5],
+      'low': [0.8, 1.8],
+      'close': [1.2, 2.2],
+  })
+
+  ohlc = OHLC(df, datetime_column_name='datetime', convert_to_utc='UTC')
+
+  assert list(ohlc.epoch) == [1704103200, 1704106800]
+
+
+def test_ohlc_from_mt_candles_matches_dataframe_path():
+  candles = {
+      '2024.03.31 00:55': {
+          'open': 1.0, 'high': 1.5, 'low': 0.5, 'close': 1.2, 'volume': 10.0
+      },
+      '2024.03.31 03:05': {
+          'open': 2.0, 'high': 2.5, 'low': 1.5, 'close': 2.2, 'volume': 20.0
+      },
+  }
+  df = pd.DataFrame.from_dict(candles, orient='index')
+
+  for timezone in (None, 'Europe/Madrid'):
+    expected = OHLC(df, convert_to_utc=timezone)
+    ohlc = OHLC.from_mt_candles(candles, convert_to_utc=timezone)
+    assert list(ohlc.datetime) == list(expected.datetime)
+    assert list(ohlc.epoch) == list(expected.epoch)
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+      assert list(getattr(ohlc, column)) == list(getattr(expected, column))
+      assert getattr(ohlc, column).flags.c_contiguous
+
+  assert len(OHLC.from_mt_candles({})) == 0
@@ -0,0 +1,118 @@
+from datetime import datetime
+from pathlib import Path
+import json
+
+import numpy as np
+import pytz
+
+from tradeo.order import (
+    ImmutableOrderDetails,
+    MutableOrderDetails,
+    Order,
+    OrderPrice,
+)
+from tradeo.order_book import ORDER_TYPES, OrderBook
+from tradeo.order_type import OrderType
+from tradeo.paths import resources_test_path
+
+
+def test_from_json():
+  path = Path(f'{resources_test_path()}/AgentFiles/Orders.json')
+  json_orders = json.loads(path.read_text())['orders']
+
+  book = OrderBook.from_json(json_orders, pytz.timezone('Etc/GMT-2'))
+
+  assert len(book) == len(json_orders)
+  assert book.ticket.tolist() == [int(t) for t in json_orders]
+  first = next(iter(json_orders.values()))
+  assert book.symbols[book.symbol_id[0]] == first['symbol']
+  assert ORDER_TYPES[book.order_type[0]] == first['type']
+  assert book.price[0] == first['open_price']
+  assert book.stop_loss[0] == first['SL']
+  # 2024.01.19 00:30:43 at UTC+2
+  assert book.open_time[0] == datetime(
+      2024, 1, 18, 22, 30, 43, tzinfo=pytz.utc
+  ).timestamp()
+
+
+def test_from_json_without_open_time():
+  order = {
+      'symbol': 'EURUSD', 'type': 'buy', 'magic': 1, 'lots': 0.01,
+      'open_price': 1.1, 'SL': 0, 'TP': 0, 'pnl': 0,
+  }
+  json_orders = {
+      '1': order,
+      '2': {**order, 'open_time': None},
+      '3': {**order, 'open_time': '2024.01.19 00:30:43'},
+  }
+
+  book = OrderBook.from_json(json_orders, pytz.timezone('Etc/GMT-2'))
+
+  open_time = datetime(2024, 1, 18, 22, 30, 43, tzinfo=pytz.utc).timestamp()
+  assert book.open_time.tolist() == [0, 0, open_time]
+  assert book.count('EURUSD') == 3
+
+
+def test_indices():
+  book = OrderBook.from_orders([
+      _order(1, 'EURUSD', magic='10'),
+      _order(2, 'USDJPY', magic='10'),
+      _order(3, 'EURUSD', magic='20'),
+  ])
+
+  assert book.count() == 3
+  assert book.tickets('EURUSD').tolist() == [1, 3]
+  assert book.tickets(magic=10).tolist() == [1, 2]
+  assert book.tickets('EURUSD', magic='10').tolist() == [1]
+  assert book.count('AUDUSD') == 0
+  assert book.count(magic=30) == 0
+
+
+def test_aggregates():
+  book = OrderBook.from_orders([
+      _order(1, 'EURUSD', lots=0.2, price=1.1, stop_loss=1.09, pnl=5),
+      _order(2, 'EURUSD', buy=False, lots=0.1, price=1.1, stop_loss=1.12),
+      _order(3, 'EURUSD', market=False, lots=1, price=1.0, stop_loss=0.9),
+      _order(4, 'USDJPY', buy=False, lots=0.3, price=150, pnl=-2),
+  ])
+
+  exposure = book.net_exposure()
+  assert np.isclose(exposure['EURUSD'], 0.1)
+  assert np.isclose(exposure['USDJPY'], -0.3)
+  assert np.isclose(book.net_exposure(include_pending=True)['EURUSD'], 1.1)
+
+  risk = book.risk_to_stop_loss()
+  assert np.isclose(risk['EURUSD'], 0.2 * 0.01 + 0.1 * 0.02 + 1 * 0.1)
+  # Orders without stop loss are not counted
+  assert risk['USDJPY'] == 0
+
+  assert book.pnl_by_symbol() == {'EURUSD': 5, 'USDJPY': -2}
+
+
+def test_empty_book():
+  book = OrderBook.from_json({})
+
+  assert len(book) == 0
+  assert book.count('EURUSD') == 0
+  assert book.net_exposure() == {}
+
+
+def _order(
+    ticket: int,
+    symbol: str,
+    buy: bool = True,
+    market: bool = True,
+    lots: float = 0.01,
+    price: float = 1.0,
+    stop_loss: float = 0,
+    pnl: float = 0,
+    magic: str = '1',
+) -> Order:
+  return Order(
+      MutableOrderDetails(OrderPrice(price, stop_loss, 0), lots=lots),
+      ImmutableOrderDetails(
+          symbol, OrderType(buy=buy, market=market), magic, ''
+      ),
+      ticket=ticket,
+      pnl=pnl,
+  )
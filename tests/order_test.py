@@ -0,0 +1,56 @@
+from tradeo.order import (
+    ImmutableOrderDetails,
+    MutableOrderDetails,
+    Order,
+    OrderDelta,
+    OrderPrice,
+    diff_orders,
+)
+from tradeo.order_type import OrderType
+
+
+def test_diff_orders():
+  unchanged = _order(1)
+  previous = {
+      1: unchanged, 2: _order(2), 3: _order(3), 4: _order(4), 5: _order(5)
+  }
+  current = {
+      1: unchanged,
+      2: _order(2),
+      3: _order(3, stop_loss=1.05),
+      4: _order(4, pnl=2.5),
+      6: _order(6),
+  }
+
+  delta = diff_orders(previous, current)
+
+  assert [o.ticket for o in delta.opened] == [6]
+  assert [o.ticket for o in delta.closed] == [5]
+  assert delta.closed[0] is previous[5]
+  assert [o.ticket for o in delta.modified] == [3]
+  assert [o.ticket for o in delta.pnl_changed] == [4]
+  assert delta.opened_or_closed
+  assert repr(delta) == (
+      'OrderDelta(opened=1, closed=1, modified=1, pnl_changed=1)'
+  )
+
+
+def test_empty_order_delta():
+  delta = diff_orders({1: _order(1)}, {1: _order(1)})
+  assert not delta
+  assert not delta.opened_or_closed
+  assert not OrderDelta()
+
+
+def _order(ticket, stop_loss=1.0, pnl=0.0):
+  return Order(
+      MutableOrderDetails(OrderPrice(price=1.1, stop_loss=stop_loss)),
+      ImmutableOrderDetails(
+          symbol='EURUSD',
+          order_type=OrderType(buy=True, market=True),
+          magic='1',
+          comment='comment',
+      ),
+      ticket=ticket,
+      pnl=pnl,
+  )
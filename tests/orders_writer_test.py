@@ -0,0 +1,152 @@
+import json
+from time import sleep
+from unittest.mock import patch
+
+import pytest
+
+from tradeo.orders_writer import (
+    JOURNAL_FILE_NAME,
+    OrdersStoredWriter,
+    orders_journal_record,
+    replay_orders_journal,
+)
+
+
+def test_writer_coalesces_snapshots(tmp_path):
+  path = tmp_path / 'Orders_Stored.json'
+  writer = OrdersStoredWriter(interval_ms=60000)
+  writer.submit(path, _snapshot(pnl=1.0))
+  writer.flush()
+  for pnl in range(2, 12):
+    writer.submit(path, _snapshot(pnl=float(pnl)))
+
+  # The following snapshots wait for the interval
+  assert json.loads(path.read_text())['orders']['1']['pnl'] == 1.0
+
+  writer.stop()
+  assert json.loads(path.read_text())['orders']['1']['pnl'] == 11.0
+  assert writer.stats() == {'submitted': 11, 'written': 2, 'coalesced': 9}
+
+
+def test_writer_writes_in_background(tmp_path):
+  path = tmp_path / 'Orders_Stored.json'
+  writer = OrdersStoredWriter(interval_ms=1)
+  try:
+    writer.submit(path, _snapshot(pnl=3.0))
+    for _ in range(200):
+      if path.exists():
+        break
+      sleep(0.01)
+    assert json.loads(path.read_text())['orders']['1']['pnl'] == 3.0
+  finally:
+    writer.stop()
+
+
+def test_writer_survives_write_errors(tmp_path):
+  path = tmp_path / 'Orders_Stored.json'
+  writer = OrdersStoredWriter(interval_ms=1)
+  try:
+    with patch('tradeo.orders_writer.log') as mock_log:
+      # Sets can not be encoded
+      writer.submit(path, {'orders': {1, 2}})
+      for _ in range(200):
+        if mock_log.error.called:
+          break
+        sleep(0.01)
+      assert mock_log.error.called
+
+    writer.submit(path, _snapshot(pnl=3.0))
+    for _ in range(200):
+      if path.exists():
+        break
+      sleep(0.01)
+    assert json.loads(path.read_text())['orders']['1']['pnl'] == 3.0
+  finally:
+    writer.stop()
+
+
+def test_writer_journal(tmp_path):
+  path = tmp_path / 'Orders_Stored.json'
+  writer = OrdersStoredWriter(interval_ms=60000, journal=True)
+  writer.submit(path, _snapshot(pnl=1.0))
+  writer.flush()
+  writer.submit(path, _snapshot(pnl=1.0))
+  writer.flush()
+  last = _snapshot(pnl=2.0)
+  del last['orders']['2']
+  last['orders']['3'] = {'symbol': 'USDJPY', 'pnl': 0.0}
+  writer.submit(path, last)
+  writer.flush()
+
+  # The journal is compacted on the first snapshot
+  assert json.loads(path.read_text()) == _snapshot(pnl=1.0)
+  journal_path = tmp_path / JOURNAL_FILE_NAME
+  lines = journal_path.read_text().splitlines()
+  # The unchanged snapshot does not add a line
+  assert len(lines) == 2
+  record = json.loads(lines[1])
+  assert set(record['orders']) == {'1', '3'}
+  assert record['closed'] == ['2']
+  assert 'account_info' not in record
+  assert replay_orders_journal(journal_path) == last
+
+  writer.stop()
+  assert json.loads(path.read_text()) == last
+  assert len(journal_path.read_text().splitlines()) == 1
+  assert replay_orders_journal(journal_path) == last
+
+
+def test_writer_journal_is_compacted(tmp_path):
+  path = tmp_path / 'Orders_Stored.json'
+  journal_path = tmp_path / JOURNAL_FILE_NAME
+  journal_path.write_text('{"orders": {"9": {}}}\n' * 10)
+  writer = OrdersStoredWriter(
+      interval_ms=60000, journal=True, compact_entries=3
+  )
+  for pnl in range(10):
+    writer.submit(path, _snapshot(pnl=float(pnl)))
+    writer.flush()
+
+    assert len(journal_path.read_text().splitlines()) <= 3
+    assert replay_orders_journal(journal_path) == _snapshot(pnl=float(pnl))
+  # Compacted on the snapshots 0, 3, 6 and 9
+  assert json.loads(path.read_text()) == _snapshot(pnl=9.0)
+  writer.stop()
+
+
+def test_orders_journal_record():
+  first = _snapshot(pnl=1.0)
+  assert orders_journal_record(None, first) == first
+  assert orders_journal_record(first, _snapshot(pnl=1.0)) is None
+
+  second = _snapshot(pnl=1.0)
+  second['account_info']['balance'] = 90.0
+  assert orders_journal_record(first, second) == {
+      'account_info': second['account_info']
+  }
+
+
+def test_replay_orders_journal_ignores_partial_line(tmp_path):
+  journal_path = tmp_path / JOURNAL_FILE_NAME
+  journal_path.write_text(
+      json.dumps(_snapshot(pnl=1.0)) + '\n' + '{"orders": {"1": {"pn'
+  )
+
+  assert replay_orders_journal(journal_path) == _snapshot(pnl=1.0)
+
+
+def test_writer_invalid_interval():
+  with pytest.raises(ValueError, match='interval_ms'):
+    OrdersStoredWriter(interval_ms=-1)
+  with pytest.raises(ValueError, match='compact_entries'):
+    OrdersStoredWriter(compact_entries=0)
+
+
+def _snapshot(pnl: float) -> dict:
+  return {
+      'account_info': {'balance': 100.0, 'equity': 100.0},
+      'orders': {
+          '1': {'symbol': 'EURUSD', 'pnl': pnl},
+          '2': {'symbol': 'AUDUSD', 'pnl': 0.5},
+      },
+  }
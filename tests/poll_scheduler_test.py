@@ -0,0 +1,150 @@
+from unittest.mock import patch
+import threading
+import time
+
+import pytest
+
+from tradeo.poll_scheduler import HistoricalRequests, PollScheduler
+
+
+def test_run_pending_polls_due_sources_by_interval():
+  calls = []
+  scheduler = PollScheduler()
+  scheduler.add_source('ticks', lambda: calls.append('ticks'), 0.01)
+  scheduler.add_source('orders', lambda: calls.append('orders'), 10)
+
+  delay = scheduler.run_pending()
+
+  assert sorted(calls) == ['orders', 'ticks']
+  assert 0 < delay <= 0.01
+
+  time.sleep(0.02)
+  scheduler.run_pending()
+
+  assert calls.count('ticks') == 2
+  assert calls.count('orders') == 1
+  stats = scheduler.stats()
+  assert stats['ticks']['polls'] == 2
+  assert stats['orders']['polls'] == 1
+  assert stats['orders']['interval'] == 10
+
+
+def test_remove_source():
+  calls = []
+  scheduler = PollScheduler(idle_timeout=0.3)
+  scheduler.add_source('ticks', lambda: calls.append('ticks'), 0.01)
+  scheduler.remove_source('ticks')
+
+  assert scheduler.run_pending() == 0.3
+  assert calls == []
+  assert scheduler.sources == []
+
+
+def test_errors_are_counted():
+  def callback():
+    raise ValueError('error')
+
+  scheduler = PollScheduler()
+  scheduler.add_source('orders', callback, 1)
+  with patch('tradeo.poll_scheduler.log') as mock_log:
+    scheduler.run_pending()
+
+  assert mock_log.error.called
+  assert scheduler.stats()['orders']['errors'] == 1
+  assert scheduler.stats()['orders']['polls'] == 1
+
+
+def test_blocking_sources_run_on_workers():
+  calls = []
+  release = threading.Event()
+
+  def slow_callback():
+    calls.append(threading.current_thread().name)
+    release.wait(5)
+
+  scheduler = PollScheduler()
+  scheduler.add_source('trades', slow_callback, 0.001, blocking=True)
+  scheduler.add_source('ticks', lambda: calls.append('ticks'), 0.001)
+  try:
+    for _ in range(3):
+      scheduler.run_pending()
+      time.sleep(0.01)
+
+    # The ticks are not delayed and the slow source is not run again
+    assert calls.count('ticks') == 3
+    trades_calls = [c for c in calls if c != 'ticks']
+    assert len(trades_calls) == 1
+    assert trades_calls[0].startswith('PollScheduler')
+  finally:
+    release.set()
+    scheduler.stop()
+
+
+def test_stop_waits_for_the_thread():
+  polling = threading.Event()
+
+  def callback():
+    polling.set()
+    time.sleep(0.05)
+
+  scheduler = PollScheduler()
+  scheduler.add_source('ticks', callback, 0.001)
+  scheduler.start()
+  thread = scheduler._thread
+  polling.wait(2)
+  # The thread is still polling when the scheduler is stopped
+  scheduler.stop()
+
+  assert not thread.is_alive()
+  scheduler.start()
+  assert scheduler._thread is not thread
+  scheduler.stop()
+
+
+def test_invalid_interval():
+  scheduler = PollScheduler()
+  with pytest.raises(ValueError, match='interval must be positive'):
+    scheduler.add_source('orders', lambda: None, 0)
+
+
+def test_start_and_stop_thread():
+  calls = []
+  scheduler = PollScheduler()
+  scheduler.start()
+  scheduler.add_source('ticks', lambda: calls.append('ticks'), 0.005)
+
+  end_time = time.monotonic() + 2
+  while len(calls) < 3 and time.monotonic() < end_time:
+    time.sleep(0.01)
+  scheduler.stop()
+
+  assert len(calls) >= 3
+  assert not scheduler.active
+
+
+def test_historical_requests_order_and_stats():
+  requests = HistoricalRequests()
+  requests.requested('EURUSD', now=0)
+  requests.requested('USDJPY', now=1)
+  assert requests.order(['GBPUSD', 'USDJPY', 'EURUSD']) == [
+      'EURUSD', 'USDJPY', 'GBPUSD'
+  ]
+
+  # A slow previous response delays the expected time of the next one
+  assert requests.completed('EURUSD', now=5) == 5
+  assert requests.completed('GBPUSD') is None
+  requests.requested('EURUSD', now=10)
+  requests.requested('USDJPY', now=11)
+  assert requests.order(['EURUSD', 'USDJPY']) == ['USDJPY', 'EURUSD']
+
+  requests.read('USDJPY')
+  requests.skipped('USDJPY')
+  stats = requests.stats(now=12)
+  assert stats['USDJPY'] == {
+      'waiting_seconds': 1,
+      'last_latency_seconds': 0.0,
+      'reads': 1,
+      'skips': 1,
+  }
+  assert stats['EURUSD']['waiting_seconds'] == 2
+  assert stats['EURUSD']['last_latency_seconds'] == 5
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from tradeo.tick_store import TickBuffer, TickStore, BID, SPREAD
+
+
+def test_tick_buffer_last_n_is_a_contiguous_view():
+  buffer = TickBuffer(3)
+  assert buffer.last_n().shape == (4, 0)
+
+  for i in range(5):
+    buffer.append(float(i), 1.0 + i, 1.5 + i)
+
+  assert len(buffer) == 3
+  assert buffer.count == 5
+  assert np.array_equal(buffer.timestamps, [2.0, 3.0, 4.0])
+  assert np.array_equal(buffer.last_n(2)[BID], [4.0, 5.0])
+  assert np.array_equal(buffer.spreads, [0.5, 0.5, 0.5])
+  assert np.array_equal(buffer.asks, [3.5, 4.5, 5.5])
+  assert np.array_equal(buffer.bids, [3.0, 4.0, 5.0])
+
+  view = buffer.last_n()
+  assert np.shares_memory(view, buffer._data)
+  assert not view.flags.writeable
+  assert buffer.bids.flags.c_contiguous
+
+
+def test_tick_buffer_capacity():
+  with pytest.raises(ValueError, match='capacity must be positive'):
+    TickBuffer(0)
+
+
+def test_tick_store():
+  store = TickStore(capacity=2)
+  store.append('EURUSD', 1.1, 1.2, timestamp=1.0)
+  store.append('EURUSD', 1.3, 1.5)
+
+  assert 'EURUSD' in store
+  assert store.symbols == ['EURUSD']
+  assert store.last_n('EURUSD').shape == (4, 2)
+  assert store.last_n('EURUSD', 1)[SPREAD][0] == pytest.approx(0.2)
+  assert store.last_n('USDJPY').shape == (4, 0)
+  assert store.buffer('USDJPY') is None
+
+  store.clear('EURUSD')
+  assert 'EURUSD' not in store
+  store.append('EURUSD', 1.1, 1.2)
+  store.clear()
+  assert store.symbols == []
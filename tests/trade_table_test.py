@@ -0,0 +1,102 @@
+from datetime import date, datetime
+from pathlib import Path
+import json
+
+import numpy as np
+import pytest
+import pytz
+
+from tradeo.paths import resources_test_path
+from tradeo.trade import Trade, TradeFinancials, TradeMetadata, TradeTimes
+from tradeo.trade_table import TradeTable
+
+
+def test_from_json():
+  path = Path(f'{resources_test_path()}/AgentFiles/Historical_Trades.json')
+  json_trades = json.loads(path.read_text())
+
+  table = TradeTable.from_json(json_trades, pytz.timezone('Etc/GMT-2'))
+
+  assert len(table) == 1
+  assert table.ticket.tolist() == [2015257378]
+  assert table.symbols == ['GBPCAD']
+  assert table.closing.tolist() == [True]
+  assert np.isclose(table.net[0], -2.45 - 0.03)
+  # 2023.09.29 23:52:28 at UTC+2
+  assert table.deal_time[0] == datetime(
+      2023, 9, 29, 21, 52, 28, tzinfo=pytz.utc
+  ).timestamp()
+
+
+def test_group_by():
+  table = TradeTable.from_trades(_trades())
+
+  by_symbol = table.group_by('symbol')
+  assert by_symbol['EURUSD'] == pytest.approx({
+      'pnl': 7.0, 'commission': -0.3, 'swap': 0.0, 'net': 6.7, 'count': 3.0
+  })
+  assert by_symbol['USDJPY']['net'] == pytest.approx(-4.1)
+
+  by_day = table.group_by('day')
+  assert list(by_day) == [date(2024, 1, 1), date(2024, 1, 2)]
+  assert by_day[date(2024, 1, 2)]['count'] == 2
+
+  assert table.group_by('magic')[20]['count'] == 1
+  assert set(table.group_by('comment')) == {'', 'tp'}
+
+  with pytest.raises(ValueError, match='Invalid group key'):
+    table.group_by('hour')
+
+
+def test_statistics():
+  table = TradeTable.from_trades(_trades())
+
+  # The entry_in deal is not a closing deal
+  assert table.win_rate() == pytest.approx(2 / 3)
+  assert table.profit_factor() == pytest.approx((4.9 + 1.9) / 4.1)
+  assert table.equity_curve() == pytest.approx([-0.1, 4.8, 0.7, 2.6])
+  assert table.max_drawdown() == pytest.approx(4.1)
+
+  rolling = table.rolling(2)
+  assert rolling['net'] == pytest.approx([0.8, -2.2])
+  assert rolling['win_rate'] == pytest.approx([0.5, 0.5])
+  assert len(table.rolling(10)['net']) == 0
+
+
+def test_empty_table():
+  table = TradeTable.from_trades([])
+
+  assert table.win_rate() == 0
+  assert table.profit_factor() == 0
+  assert table.max_drawdown() == 0
+  assert table.group_by('symbol') == {}
+
+
+def _trades() -> list:
+  # Given out of order, they are sorted by deal time
+  return [
+      _trade(3, 'USDJPY', 0, 'entry_out', -4.0, day=2, hour=10, magic=20),
+      _trade(1, 'EURUSD', 0, 'entry_in', 0.0, day=1, hour=10),
+      _trade(2, 'EURUSD', 0, 'entry_out', 5.0, day=1, hour=12, comment='tp'),
+      _trade(4, 'EURUSD', 0, 'entry_out', 2.0, day=2, hour=12),
+  ]
+
+
+def _trade(
+    ticket: int,
+    symbol: str,
+    swap: float,
+    entry: str,
+    pnl: float,
+    day: int,
+    hour: int,
+    magic: int = 10,
+    comment: str = '',
+) -> Trade:
+  deal_time = datetime(2024, 1, day, hour, tzinfo=pytz.utc)
+  return Trade(
+      TradeMetadata(symbol, 'buy', entry, magic, comment),
+      TradeFinancials(1.1, 0.01, pnl, -0.1, swap),
+      TradeTimes(deal_time, deal_time),
+      ticket=ticket,
+  )
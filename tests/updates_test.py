@@ -0,0 +1,46 @@
+import threading
+import time
+
+from tradeo.updates import ACCOUNT_INFO, UpdateNotifier
+
+
+def test_notify():
+  notifier = UpdateNotifier()
+
+  notifier.notify(['EURUSD', ACCOUNT_INFO])
+  notifier.notify(['EURUSD'])
+
+  assert notifier.version('EURUSD') == 2
+  assert notifier.version(ACCOUNT_INFO) == 1
+  assert notifier.version('USDJPY') == 0
+
+
+def test_wait():
+  notifier = UpdateNotifier()
+  version = notifier.version('EURUSD')
+  timer = threading.Timer(0.05, notifier.notify, args=(['EURUSD'],))
+
+  start = time.monotonic()
+  timer.start()
+  try:
+    assert notifier.wait('EURUSD', version, timeout=5)
+  finally:
+    timer.cancel()
+  assert time.monotonic() - start < 1
+
+
+def test_wait_timeout():
+  notifier = UpdateNotifier()
+  version = notifier.version('EURUSD')
+  notifier.notify(['USDJPY'])
+
+  assert not notifier.wait('EURUSD', version, timeout=0.01)
+
+
+def test_wait_after_notify():
+  notifier = UpdateNotifier()
+  version = notifier.version('EURUSD')
+  # An update between the read of the version and the wait is not missed
+  notifier.notify(['EURUSD'])
+
+  assert notifier.wait('EURUSD', version, timeout=0)
@@ -1,4 +1,5 @@
 import pytest
+import threading
 from datetime import datetime
 import tradeo.utils as utils
 import pytz
@@ -99,3 +100,88 @@ def test_increment_consecutive_times_down(
   utils.increment_consecutive_times_down()
 
   assert utils.get_consecutive_times_down() == 11
+
+
+def test_mt_times_to_epoch():
+  assert list(utils.mt_times_to_epoch(
+      ['1970.01.01 00:05', '2024.02.29 23:59']
+  )) == [300, 1709251140]
+  assert list(utils.mt_times_to_epoch(['2024.02.29 23:59:30'])) == [
+      1709251170
+  ]
+  # Mixed formats are parsed one by one
+  assert list(utils.mt_times_to_epoch(
+      ['2024.02.29 23:59', '2024.02.29 23:59:30']
+  )) == [1709251140, 1709251170]
+  assert len(utils.mt_times_to_epoch([])) == 0
+
+
+def test_broker_epoch_to_utc():
+  madrid = pytz.timezone('Europe/Madrid')
+  epoch = utils.mt_times_to_epoch(['2024.01.01 12:00', '2024.07.01 12:00'])
+  expected = [
+      utils.string_to_date_utc(date, from_timezone=madrid).timestamp()
+      for date in ('2024.01.01 12:00', '2024.07.01 12:00')
+  ]
+  assert list(utils.broker_epoch_to_utc(epoch, madrid)) == expected
+
+
+def test_broker_epoch_to_utc_around_transitions():
+  madrid = pytz.timezone('Europe/Madrid')
+  # Non-existent (spring forward) and ambiguous (fall back) times
+  dates = [
+      '2024.03.31 01:59', '2024.03.31 02:30', '2024.03.31 03:00',
+      '2024.10.27 01:59', '2024.10.27 02:30', '2024.10.27 03:00',
+  ]
+  expected = [
+      utils.string_to_date_utc(date, from_timezone=madrid).timestamp()
+      for date in dates
+  ]
+  epoch = utils.mt_times_to_epoch(dates)
+  assert list(utils.broker_epoch_to_utc(epoch, madrid)) == expected
+  assert list(utils.broker_epoch_to_utc(epoch, 'Europe/Madrid')) == expected
+
+
+def test_mt_dates_to_utc():
+  new_york = pytz.timezone('America/New_York')
+  dates = ['2024.01.19 00:30:43', '2024.07.19 00:30:43', '2024.01.19 00:30:43']
+  expected = [
+      utils.string_to_date_utc(date, '%Y.%m.%d %H:%M:%S', new_york)
+      for date in dates
+  ]
+  assert utils.mt_dates_to_utc(dates, new_york) == expected
+  assert utils.mt_dates_to_utc([], new_york) == []
+
+  # Converted dates are memoized
+  with patch('tradeo.utils.mt_times_to_epoch') as mock_parse:
+    assert utils.mt_dates_to_utc(dates[:2], new_york) == expected[:2]
+    assert not mock_parse.called
+
+
+def test_mt_dates_to_utc_threads():
+  dates = [f'2024.01.19 00:{minute:02}' for minute in range(60)]
+  expected = [
+      utils.string_to_date_utc(date, from_timezone=pytz.utc) for date in dates
+  ]
+  errors = []
+
+  def convert(offset: int) -> None:
+    try:
+      for i in range(200):
+        start = (offset + i) % 50
+        chunk = dates[start:start + 10]
+        assert utils.mt_dates_to_utc(chunk, pytz.utc) == expected[start:][:10]
+    except (AssertionError, KeyError) as e:
+      errors.append(e)
+
+  # The cache is cleared by the other threads while a thread converts dates
+  with patch('tradeo.utils._UTC_DATES_CACHE_SIZE', 15):
+    threads = [
+        threading.Thread(target=convert, args=(offset,))
+        for offset in range(4)
+    ]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+  assert errors == []
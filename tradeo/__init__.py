@@ -10,17 +10,24 @@ from tradeo.strategies.basic_strategy import BasicStrategy
 from tradeo.config import Config
 from tradeo.log import log
 from tradeo.mt_client import MT_Client
+from tradeo.async_mt_client import AsyncMT_Client
 from tradeo.utils import (
     string_to_date_utc, create_magic_number, get_last_balance, 
     reset_consecutive_times_down, increment_consecutive_times_down,
     get_consecutive_times_down
 )
 from tradeo.ohlc import OHLC
+from tradeo.tick_store import TickStore
+from tradeo.message_store import MessageStore
+from tradeo.bar_builder import BarBuilder
+from tradeo.candle_store import CandleStore
 from tradeo.order_operations import OrderOperations
 from tradeo.order_type import OrderType
 from tradeo.order import (
-    Order, MutableOrderDetails, ImmutableOrderDetails, OrderPrice
+    Order, MutableOrderDetails, ImmutableOrderDetails, OrderPrice, OrderDelta
 )
+from tradeo.order_book import OrderBook
+from tradeo.trade_table import TradeTable
 from tradeo.blocker import Blocker
 from tradeo.trading_methods import (get_pip, get_pivots, EMA, RSI, SAR,
                                     confirmation_pattern,
@@ -0,0 +1,250 @@
+"""Asyncio counterpart of MT_Client."""
+from __future__ import annotations
+from typing import AsyncIterator, Dict, List, Set, Tuple, Union
+import asyncio
+
+from tradeo.command import CommandHandle
+from tradeo.log import log
+from tradeo.mt_client import MT_Client, account_info_type
+from tradeo.order import Order
+from tradeo.updates import BAR_DATA, MARKET_DATA, OPEN_ORDERS
+
+# Typing types
+tick_type = Tuple[str, float, float]
+bar_type = Tuple[str, str, Dict]
+order_event_type = Tuple[account_info_type, List[Order]]
+
+
+class AsyncMT_Client:
+  """Asyncio API over an MT_Client instance.
+
+  Every blocking ``sleep()`` loop of MT_Client is replaced by an awaitable
+  that yields control to the event loop, so many strategy coroutines can wait
+  for MetaTrader data at the same time. The files are still read through the
+  MT_Client ``check_*`` methods, whose stat-gated cache makes polling an
+  unchanged file cheap. The checks, commands and historical data processing,
+  which read files, can block or run user strategies, are run in a worker
+  thread with ``asyncio.to_thread``. Between two checks, a worker thread
+  waits for the updates notified by the MT_Client pollers.
+  """
+
+  def __init__(
+      self,
+      mt_client: Union[MT_Client, None] = None,
+      poll_interval: Union[float, None] = None,
+  ):
+    """Initialize the attributes.
+
+    Args:
+      mt_client (Union[MT_Client, None], optional): Client to wrap. Defaults
+        to the MT_Client singleton.
+      poll_interval (Union[float, None], optional): Maximum seconds between
+        two reads of a file while no update of it is notified. Defaults to
+        the poll interval of the MT_Client poller of that file.
+    """
+    if poll_interval is not None and poll_interval <= 0:
+      raise ValueError('poll_interval must be positive')
+    self.mt_client = MT_Client() if mt_client is None else mt_client
+    self.poll_interval = poll_interval
+
+  async def send_command(self, command: str, content: str) -> CommandHandle:
+    """Send a command to the MQL side without blocking the event loop."""
+    return await asyncio.to_thread(
+        self.mt_client.send_command, command, content
+    )
+
+  async def send_commands(
+      self, commands: List[Tuple[str, str]]
+  ) -> List[CommandHandle]:
+    """Send several commands packed in as few command files as possible."""
+    return await asyncio.to_thread(self.mt_client.send_commands, commands)
+
+  async def wait_command(
+      self, handle: CommandHandle, timeout: float = 5.0
+  ) -> float:
+    """Wait until the MQL side consumes a command and return its latency.
+
+    Raises:
+      CommandTimeoutError: If the command is not consumed in time.
+    """
+    return await asyncio.to_thread(handle.result, timeout)
+
+  async def subscribe_symbols(self, symbols: List[str]) -> CommandHandle:
+    """Send a SUBSCRIBE_SYMBOLS command to subscribe to market data."""
+    return await asyncio.to_thread(self.mt_client.subscribe_symbols, symbols)
+
+  async def request_historical_data(
+      self, symbols: List[str], time_frame: str
+  ) -> None:
+    """Request historical candle data for all symbols."""
+    await asyncio.to_thread(
+        self.mt_client.request_historical_data, symbols, time_frame
+    )
+
+  async def get_historical_trades(
+      self, lookback_days: int = 30
+  ) -> CommandHandle:
+    """Send a GET_HISTORICAL_TRADES command."""
+    return await asyncio.to_thread(
+        self.mt_client.get_historical_trades, lookback_days
+    )
+
+  async def get_bid_ask(
+      self, symbol: str, timeout: float = 5.0
+  ) -> Tuple[float, float]:
+    """Return the bid and ask price of a symbol as soon as it is available.
+
+    Returns (0, 0) if the symbol is not found before the timeout.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+      version = self.mt_client.updates.version(symbol)
+      data = await asyncio.to_thread(self.mt_client.check_market_data)
+      bid_ask = data.get(symbol)
+      if bid_ask is not None:
+        return bid_ask['bid'], bid_ask['ask']
+      remaining = deadline - loop.time()
+      if remaining <= 0:
+        break
+      await self._wait_update(symbol, version, 'market_data', remaining)
+
+    log.warning(f'Symbol {symbol} not found after {timeout}s.')
+    return 0, 0
+
+  async def wait_historical_data(
+      self,
+      symbols: List[str],
+      timeout_seconds: float = 240,
+      poll_interval_seconds: float = 0.1,
+  ) -> List[str]:
+    """Wait until requested historical data has been processed.
+
+    It returns the symbols that could not be processed before the timeout.
+    """
+    if timeout_seconds < 0:
+      raise ValueError('timeout_seconds cannot be negative')
+    if poll_interval_seconds <= 0:
+      raise ValueError('poll_interval_seconds must be positive')
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_seconds
+    remaining_symbols = self.mt_client.get_remaining_symbols(
+        list(dict.fromkeys(symbols))
+    )
+    while len(remaining_symbols) > 0:
+      for symbol in remaining_symbols:
+        await asyncio.to_thread(self.mt_client.check_historical_data, symbol)
+
+      remaining_symbols = [
+          symbol for symbol in remaining_symbols
+          if symbol not in self.mt_client.successful_symbols
+      ]
+      if len(remaining_symbols) == 0 or loop.time() >= deadline:
+        break
+
+      await asyncio.sleep(poll_interval_seconds)
+
+    return remaining_symbols
+
+  async def ensure_historical_trades_current(
+      self,
+      timeout_seconds: float = 5,
+      max_age_seconds: int = 120,
+      request_if_stale: bool = True,
+      lookback_days: int = 2,
+  ) -> bool:
+    """Ensure that historical trades are loaded from a recent snapshot.
+
+    See ``MT_Client.ensure_historical_trades_current``.
+    """
+    MT_Client.validate_historical_trades_arguments(
+        timeout_seconds, max_age_seconds, lookback_days
+    )
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_seconds
+    requested = False
+    while loop.time() < deadline:
+      if await asyncio.to_thread(
+          self.mt_client.check_historical_trades_current, max_age_seconds
+      ):
+        return True
+
+      if request_if_stale and not requested:
+        await self.get_historical_trades(lookback_days=lookback_days)
+        requested = True
+
+      await asyncio.sleep(0.1)
+
+    return False
+
+  async def ticks(
+      self, symbols: Union[List[str], None] = None
+  ) -> AsyncIterator[tick_type]:
+    """Yield ``(symbol, bid, ask)`` every time the price of a symbol changes.
+
+    Requires a previous ``subscribe_symbols`` call. When ``symbols`` is given,
+    only the ticks of those symbols are yielded.
+    """
+    last_data: Dict[str, Dict] = {}
+    while True:
+      version = self.mt_client.updates.version(MARKET_DATA)
+      data = await asyncio.to_thread(self.mt_client.check_market_data)
+      for symbol, bid_ask in list(data.items()):
+        if symbols is not None and symbol not in symbols:
+          continue
+        if last_data.get(symbol) != bid_ask:
+          last_data[symbol] = bid_ask
+          yield symbol, bid_ask['bid'], bid_ask['ask']
+      await self._wait_update(MARKET_DATA, version, 'market_data')
+
+  async def bars(self) -> AsyncIterator[bar_type]:
+    """Yield ``(symbol, time_frame, bar)`` every time a bar is updated.
+
+    Requires a previous ``subscribe_symbols_bar_data`` call. ``bar`` is the
+    dict written by MetaTrader for that symbol and time frame.
+    """
+    last_data: Dict[str, Dict] = {}
+    while True:
+      version = self.mt_client.updates.version(BAR_DATA)
+      data = await asyncio.to_thread(self.mt_client.check_bar_data)
+      for symbol_time_frame, bar in list(data.items()):
+        if last_data.get(symbol_time_frame) != bar:
+          last_data[symbol_time_frame] = bar
+          symbol, time_frame = symbol_time_frame.split('_')
+          yield symbol, time_frame, bar
+      await self._wait_update(BAR_DATA, version, 'bar_data')
+
+  async def order_events(self) -> AsyncIterator[order_event_type]:
+    """Yield ``(account_info, open_orders)`` when an order opens or closes."""
+    last_tickets: Union[Set[int], None] = None
+    while True:
+      version = self.mt_client.updates.version(OPEN_ORDERS)
+      orders = await asyncio.to_thread(self.mt_client.check_open_orders)
+      tickets = {order.ticket for order in orders}
+      if tickets != last_tickets:
+        last_tickets = tickets
+        yield self.mt_client.account_info, orders
+      await self._wait_update(OPEN_ORDERS, version, 'open_orders')
+
+  async def _wait_update(
+      self,
+      key: str,
+      version: int,
+      poller: str,
+      timeout: Union[float, None] = None,
+  ) -> None:
+    """Wait in a worker thread until ``key`` is notified after ``version``.
+
+    It waits for ``poll_interval``, or the poll interval of ``poller``, at
+    most, so the file is also read again when that poller is not running.
+    """
+    interval = (
+        self.mt_client.poll_intervals[poller] if self.poll_interval is None
+        else self.poll_interval
+    )
+    if timeout is not None:
+      interval = min(interval, timeout)
+    await asyncio.to_thread(
+        self.mt_client.updates.wait, key, version, interval
+    )
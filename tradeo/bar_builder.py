@@ -0,0 +1,140 @@
+"""Streaming aggregation of ticks into multi-timeframe OHLC bars."""
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from tradeo.ohlc import OHLC
+
+# Seconds of each supported time frame
+TIME_FRAME_SECONDS = {'M1': 60, 'M5': 300, 'M15': 900, 'H1': 3600}
+
+# Typing types
+closed_bars_type = List[Tuple[str, str]]
+
+
+class BarSeries:
+  """Preallocated OHLC bars of one symbol and time frame.
+
+  The last bar is the one being formed. It is closed when the first tick of
+  a later period arrives. When the arrays are full, the older half of the
+  bars is discarded, so the memory is bounded and appending is amortized
+  O(1).
+  """
+
+  def __init__(self, seconds: int, capacity: int):
+    """Initialize empty arrays of ``capacity`` bars of ``seconds`` each."""
+    if capacity < 2:
+      raise ValueError('capacity must be at least 2')
+    self.seconds = seconds
+    self.capacity = capacity
+    self.count = 0
+    self.epoch = np.zeros(capacity, dtype=np.int64)
+    self.open = np.zeros(capacity, dtype=np.float64)
+    self.high = np.zeros(capacity, dtype=np.float64)
+    self.low = np.zeros(capacity, dtype=np.float64)
+    self.close = np.zeros(capacity, dtype=np.float64)
+    self.volume = np.zeros(capacity, dtype=np.float64)
+
+  def update(self, timestamp: float, price: float) -> bool:
+    """Add a tick to the bar of its period.
+
+    The volume of a bar is its number of ticks. Ticks older than the current
+    bar are ignored. Returns True if the tick has closed the previous bar.
+    """
+    start = int(timestamp // self.seconds) * self.seconds
+    last = self.count - 1
+    if self.count > 0 and start == self.epoch[last]:
+      self.high[last] = max(self.high[last], price)
+      self.low[last] = min(self.low[last], price)
+      self.close[last] = price
+      self.volume[last] += 1
+      return False
+    if self.count > 0 and start < self.epoch[last]:
+      return False
+
+    if self.count == self.capacity:
+      self._discard_older_half()
+    i = self.count
+    self.epoch[i] = start
+    self.open[i] = self.high[i] = self.low[i] = self.close[i] = price
+    self.volume[i] = 1
+    self.count += 1
+    return self.count > 1
+
+  def _discard_older_half(self) -> None:
+    """Move the newer half of the bars to the start of the arrays."""
+    keep = self.capacity // 2
+    for array in (
+        self.epoch, self.open, self.high, self.low, self.close, self.volume
+    ):
+      array[:keep] = array[self.count - keep:self.count]
+    self.count = keep
+
+  def ohlc(self, include_current: bool = False) -> OHLC:
+    """Return a view of the bars as an OHLC, without copying the arrays.
+
+    The forming bar is only included if ``include_current`` is True. The
+    datetimes are UTC.
+    """
+    end = self.count if include_current else max(0, self.count - 1)
+    return OHLC.from_arrays(
+        self.epoch[:end], self.open[:end], self.high[:end], self.low[:end],
+        self.close[:end], self.volume[:end],
+    )
+
+
+class BarBuilder:
+  """Build the bars of several time frames from the ticks of each symbol.
+
+  ``MT_Client.check_market_data`` feeds it with the bid of every tick when
+  ``mt_client.bar_builder`` is set, and ``EventHandler.on_bar_close`` is
+  called for each closed bar.
+  """
+
+  def __init__(
+      self,
+      time_frames: Union[List[str], None] = None,
+      capacity: int = 1440,
+  ):
+    """Initialize the builder.
+
+    Args:
+      time_frames (Union[List[str], None]): Time frames to build, from
+        ``TIME_FRAME_SECONDS``. Defaults to all of them.
+      capacity (int): Maximum bars kept per symbol and time frame.
+    """
+    self.time_frames = (
+        list(TIME_FRAME_SECONDS) if time_frames is None else time_frames
+    )
+    unknown = set(self.time_frames) - set(TIME_FRAME_SECONDS)
+    if unknown:
+      raise ValueError(f'Unknown time frames: {sorted(unknown)}')
+    self.capacity = capacity
+    self._series: Dict[Tuple[str, str], BarSeries] = {}
+
+  def update(
+      self, symbol: str, timestamp: float, price: float
+  ) -> closed_bars_type:
+    """Add a tick of a symbol to every time frame.
+
+    Returns the ``(symbol, time_frame)`` pairs whose bar has been closed.
+    """
+    closed = []
+    for time_frame in self.time_frames:
+      series = self._series.get((symbol, time_frame))
+      if series is None:
+        series = BarSeries(TIME_FRAME_SECONDS[time_frame], self.capacity)
+        self._series[(symbol, time_frame)] = series
+      if series.update(timestamp, price):
+        closed.append((symbol, time_frame))
+    return closed
+
+  def ohlc(
+      self, symbol: str, time_frame: str, include_current: bool = False
+  ) -> OHLC:
+    """Return the bars of a symbol and time frame. See ``BarSeries.ohlc``."""
+    series = self._series.get((symbol, time_frame))
+    if series is None:
+      # Empty bars
+      series = BarSeries(TIME_FRAME_SECONDS[time_frame], 2)
+    return series.ohlc(include_current)
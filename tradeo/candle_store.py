@@ -0,0 +1,157 @@
+"""Persistent cache of the historical candles of each symbol and time frame."""
+from pathlib import Path
+from typing import Dict, Tuple, Union
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from tradeo.config import Config
+from tradeo.ohlc import OHLC, parse_mt_candles
+from tradeo.utils import broker_epoch_to_utc, timezone_type
+
+# Rows of the candle arrays. The epoch is the broker wall-clock time in
+# seconds, as written by MetaTrader, stored as float64 (exact below 2**53).
+CANDLE_COLUMNS = ('epoch', 'open', 'high', 'low', 'close', 'volume')
+EPOCH, OPEN, HIGH, LOW, CLOSE, VOLUME = range(len(CANDLE_COLUMNS))
+
+# Typing types
+candles_dict_type = Dict[str, Dict[str, float]]
+
+
+class CandleStore:
+  """Columnar ``.npy`` store of the candles of each symbol and time frame.
+
+  When ``mt_client.candle_store`` is set, ``get_historical_data`` only
+  requests the candles from the last stored one onwards and
+  ``check_historical_data`` merges them into the store, so the expert
+  advisor writes and Python parses a few candles per cycle instead of the
+  whole ``Config.lookback_days`` window. The store keeps that window and
+  persists it, so a restarted bot only requests what it missed.
+  """
+
+  def __init__(
+      self,
+      path: Union[str, Path],
+      lookback_days: Union[int, None] = None,
+  ):
+    """Initialize the store.
+
+    Args:
+      path (Union[str, Path]): Folder of the ``<symbol>_<time_frame>.npy``
+        files. It is created if it does not exist.
+      lookback_days (Union[int, None]): Days of candles kept, counted back
+        from the last candle. Defaults to ``Config.lookback_days``.
+    """
+    self.path = Path(path)
+    self.path.mkdir(parents=True, exist_ok=True)
+    self.lookback_days = (
+        Config.lookback_days if lookback_days is None else lookback_days
+    )
+    self.lock = threading.Lock()
+    self._candles: Dict[Tuple[str, str], np.ndarray] = {}
+
+  def file_path(self, symbol: str, time_frame: str) -> Path:
+    """Return the file of the candles of a symbol and time frame."""
+    return self.path / f'{symbol}_{time_frame}.npy'
+
+  def candles(self, symbol: str, time_frame: str) -> np.ndarray:
+    """Return the stored candles of a symbol and time frame.
+
+    The array has one row per column of ``CANDLE_COLUMNS`` and the candles
+    are sorted by time. It is loaded from disk on the first call.
+    """
+    with self.lock:
+      return self._load(symbol, time_frame)
+
+  def last_epoch(self, symbol: str, time_frame: str) -> Union[int, None]:
+    """Return the broker time of the last stored candle, or None."""
+    candles = self.candles(symbol, time_frame)
+    if candles.shape[1] == 0:
+      return None
+    return int(candles[EPOCH, -1])
+
+  def merge(
+      self, symbol: str, time_frame: str, new_candles: np.ndarray
+  ) -> np.ndarray:
+    """Merge candles into the store, save it and return the stored candles.
+
+    A new candle replaces the stored candle of the same time, which may
+    have been incomplete when it was received. Candles older than
+    ``lookback_days`` before the last one are discarded.
+    """
+    with self.lock:
+      stored = self._load(symbol, time_frame)
+      if stored.shape[1] and new_candles.shape[1]:
+        keep = ~np.isin(stored[EPOCH], new_candles[EPOCH])
+        merged = np.concatenate((stored[:, keep], new_candles), axis=1)
+        merged = merged[:, np.argsort(merged[EPOCH], kind='stable')]
+      else:
+        merged = new_candles if new_candles.shape[1] else stored
+
+      if merged.shape[1]:
+        start = merged[EPOCH, -1] - self.lookback_days * 86400
+        merged = np.ascontiguousarray(merged[:, merged[EPOCH] >= start])
+      self._candles[(symbol, time_frame)] = merged
+      self._save(self.file_path(symbol, time_frame), merged)
+      return merged
+
+  def ohlc(
+      self,
+      symbol: str,
+      time_frame: str,
+      convert_to_utc: Union[timezone_type, None] = None,
+  ) -> OHLC:
+    """Return the stored candles as an OHLC.
+
+    The datetimes are the naive broker times, unless ``convert_to_utc``
+    gives the broker timezone to convert them to UTC.
+    """
+    candles = self.candles(symbol, time_frame)
+    epoch = candles[EPOCH].astype(np.int64)
+    if convert_to_utc is not None:
+      epoch = broker_epoch_to_utc(epoch, convert_to_utc)
+    return OHLC.from_arrays(
+        epoch, candles[OPEN], candles[HIGH], candles[LOW], candles[CLOSE],
+        candles[VOLUME], utc=convert_to_utc is not None,
+    )
+
+  def _load(self, symbol: str, time_frame: str) -> np.ndarray:
+    """Return the candles in memory, reading their file the first time."""
+    candles = self._candles.get((symbol, time_frame))
+    if candles is None:
+      file_path = self.file_path(symbol, time_frame)
+      try:
+        candles = np.load(file_path)
+      except (OSError, ValueError):
+        candles = np.empty((len(CANDLE_COLUMNS), 0), dtype=np.float64)
+      self._candles[(symbol, time_frame)] = candles
+    return candles
+
+  @staticmethod
+  def _save(file_path: Path, candles: np.ndarray) -> None:
+    """Write the candles through a temporary file and a rename."""
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f'.{file_path.name}.', dir=file_path.parent
+    )
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        np.save(f, candles)
+      os.replace(tmp_path, file_path)
+    finally:
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+
+def parse_candles(candles: candles_dict_type) -> np.ndarray:
+  """Convert the candles of a ``Historical_Data`` file to a candle array.
+
+  The keys are MetaTrader times (``%Y.%m.%d %H:%M``) and the values hold
+  the ``open``, ``high``, ``low``, ``close`` and ``volume`` of each candle.
+  """
+  epoch, prices = parse_mt_candles(candles)
+  parsed = np.empty((len(CANDLE_COLUMNS), len(candles)), dtype=np.float64)
+  parsed[EPOCH] = epoch
+  parsed[OPEN:] = prices
+  return parsed
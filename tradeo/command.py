@@ -0,0 +1,328 @@
+"""Handles and file slots of the commands sent to the MQL side."""
+from __future__ import annotations
+from datetime import datetime
+from os.path import exists
+from pathlib import Path
+from threading import Event, Lock
+from time import sleep
+from typing import Callable, Dict, Iterable, List, Set, Tuple, Union
+import heapq
+import os
+import re
+
+from tradeo.config import Config
+from tradeo.files import try_read_file
+
+# Frames ``<:id|COMMAND|content:>`` of a command file
+_FRAME_PATTERN = re.compile(r'<:\d+\|([^|]*)\|(.*?):>', re.DOTALL)
+
+# Typing types
+consumed_callback_type = Callable[['CommandHandle'], None]
+command_stats_type = Dict[str, Dict[str, float]]
+command_key_type = Tuple[str, str]
+
+
+class CommandTimeoutError(TimeoutError):
+  """Raised when a command has not been consumed by the MQL side in time."""
+
+
+class CommandHandle:
+  """Future-like handle of a command written to a ``Commands_N.txt`` file.
+
+  The expert advisor deletes a command file after reading it, so the handle
+  is resolved (consumed) as soon as its file disappears. It records when the
+  command was enqueued, written and consumed.
+  """
+
+  def __init__(
+      self,
+      command_id: int,
+      command: str,
+      content: str,
+      on_consumed: Union[consumed_callback_type, None] = None,
+  ):
+    """Initialize the handle of a command that has not been written yet."""
+    self.command_id = command_id
+    self.command = command
+    self.content = content
+    self.file_path: Union[Path, None] = None
+    self.enqueued_at = datetime.now(Config.utc_timezone)
+    self.written_at: Union[datetime, None] = None
+    self.consumed_at: Union[datetime, None] = None
+    self.error: Union[str, None] = None
+    self._on_consumed = on_consumed
+    self._done = Event()
+    self._lock = Lock()
+
+  def __repr__(self) -> str:
+    """Return the representation of the handle."""
+    return (
+        f'CommandHandle({self.command_id}, {self.command}, '
+        f'status={self.status})'
+    )
+
+  @property
+  def status(self) -> str:
+    """Return 'pending', 'written', 'consumed' or 'failed'."""
+    if self.error is not None:
+      return 'failed'
+    if self.consumed_at is not None:
+      return 'consumed'
+    return 'pending' if self.written_at is None else 'written'
+
+  @property
+  def latency(self) -> Union[float, None]:
+    """Return the seconds from the write to the consumption of the file."""
+    if self.written_at is None or self.consumed_at is None:
+      return None
+    return (self.consumed_at - self.written_at).total_seconds()
+
+  def mark_written(self, file_path: Path) -> None:
+    """Record that the command has been written to ``file_path``."""
+    self.file_path = Path(file_path)
+    self.written_at = datetime.now(Config.utc_timezone)
+
+  def mark_consumed(self) -> None:
+    """Record that the MQL side has consumed the command file."""
+    with self._lock:
+      if self._done.is_set():
+        return
+      self.consumed_at = datetime.now(Config.utc_timezone)
+      self._done.set()
+    if self._on_consumed is not None:
+      self._on_consumed(self)
+
+  def mark_failed(self, error: str) -> None:
+    """Record that the command could not be delivered."""
+    self.error = error
+    self._done.set()
+
+  def done(self) -> bool:
+    """Return True if the command has been consumed or has failed."""
+    if (
+        not self._done.is_set() and self.file_path is not None and
+        not exists(self.file_path)
+    ):
+      self.mark_consumed()
+    return self._done.is_set()
+
+  def result(self, timeout: Union[float, None] = None) -> float:
+    """Wait until the command is consumed and return its latency.
+
+    Raises:
+      CommandTimeoutError: If the command could not be written or it has not
+        been consumed after ``timeout`` seconds.
+    """
+    started_at = datetime.now(Config.utc_timezone)
+    while not self.done():
+      elapsed = (datetime.now(Config.utc_timezone) - started_at).total_seconds()
+      if timeout is not None and elapsed >= timeout:
+        raise CommandTimeoutError(
+            f'{self.command} command {self.command_id} not consumed after '
+            f'{timeout}s ({self.file_path})'
+        )
+      sleep(0.005)
+
+    if self.error is not None:
+      raise CommandTimeoutError(self.error)
+    return self.latency or 0.0
+
+
+class CommandSlots:
+  """In-memory occupancy of the ``Commands_N.txt`` files.
+
+  The occupancy is seeded with one directory listing. A slot is marked busy
+  when a command is written and freed when the MQL side consumes the file,
+  so finding a free slot does not stat every command file. The MQL side reads
+  the files from ``Commands_0.txt`` and stops at the first missing one, hence
+  the lowest free slot is always used. When no slot is known to be free, or
+  the lowest busy slot has been consumed, the occupancy is refreshed with a
+  single ``scandir``.
+  """
+
+  def __init__(self, prefix: str, num_slots: int):
+    """Initialize the occupancy of the files ``<prefix><0..num_slots>.txt``."""
+    self.prefix = str(prefix)
+    self.num_slots = num_slots
+    self.allocations = 0
+    self.refreshes = 0
+    self.full = 0
+    self.max_busy = 0
+    self._busy_at_allocation = 0
+    self._busy: Set[int] = set()
+    self._free: List[int] = []
+    self._lock = Lock()
+    self.index = CommandIndex()
+    self._refresh()
+    self.index.seed(self.path(slot) for slot in self._busy)
+
+  def path(self, slot: int) -> str:
+    """Return the path of the command file of a slot."""
+    return f'{self.prefix}{slot}.txt'
+
+  def acquire(self, first_slot: int = 0) -> Union[int, None]:
+    """Mark as busy the lowest free slot from ``first_slot`` and return it.
+
+    Returns None when every slot from ``first_slot`` is busy.
+    """
+    with self._lock:
+      if self._lowest_busy_consumed():
+        self._refresh()
+      slot = self._pop_free(first_slot)
+      if slot is None:
+        self._refresh()
+        slot = self._pop_free(first_slot)
+      if slot is None:
+        self.full += 1
+        return None
+
+      self._busy_at_allocation += len(self._busy)
+      self._busy.add(slot)
+      self.allocations += 1
+      self.max_busy = max(self.max_busy, len(self._busy))
+      return slot
+
+  def release(self, file_path: str) -> None:
+    """Mark as free the slot of a command file consumed by the MQL side."""
+    name = str(file_path)
+    if not name.startswith(self.prefix) or not name.endswith('.txt'):
+      return
+    index = name[len(self.prefix):-len('.txt')]
+    with self._lock:
+      if index.isdigit() and int(index) in self._busy:
+        self._busy.discard(int(index))
+        heapq.heappush(self._free, int(index))
+        self.index.discard(name)
+
+  def refresh(self) -> None:
+    """Read the occupancy of every slot with one directory listing."""
+    with self._lock:
+      self._refresh()
+
+  def _refresh(self) -> None:
+    """Read the occupancy of every slot. The lock must be held."""
+    directory = Path(self.prefix).parent
+    name_prefix = Path(self.prefix).name
+    busy = set()
+    try:
+      with os.scandir(directory) as entries:
+        for entry in entries:
+          index = entry.name[len(name_prefix):-len('.txt')]
+          if (
+              entry.name.startswith(name_prefix) and
+              entry.name.endswith('.txt') and index.isdigit() and
+              int(index) < self.num_slots
+          ):
+            busy.add(int(index))
+    except FileNotFoundError:
+      pass
+    self._busy = busy
+    # A sorted list is a valid heap
+    self._free = [i for i in range(self.num_slots) if i not in busy]
+    self.index.retain(self.path(slot) for slot in busy)
+    self.refreshes += 1
+
+  def _lowest_busy_consumed(self) -> bool:
+    """Return True if a slot below the lowest free one has been consumed.
+
+    A command written after a missing file would not be read until that
+    file is written again, so the occupancy must be refreshed.
+    """
+    if len(self._busy) == 0:
+      return False
+    lowest_busy = min(self._busy)
+    if len(self._free) > 0 and self._free[0] < lowest_busy:
+      return False
+    return not exists(self.path(lowest_busy))
+
+  def _pop_free(self, first_slot: int) -> Union[int, None]:
+    """Pop the lowest free slot that is not lower than ``first_slot``."""
+    skipped = []
+    slot = None
+    while len(self._free) > 0:
+      candidate = heapq.heappop(self._free)
+      if candidate >= first_slot:
+        slot = candidate
+        break
+      skipped.append(candidate)
+    for candidate in skipped:
+      heapq.heappush(self._free, candidate)
+    return slot
+
+  def stats(self) -> Dict[str, float]:
+    """Return the slot pressure statistics.
+
+    ``pressure`` is the mean fraction of busy slots found when a slot is
+    allocated: values close to 1 mean ``num_command_files`` is too low.
+    """
+    return {
+        'slots': self.num_slots,
+        'busy': len(self._busy),
+        'max_busy': self.max_busy,
+        'pressure': (
+            self._busy_at_allocation / self.allocations / self.num_slots
+            if self.allocations else 0.0
+        ),
+        'allocations': self.allocations,
+        'refreshes': self.refreshes,
+        'full': self.full,
+    }
+
+
+class CommandIndex:
+  """Commands of the ``Commands_N.txt`` files not consumed yet.
+
+  The files are indexed by command type and key, the first value of the
+  content (the symbol of ``GET_HISTORICAL_DATA``), so finding the files of
+  a command is a dictionary lookup instead of reading every command file.
+  ``CommandSlots`` seeds it once from the existing files and drops the files
+  consumed by the MQL side, and ``MT_Client`` adds the files it writes.
+  """
+
+  def __init__(self):
+    """Initialize an empty index."""
+    self._files: Dict[command_key_type, Set[str]] = {}
+    self._keys: Dict[str, Set[command_key_type]] = {}
+    self._lock = Lock()
+
+  def add(self, file_path: str, commands: Iterable[Tuple[str, str]]) -> None:
+    """Index the ``(command, content)`` pairs written to a command file."""
+    keys = {(command, command_key(content)) for command, content in commands}
+    with self._lock:
+      self._keys.setdefault(str(file_path), set()).update(keys)
+      for key in keys:
+        self._files.setdefault(key, set()).add(str(file_path))
+
+  def files(self, command: str, key: str) -> List[str]:
+    """Return the command files with a command of that type and key."""
+    with self._lock:
+      return sorted(self._files.get((command, key), ()))
+
+  def discard(self, file_path: str) -> None:
+    """Forget the commands of a command file."""
+    with self._lock:
+      for key in self._keys.pop(str(file_path), ()):
+        files = self._files[key]
+        files.discard(str(file_path))
+        if not files:
+          del self._files[key]
+
+  def retain(self, file_paths: Iterable[str]) -> None:
+    """Forget the commands of every command file except ``file_paths``."""
+    keep = {str(file_path) for file_path in file_paths}
+    with self._lock:
+      stale = [f for f in self._keys if f not in keep]
+    for file_path in stale:
+      self.discard(file_path)
+
+  def seed(self, file_paths: Iterable[str]) -> None:
+    """Index the commands of existing command files, reading them once."""
+    for file_path in file_paths:
+      frames = _FRAME_PATTERN.findall(try_read_file(Path(file_path)))
+      if frames:
+        self.add(file_path, frames)
+
+
+def command_key(content: str) -> str:
+  """Return the key of a command content, its first comma-separated value."""
+  return str(content).split(',', 1)[0]
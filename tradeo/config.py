@@ -71,6 +71,14 @@ class Config:
       'TB_CHECK_HISTORICAL_DATA_THREAD', True)
   check_historical_trades_thread = _get_bool_from_env_or_default(
       'TB_CHECK_HISTORICAL_TRADES_THREAD', True)
+  historical_data_workers = int(os.getenv('TB_HISTORICAL_DATA_WORKERS') or 1)
+  atomic_writes = _get_bool_from_env_or_default('TB_ATOMIC_WRITES', True)
+  orders_stored_interval_ms = int(
+      os.getenv('TB_ORDERS_STORED_INTERVAL_MS') or 500)
+  orders_journal = _get_bool_from_env_or_default('TB_ORDERS_JOURNAL', False)
+  orders_journal_compact_entries = int(
+      os.getenv('TB_ORDERS_JOURNAL_COMPACT_ENTRIES') or 1000)
+  json_codec = os.getenv('TB_JSON_CODEC') or 'auto'
 
   # Logging configuration
   activate_syslog = _get_bool_from_env('TB_ACTIVATE_SYSLOG') or False
@@ -1,12 +1,13 @@
 """Parent class for event handlers."""
 from __future__ import annotations
-from typing import List, Dict, TYPE_CHECKING
+from typing import List, Dict, TYPE_CHECKING, Union
 from abc import ABC
 
 if TYPE_CHECKING:
-  from tradeo.order import Order
+  from tradeo.order import Order, OrderDelta
   from tradeo.ohlc import OHLC
   from tradeo.mt_client import MT_Client
+  from tradeo.trade import Trade
 
 
 class EventHandler(ABC):
@@ -38,6 +39,19 @@ class EventHandler(ABC):
     """Handle the return of SUBSCRIBE_SYMBOLS_BAR_DATA command."""
     return None  # pragma: no cover
 
+  def on_bar_close(
+      self,
+      mt_client: MT_Client,
+      symbol: str,
+      time_frame: str,
+      ohlc: OHLC
+  ) -> None:
+    """Handle a bar closed by ``mt_client.bar_builder``.
+
+    ``ohlc`` contains the closed bars of the symbol and time frame.
+    """
+    return None  # pragma: no cover
+
   def on_historical_data(
           self,
           mt_client: MT_Client,
@@ -49,9 +63,16 @@ class EventHandler(ABC):
 
   def on_historical_trades(
       self,
-      mt_client: MT_Client
+      mt_client: MT_Client,
+      trades: Union[List[Trade], None] = None
   ) -> None:
-    """Handle the return of GET_HISTORICAL_TRADES command."""
+    """Handle the return of GET_HISTORICAL_TRADES command.
+
+    ``trades`` are only the trades whose ticket was not in the previous
+    ``Historical_Trades.json``. The whole history is in
+    ``mt_client.historical_trades``. Overrides without ``trades`` are still
+    called, with the client only.
+    """
     return None  # pragma: no cover
 
   def on_message(
@@ -69,3 +90,16 @@ class EventHandler(ABC):
   ) -> None:
     """Handle when a new order event or removed order is received."""
     return None  # pragma: no cover
+
+  def on_order_delta(
+          self,
+          mt_client: MT_Client,
+          account_info: Dict,
+          delta: OrderDelta
+  ) -> None:
+    """Handle the changes of the open orders since the previous snapshot.
+
+    ``delta`` holds the opened, closed, modified (price, SL, TP or lots)
+    and PnL-only changed orders. It is called after ``on_order_event``.
+    """
+    return None  # pragma: no cover
@@ -0,0 +1,248 @@
+"""Event-driven watcher for the files written by the MetaTrader expert.
+
+The watcher uses Linux inotify (through ``ctypes``, no extra dependency) to
+run a callback only when a watched file has been completely written
+(``IN_CLOSE_WRITE``) or atomically moved into place (``IN_MOVED_TO``).
+When inotify is not available, ``FileWatcher.start`` returns False and the
+caller is expected to fall back to sleep polling.
+"""
+from pathlib import Path
+from threading import Thread
+from typing import Callable, Dict, List, Set, Tuple, Union
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+import traceback
+
+from tradeo.log import log
+
+# inotify constants (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+# Typing types
+watcher_callback_type = Callable[[Path], None]
+handler_key_type = Tuple[str, str]
+
+
+def inotify_available() -> bool:
+  """Return True if the inotify API can be used in this platform."""
+  return _load_libc() is not None
+
+
+def _load_libc() -> Union[ctypes.CDLL, None]:
+  """Return the C library when it exposes the inotify API."""
+  if not sys.platform.startswith('linux'):
+    return None
+  try:
+    libc = ctypes.CDLL(
+        ctypes.util.find_library('c') or 'libc.so.6', use_errno=True
+    )
+  except OSError:
+    return None
+  return libc if hasattr(libc, 'inotify_init1') else None
+
+
+class FileWatcher:
+  """Run callbacks when files of one or more directories are written.
+
+  Callbacks can be registered for an exact file (``watch``) or for every file
+  whose name starts with a prefix (``watch_prefix``). They receive the path of
+  the file that has changed.
+  """
+
+  def __init__(self, poll_interval: float = 0.005, timeout: float = 0.5):
+    """Initialize the watcher.
+
+    Args:
+      poll_interval (float): Sleep delay of the polling loop this watcher
+        replaces. It is only used to estimate the number of avoided reads.
+      timeout (float): Maximum seconds to block waiting for events before
+        checking whether the watcher has been stopped.
+    """
+    self.poll_interval = poll_interval
+    self.timeout = timeout
+    self.active = False
+    self._fd = -1
+    self._thread: Union[Thread, None] = None
+    self._started_at: Union[float, None] = None
+    self._directories: Dict[int, str] = {}
+    self._handlers: Dict[handler_key_type, watcher_callback_type] = {}
+    self._prefix_handlers: Dict[handler_key_type, watcher_callback_type] = {}
+    self._reads: Dict[str, int] = {}
+
+  def watch(self, file_path: Path, callback: watcher_callback_type) -> None:
+    """Run ``callback`` every time ``file_path`` is written."""
+    key = (str(Path(file_path).parent), Path(file_path).name)
+    self._handlers[key] = callback
+    self._reads[self._stats_name(key)] = 0
+
+  def watch_prefix(
+      self, prefix_path: Path, callback: watcher_callback_type
+  ) -> None:
+    """Run ``callback`` when a file starting with ``prefix_path`` is written.
+
+    For example ``.../AgentFiles/Historical_Data_`` matches every
+    ``Historical_Data_<symbol>.json`` file of that folder.
+    """
+    key = (str(Path(prefix_path).parent), Path(prefix_path).name)
+    self._prefix_handlers[key] = callback
+    self._reads[self._stats_name(key, prefix=True)] = 0
+
+  @staticmethod
+  def _stats_name(key: handler_key_type, prefix: bool = False) -> str:
+    """Return the name used to report the statistics of a handler."""
+    return f'{key[1]}*' if prefix else key[1]
+
+  def start(self) -> bool:
+    """Start the watcher thread.
+
+    Returns False, without starting anything, when inotify is not available
+    or a directory can not be watched, so the caller can use sleep polling.
+    """
+    libc = _load_libc()
+    if libc is None:
+      log.debug('inotify is not available, file watcher not started')
+      return False
+
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+      log.warning(f'inotify_init1 failed: {os.strerror(ctypes.get_errno())}')
+      return False
+
+    directories = {d for d, _ in self._handlers}
+    directories |= {d for d, _ in self._prefix_handlers}
+    for directory in directories:
+      wd = libc.inotify_add_watch(
+          fd, directory.encode(), IN_CLOSE_WRITE | IN_MOVED_TO
+      )
+      if wd < 0:
+        log.warning(
+            f'Can not watch {directory}: {os.strerror(ctypes.get_errno())}'
+        )
+        os.close(fd)
+        self._directories = {}
+        return False
+      self._directories[wd] = directory
+
+    self._fd = fd
+    self.active = True
+    self._started_at = time.monotonic()
+    # Catch up with the files written before the watch was registered
+    self.resync()
+    self._thread = Thread(target=self._run, args=(), daemon=True)
+    self._thread.start()
+    return True
+
+  def stop(self) -> None:
+    """Stop the watcher thread. The inotify descriptor is closed by it."""
+    self.active = False
+
+  def _run(self) -> None:
+    """Wait for inotify events and dispatch them until stopped."""
+    try:
+      while self.active:
+        readable, _, _ = select.select([self._fd], [], [], self.timeout)
+        if readable and self.active:
+          for directory, name in self._read_events():
+            self.dispatch(directory, name)
+    finally:
+      os.close(self._fd)
+      self._fd = -1
+
+  def _read_events(self) -> List[Tuple[str, str]]:
+    """Read the pending events, removing duplicates but keeping the order.
+
+    When the kernel queue has overflowed some events may be lost, so every
+    watched file is dispatched again.
+    """
+    try:
+      buffer = os.read(self._fd, _READ_SIZE)
+    except BlockingIOError:
+      return []
+
+    changed: Dict[Tuple[str, str], None] = {}
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(buffer):
+      wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+      offset += _EVENT_HEADER.size
+      raw_name = buffer[offset:offset + length]
+      offset += length
+      if mask & IN_Q_OVERFLOW:
+        self.resync()
+      elif not mask & IN_IGNORED and wd in self._directories:
+        name = raw_name.rstrip(b'\0').decode(errors='replace')
+        changed[(self._directories[wd], name)] = None
+    return list(changed)
+
+  def resync(self) -> None:
+    """Dispatch every watched file that currently exists."""
+    for directory, name in list(self._handlers):
+      if os.path.exists(os.path.join(directory, name)):
+        self.dispatch(directory, name)
+
+    for directory, prefix in list(self._prefix_handlers):
+      with os.scandir(directory) as entries:
+        names = [e.name for e in entries if e.name.startswith(prefix)]
+      for name in names:
+        self.dispatch(directory, name)
+
+  def dispatch(self, directory: str, name: str) -> bool:
+    """Run the callback registered for a file, if any.
+
+    Returns True if a callback has been run.
+    """
+    key = (directory, name)
+    callback = self._handlers.get(key)
+    stats_name = name
+    if callback is None:
+      for (prefix_directory, prefix), handler in self._prefix_handlers.items():
+        if prefix_directory == directory and name.startswith(prefix):
+          callback = handler
+          stats_name = self._stats_name((directory, prefix), prefix=True)
+          break
+
+    if callback is None:
+      return False
+
+    self._reads[stats_name] += 1
+    try:
+      callback(Path(directory) / name)
+    except Exception:  # noqa
+      log.error(traceback.format_exc())
+    return True
+
+  def stats(self) -> Dict[str, Dict[str, int]]:
+    """Return the reads done and avoided for every watched file.
+
+    The avoided reads are estimated comparing the reads triggered by events
+    with the reads a sleep polling loop of ``poll_interval`` would have done.
+    """
+    elapsed = 0.0
+    if self._started_at is not None:
+      elapsed = time.monotonic() - self._started_at
+    polling_reads = int(elapsed / self.poll_interval)
+    return {
+        name: {
+            'reads': reads,
+            'reads_avoided': max(0, polling_reads - reads),
+        } for name, reads in self._reads.items()
+    }
+
+  @property
+  def reads_avoided(self) -> int:
+    """Return the total number of avoided reads."""
+    return sum(s['reads_avoided'] for s in self.stats().values())
+
+  @property
+  def watched_directories(self) -> Set[str]:
+    """Return the directories being watched."""
+    return set(self._directories.values())
@@ -2,16 +2,20 @@
 import typing as ty
 from pathlib import Path
 from os.path import exists
-import json
 import os
+import tempfile
 from time import sleep
-from json.decoder import JSONDecodeError
 from enum import Enum
 
+from tradeo.config import Config
+from tradeo.json_codec import get_codec
 from tradeo.paths import get_default_path
 
 _default_path = get_default_path()
 
+# Typing types
+file_signature_type = ty.Tuple[int, int, int]
+
 
 class Files(str, Enum):
   """Files enum."""
@@ -34,17 +38,120 @@ def file_exists(file: str, file_path: Path = _default_path) -> bool:
 def try_load_json(file_path: Path) -> ty.Dict[str, ty.Dict]:
   """Try to load a JSON from a file generate from MQL."""
   for _ in range(5):
-    try:
-      if exists(file_path):
-        with open(file_path, 'r') as f:
-          text = f.read()
-          return json.loads(text)
-    except (IOError, JSONDecodeError):
-      pass
+    if exists(file_path):
+      data = load_json(file_path)
+      if data is not None:
+        return data
     sleep(0.1)
   return {}
 
 
+def load_json(file_path: Path) -> ty.Union[ty.Dict, None]:
+  """Load a JSON file with a single attempt.
+
+  Returns None if the file can not be read or parsed, for example when MQL is
+  still writing it. The file is decoded with the codec of ``get_codec``.
+  """
+  codec = get_codec()
+  try:
+    with open(file_path, 'rb') as f:
+      return codec.loads(f.read())
+  except (IOError, *codec.decode_errors):
+    return None
+
+
+class _NotModified:
+  """Type of the sentinel returned when a cached file has not changed."""
+
+  def __repr__(self) -> str:
+    """Return a string representation."""
+    return 'NOT_MODIFIED'
+
+
+NOT_MODIFIED = _NotModified()
+
+
+class JsonFileCache:
+  """Cache of the JSON files generated from MQL, keyed by path.
+
+  A file is only read and parsed again when its stat signature
+  ``(st_mtime_ns, st_size, st_ino)`` changes. Otherwise the previously parsed
+  object is reused without any read or parse.
+
+  A file that can not be parsed (partially written) is read once: its
+  signature is remembered and it is skipped until it changes again, instead
+  of sleeping and retrying.
+  """
+
+  def __init__(self):
+    """Initialize the attributes."""
+    self._entries: ty.Dict[str, ty.Tuple[file_signature_type, ty.Dict]] = {}
+    self.hits = 0
+    self.misses = 0
+    self.parse_errors = 0
+
+  def load(self, file_path: Path) -> ty.Dict:
+    """Return the parsed JSON, reusing the cached object if unchanged."""
+    data = self.load_if_changed(file_path)
+    if data is NOT_MODIFIED:
+      return self._entries[str(file_path)][1]
+    return ty.cast(ty.Dict, data)
+
+  def load_if_changed(
+      self, file_path: Path
+  ) -> ty.Union[ty.Dict, _NotModified]:
+    """Return the parsed JSON or NOT_MODIFIED if the file has not changed.
+
+    An empty dict is returned when the file does not exist. NOT_MODIFIED is
+    also returned when the file can not be parsed, keeping the previously
+    parsed object, until the file changes again.
+    """
+    key = str(file_path)
+    try:
+      st = os.stat(key)
+    except OSError:
+      self._entries.pop(key, None)
+      return {}
+
+    signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+    entry = self._entries.get(key)
+    if entry is not None and entry[0] == signature:
+      self.hits += 1
+      return NOT_MODIFIED
+
+    self.misses += 1
+    data = load_json(file_path)
+    if data is None:
+      self.parse_errors += 1
+      previous_data = {} if entry is None else entry[1]
+      self._entries[key] = (signature, previous_data)
+      return NOT_MODIFIED
+
+    self._entries[key] = (signature, data)
+    return data
+
+  def is_modified(self, file_path: Path) -> bool:
+    """Return True if the file exists and changed since it was last read.
+
+    Only the file is stat'ed, it is neither read nor parsed.
+    """
+    try:
+      st = os.stat(str(file_path))
+    except OSError:
+      return False
+    entry = self._entries.get(str(file_path))
+    return entry is None or entry[0] != (
+        st.st_mtime_ns, st.st_size, st.st_ino
+    )
+
+  def invalidate(self, file_path: ty.Union[Path, None] = None) -> None:
+    """Forget a cached file, or every file when no path is given."""
+    if file_path is None:
+      self._entries.clear()
+    else:
+      self._entries.pop(str(file_path), None)
+
+
 def try_read_file(file_path: Path) -> str:
   """Try to read a file."""
   try:
@@ -67,10 +174,45 @@ def write_file(
   """
   path = file_path if file_path != _default_path else get_default_path()
 
+  if mode == 'w' and Config.atomic_writes:
+    atomic_write_file(path / file_name, str(text))
+    return
+
   with open(file=path / file_name, mode=mode) as f:
     f.write(str(text))
 
 
+def atomic_write_file(
+    file_path: Path, text: str, overwrite: bool = True
+) -> bool:
+  """Write a file so that readers never see it partially written.
+
+  The text is written to a temporary file of the same folder, which is then
+  renamed (``os.replace``) to ``file_path``. When ``overwrite`` is False the
+  temporary file is hard linked instead, so an existing file is never
+  replaced: False is returned in that case.
+  """
+  folder, name = os.path.split(str(file_path))
+  fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', dir=folder or '.')
+  try:
+    with os.fdopen(fd, 'w') as f:
+      f.write(text)
+    if overwrite:
+      os.replace(tmp_path, file_path)
+      return True
+    try:
+      os.link(tmp_path, file_path)
+    except FileExistsError:
+      return False
+    except OSError:
+      # Filesystems without hard links: exclusive creation instead
+      return _exclusive_write_file(file_path, text)
+    return True
+  finally:
+    if exists(tmp_path):
+      os.remove(tmp_path)
+
+
 def remove_file(
     file_name: str,
     file_path: Path = _default_path
@@ -80,6 +222,16 @@ def remove_file(
   os.remove(path / file_name)
 
 
+def _exclusive_write_file(file_path: Path, text: str) -> bool:
+  """Write a file only if it does not exist. Returns False if it exists."""
+  try:
+    with open(file_path, 'x') as f:
+      f.write(text)
+  except FileExistsError:
+    return False
+  return True
+
+
 def try_remove_file(file_path: Path) -> bool:
   """Try to remove a file."""
   for _ in range(5):
@@ -0,0 +1,83 @@
+"""DataFrames of the historical data, built the first time they are read."""
+from collections.abc import MutableMapping
+from threading import Lock
+from typing import Dict, Iterator
+
+from pandas import DataFrame, to_datetime
+
+from tradeo.ohlc import OHLC
+
+MT_TIME_FORMAT = '%Y.%m.%d %H:%M'
+
+
+class HistoricalDataFrames(MutableMapping):
+  """Historical data of each symbol as a DataFrame.
+
+  The DataFrames are the ones of ``Historical_Data_<symbol>.json``: indexed
+  by the MetaTrader time strings, with the ``open``, ``high``, ``low``,
+  ``close`` and ``volume`` columns. The client stores the OHLC parsed from
+  the file (``set_ohlc``) and the DataFrame is only built the first time
+  the symbol is read, so the file checks do not pay for it.
+  """
+
+  def __init__(self):
+    """Initialize an empty mapping."""
+    self._frames: Dict[str, DataFrame] = {}
+    self._ohlc: Dict[str, OHLC] = {}
+    self._lock = Lock()
+
+  def set_ohlc(self, symbol: str, ohlc: OHLC) -> None:
+    """Store the OHLC, with naive broker datetimes, of a symbol."""
+    with self._lock:
+      self._ohlc[symbol] = ohlc
+      self._frames.pop(symbol, None)
+
+  def __getitem__(self, symbol: str) -> DataFrame:
+    """Return the DataFrame of a symbol, building it if needed."""
+    with self._lock:
+      if symbol not in self._frames:
+        self._frames[symbol] = mt_dataframe(self._ohlc.pop(symbol))
+      return self._frames[symbol]
+
+  def __setitem__(self, symbol: str, frame: DataFrame) -> None:
+    """Replace the DataFrame of a symbol."""
+    with self._lock:
+      self._frames[symbol] = frame
+      self._ohlc.pop(symbol, None)
+
+  def __delitem__(self, symbol: str) -> None:
+    """Remove the data of a symbol."""
+    with self._lock:
+      if symbol not in self._frames and symbol not in self._ohlc:
+        raise KeyError(symbol)
+      self._frames.pop(symbol, None)
+      self._ohlc.pop(symbol, None)
+
+  def __iter__(self) -> Iterator[str]:
+    """Iterate over the symbols with historical data."""
+    with self._lock:
+      return iter([*self._frames, *self._ohlc])
+
+  def __len__(self) -> int:
+    """Return the number of symbols with historical data."""
+    with self._lock:
+      return len(self._frames) + len(self._ohlc)
+
+
+def mt_dataframe(ohlc: OHLC) -> DataFrame:
+  """Return the DataFrame of an OHLC with naive broker datetimes.
+
+  It is indexed by the MetaTrader time strings, as the DataFrame built with
+  ``DataFrame.from_dict`` from the candles of a ``Historical_Data`` file.
+  """
+  index = to_datetime(ohlc.epoch, unit='s').strftime(MT_TIME_FORMAT)
+  return DataFrame(
+      {
+          'open': ohlc.open,
+          'high': ohlc.high,
+          'low': ohlc.low,
+          'close': ohlc.close,
+          'volume': ohlc.volume,
+      },
+      index=index,
+  )
@@ -0,0 +1,147 @@
+"""Pluggable JSON decoders and encoders for the files of the MT bridge.
+
+Every JSON file written by MQL is decoded, and ``Orders_Stored.json`` is
+encoded, through the codec returned by ``get_codec``. ``orjson`` and
+``msgspec`` are used when they are installed and the standard library
+``json`` module is the fallback. The codec is chosen with the
+``TB_JSON_CODEC`` environment variable (``auto``, ``orjson``, ``msgspec`` or
+``json``) or with ``set_codec``.
+"""
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Tuple, Type, Union
+import importlib
+import json
+
+from tradeo.config import Config
+
+# Typing types
+decode_errors_type = Tuple[Type[Exception], ...]
+
+# Preference order of the "auto" codec
+_CODEC_PREFERENCE = ['orjson', 'msgspec', 'json']
+
+
+class JsonCodec:
+  """JSON decoder and encoder of a library."""
+
+  def __init__(
+      self,
+      name: str,
+      loads: Callable[[Union[bytes, str]], Any],
+      dumps: Callable[[Any], str],
+      decode_errors: decode_errors_type,
+  ):
+    """Initialize the codec.
+
+    Args:
+      name (str): Name of the library.
+      loads (Callable): Function that decodes bytes or str.
+      dumps (Callable): Function that encodes an object to str.
+      decode_errors (tuple): Exceptions raised by ``loads`` on invalid JSON.
+    """
+    self.name = name
+    self.loads = loads
+    self.dumps = dumps
+    self.decode_errors = decode_errors
+
+  def __repr__(self) -> str:
+    """Return the representation of the codec."""
+    return f'JsonCodec({self.name})'
+
+
+def set_codec(name: str) -> None:
+  """Set the default codec used by the MT bridge."""
+  global _default_codec
+  _default_codec = get_codec(name)
+
+
+def get_codec(name: Union[str, None] = None) -> JsonCodec:
+  """Return the codec of a library, or the default codec if no name is given.
+
+  ``auto`` selects the fastest installed library. A ValueError is raised for
+  unknown or not installed libraries.
+  """
+  global _default_codec
+  if name is None:
+    if _default_codec is None:
+      _default_codec = get_codec(Config.json_codec)
+    return _default_codec
+
+  if name == 'auto':
+    return get_codec(available_codecs()[0])
+  if name not in _CODEC_PREFERENCE:
+    raise ValueError(f'Unknown JSON codec: {name}')
+  if name not in available_codecs():
+    raise ValueError(f'JSON codec {name} is not installed')
+  return _CODEC_BUILDERS[name]()
+
+
+def available_codecs() -> List[str]:
+  """Return the installed codecs, fastest first."""
+  return [
+      name for name in _CODEC_PREFERENCE
+      if name == 'json' or _import_optional(name) is not None
+  ]
+
+
+def decode_typed(data: Union[bytes, str], kind: str) -> object:
+  """Decode a bridge file straight into ``msgspec`` structs.
+
+  ``kind`` is ``orders`` (``Orders.json``), ``trades``
+  (``Historical_Trades.json``) or ``ticks`` (``Market_Data.json``). See
+  ``tradeo.json_structs``, which requires msgspec.
+  """
+  from tradeo.json_structs import TYPED_DECODERS
+  decoder = TYPED_DECODERS.get(kind)
+  if decoder is None:
+    raise ValueError(f'Unknown typed JSON kind: {kind}')
+  return decoder.decode(data)
+
+
+def _import_optional(name: str) -> Union[ModuleType, None]:
+  """Return an optional module or None if it is not installed."""
+  try:
+    return importlib.import_module(name)
+  except ImportError:
+    return None
+
+
+def _json_codec() -> JsonCodec:
+  """Return the codec of the standard library."""
+  return JsonCodec(
+      'json', json.loads, json.dumps,
+      (json.JSONDecodeError, UnicodeDecodeError),
+  )
+
+
+def _orjson_codec() -> JsonCodec:
+  """Return the orjson codec. orjson encodes to bytes."""
+  orjson = importlib.import_module('orjson')
+
+  def dumps(obj: object) -> str:
+    return orjson.dumps(obj).decode()
+
+  return JsonCodec('orjson', orjson.loads, dumps, (orjson.JSONDecodeError,))
+
+
+def _msgspec_codec() -> JsonCodec:
+  """Return the msgspec codec. msgspec encodes to bytes."""
+  msgspec = importlib.import_module('msgspec')
+  decoder = msgspec.json.Decoder()
+  encoder = msgspec.json.Encoder()
+
+  def dumps(obj: object) -> str:
+    return encoder.encode(obj).decode()
+
+  return JsonCodec(
+      'msgspec', decoder.decode, dumps,
+      (msgspec.DecodeError, UnicodeDecodeError),
+  )
+
+
+_CODEC_BUILDERS: Dict[str, Callable[[], JsonCodec]] = {
+    'json': _json_codec,
+    'orjson': _orjson_codec,
+    'msgspec': _msgspec_codec,
+}
+_default_codec: Union[JsonCodec, None] = None
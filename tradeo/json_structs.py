@@ -0,0 +1,63 @@
+"""Typed msgspec structs of the JSON files written by MQL.
+
+This module requires the optional ``msgspec`` library. Use it through
+``tradeo.json_codec.decode_typed``.
+"""
+from typing import Dict, Union
+
+import msgspec
+
+
+class TickStruct(msgspec.Struct):
+  """Price of a symbol in ``Market_Data.json``."""
+
+  bid: float
+  ask: float
+  tick_value: Union[float, None] = None
+
+
+class OrderStruct(msgspec.Struct):
+  """Open order in ``Orders.json``."""
+
+  magic: int
+  symbol: str
+  lots: float
+  order_type: str = msgspec.field(name='type')
+  open_price: float = 0.0
+  open_time: str = ''
+  SL: float = 0.0
+  TP: float = 0.0
+  pnl: float = 0.0
+  swap: float = 0.0
+  comment: str = ''
+
+
+class OrdersFileStruct(msgspec.Struct):
+  """Content of ``Orders.json``."""
+
+  account_info: Dict[str, Union[float, str]]
+  orders: Dict[str, OrderStruct]
+
+
+class TradeStruct(msgspec.Struct):
+  """Closed trade in ``Historical_Trades.json``."""
+
+  magic: int
+  symbol: str
+  lots: float
+  trade_type: str = msgspec.field(name='type')
+  entry: str = ''
+  deal_time: str = ''
+  execution_time: str = ''
+  deal_price: float = 0.0
+  pnl: float = 0.0
+  commission: float = 0.0
+  swap: float = 0.0
+  comment: str = ''
+
+
+TYPED_DECODERS = {
+    'ticks': msgspec.json.Decoder(Dict[str, TickStruct]),
+    'orders': msgspec.json.Decoder(OrdersFileStruct),
+    'trades': msgspec.json.Decoder(Dict[str, TradeStruct]),
+}
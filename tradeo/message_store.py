@@ -0,0 +1,142 @@
+"""Fixed-capacity store of the messages received from MetaTrader."""
+from collections import deque
+from collections.abc import MutableMapping
+from typing import Deque, Dict, Iterator, List, Sequence, Union, cast
+
+from tradeo.mt_message import MT_MessageError, MT_MessageInfo
+
+# Typing types
+message_type = Union[MT_MessageInfo, MT_MessageError]
+messages_type = Dict[str, List[message_type]]
+
+
+class MessageStore:
+  """Last info and error messages of ``Messages.json``.
+
+  Each kind of message is kept in a ring buffer (``deque``) of ``capacity``
+  messages, so the oldest ones are dropped instead of growing forever. The
+  stored error messages are also indexed by error type.
+  """
+
+  def __init__(self, capacity: int = 1000):
+    """Initialize an empty store of ``capacity`` messages of each kind."""
+    if capacity <= 0:
+      raise ValueError('capacity must be positive')
+    self.capacity = capacity
+    self.info: Deque[MT_MessageInfo] = deque(maxlen=capacity)
+    self.errors: Deque[MT_MessageError] = deque(maxlen=capacity)
+    self._errors_by_type: Dict[str, Deque[MT_MessageError]] = {}
+
+  def add_info(self, message: MT_MessageInfo) -> None:
+    """Add an info message, dropping the oldest one when full."""
+    self.info.append(message)
+
+  def add_error(self, message: MT_MessageError) -> None:
+    """Add an error message, dropping the oldest one when full."""
+    if len(self.errors) == self.capacity:
+      self._unindex(self.errors[0])
+    self.errors.append(message)
+    self._errors_by_type.setdefault(message.error_type, deque()).append(
+        message
+    )
+
+  def _unindex(self, message: MT_MessageError) -> None:
+    """Remove the oldest error of the store from the error type index."""
+    if not isinstance(message, MT_MessageError):
+      return
+    # The oldest error is also the oldest one of its type
+    by_type = self._errors_by_type[message.error_type]
+    by_type.popleft()
+    if not by_type:
+      del self._errors_by_type[message.error_type]
+
+  def errors_of_type(self, error_type: str) -> List[MT_MessageError]:
+    """Return the stored error messages of an error type, oldest first."""
+    return list(self._errors_by_type.get(error_type, ()))
+
+  def error_types(self) -> List[str]:
+    """Return the error types of the stored error messages."""
+    return list(self._errors_by_type)
+
+  def replace(
+      self,
+      info_messages: Sequence[MT_MessageInfo],
+      error_messages: Sequence[MT_MessageError],
+  ) -> None:
+    """Replace the stored messages, keeping the last ``capacity`` of each."""
+    self.clear()
+    self.info.extend(info_messages)
+    for message in error_messages[-self.capacity:]:
+      if isinstance(message, MT_MessageError):
+        self.add_error(message)
+      else:
+        self.errors.append(message)
+
+  def clear(self) -> None:
+    """Remove every message."""
+    self.info.clear()
+    self.errors.clear()
+    self._errors_by_type.clear()
+
+  def as_dict(self) -> messages_type:
+    """Return the ``INFO`` and ``ERROR`` messages as lists, oldest first."""
+    return {'INFO': list(self.info), 'ERROR': list(self.errors)}
+
+
+class MessagesView(MutableMapping):
+  """Live ``INFO`` and ``ERROR`` mapping of the messages of a store.
+
+  Reading a kind returns a list of its messages, oldest first. Assigning a
+  list to a kind replaces its messages in the store, and deleting a kind or
+  calling ``clear`` removes them. Both kinds are always present.
+  """
+
+  KINDS = ('INFO', 'ERROR')
+
+  def __init__(self, store: MessageStore):
+    """Initialize the view of ``store``."""
+    self.store = store
+
+  def __getitem__(self, kind: str) -> List[message_type]:
+    """Return the messages of a kind."""
+    return list(self._messages(kind))
+
+  def __setitem__(self, kind: str, messages: Sequence[message_type]) -> None:
+    """Replace the messages of a kind."""
+    if kind == 'INFO':
+      self.store.replace(
+          cast(Sequence[MT_MessageInfo], messages), list(self.store.errors)
+      )
+    else:
+      self._messages(kind)
+      self.store.replace(
+          list(self.store.info), cast(Sequence[MT_MessageError], messages)
+      )
+
+  def __delitem__(self, kind: str) -> None:
+    """Remove the messages of a kind."""
+    self[kind] = []
+
+  def __iter__(self) -> Iterator[str]:
+    """Iterate over the kinds of messages."""
+    return iter(self.KINDS)
+
+  def __len__(self) -> int:
+    """Return the number of kinds of messages."""
+    return len(self.KINDS)
+
+  def __repr__(self) -> str:
+    """Return the representation of the messages as a dict."""
+    return repr(self.store.as_dict())
+
+  def clear(self) -> None:
+    """Remove every message of the store."""
+    self.store.clear()
+
+  def _messages(self, kind: str) -> Sequence[message_type]:
+    """Return the ring buffer of a kind, raising KeyError if unknown."""
+    if kind == 'INFO':
+      return self.store.info
+    if kind == 'ERROR':
+      return self.store.errors
+    raise KeyError(kind)
@@ -1,43 +1,87 @@
 """Script of MT_Client what it sends commands to MT4/MT5."""
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta
+import inspect
 import time
-from typing import List, Dict, Union, Callable, Tuple, TYPE_CHECKING, Set, cast
+import traceback
+from typing import (
+    List, Dict, Union, Callable, Tuple, TYPE_CHECKING, Set, Iterable, Iterator,
+    TypeVar, cast
+)
 from threading import Thread, Lock
 from os.path import join, exists
-from random import randrange
 from pandas import DataFrame
+import numpy as np
 from pathlib import Path
 from time import sleep
-import glob
-import json
 import threading
 
 from tradeo.config import Config
 from tradeo.log import log
 from tradeo.singleton import Singleton
-from tradeo.files import (try_load_json, try_remove_file, try_read_file)
+from tradeo.files import (
+    try_remove_file, atomic_write_file, JsonFileCache,
+    NOT_MODIFIED
+)
+from tradeo.file_watcher import FileWatcher
+from tradeo.json_codec import get_codec
+from tradeo.orders_writer import OrdersStoredWriter
+from tradeo.poll_scheduler import (
+    HistoricalRequests, PollScheduler, poll_stats_type
+)
+from tradeo.command import (
+    CommandHandle, CommandSlots, command_key, command_stats_type
+)
 from tradeo.order_operations import OrderOperations
 from tradeo.order_type import get_order_type_from_str
 from tradeo.order import (
-    Order, MutableOrderDetails, ImmutableOrderDetails, OrderPrice
+    Order, MutableOrderDetails, ImmutableOrderDetails, OrderPrice, OrderDelta,
+    diff_orders
 )
+from tradeo.order_book import OrderBook
 from tradeo.trade import (Trade, TradeMetadata, TradeFinancials, TradeTimes)
-from tradeo.ohlc import OHLC
+from tradeo.ohlc import OHLC, parse_mt_candles
+from tradeo.historical_frames import HistoricalDataFrames
+from tradeo.tick_store import TickStore
+from tradeo.bar_builder import BarBuilder
+from tradeo.candle_store import CandleStore, EPOCH, OPEN, parse_candles
 from tradeo.trading_methods import get_pip
-from tradeo.utils import string_to_date_utc
+from tradeo.utils import broker_epoch_to_utc, mt_dates_to_utc
 from tradeo.mt_message import MT_MessageError, MT_MessageInfo
+from tradeo.message_store import MessageStore, MessagesView, messages_type
+from tradeo.updates import (
+    ACCOUNT_INFO, BAR_DATA, MARKET_DATA, OPEN_ORDERS, UpdateNotifier
+)
 if TYPE_CHECKING:
   from tradeo.event_handlers.event_handler import (
       EventHandler
   )  # pragma: no cover
 
+# Pollers that send commands or run the strategies of on_historical_data,
+# which are run out of the polling thread
+BLOCKING_POLLERS = ('historical_data', 'historical_trades')
+
 # Typing types
+T = TypeVar('T')
 attributes_data_type = Dict[str, Dict]
-messages_type = Dict[str, List[Union[MT_MessageInfo, MT_MessageError]]]
 account_info_type = Dict[str, Union[float, str]]
-historical_data_type = Dict[str, DataFrame]
+historical_data_type = Dict[str, OHLC]
 pollers_type = Dict[str, bool]
+poller_targets_type = Dict[str, Tuple[List[str], Callable]]
+poll_intervals_type = Dict[str, float]
+historical_data_iterator_type = Iterator[Tuple[str, OHLC]]
+pending_commands_type = Dict[str, List[CommandHandle]]
+orders_by_ticket_type = Dict[int, Order]
+trades_by_ticket_type = Dict[int, Trade]
+# Symbol, bid, ask and closed bars (time frame and OHLC) of a stored tick
+tick_event_type = Tuple[str, float, float, List[Tuple[str, OHLC]]]
+# Open orders with their JSON data and OrderBook, valid while they are the
+# ``open_orders`` list
+open_orders_snapshot_type = Tuple[
+    List[Order], Dict[str, Dict], Union[OrderBook, None]
+]
 
 
 class MT_Client(metaclass=Singleton):
@@ -54,6 +98,7 @@ class MT_Client(metaclass=Singleton):
       files_subfolder: str = 'AgentFiles',
       convert_to_utc: bool = True,
       pollers: Union[pollers_type, None] = None,
+      watch_files: bool = False,
   ):
     """Initialize the MT_Client instance with specified parameters.
 
@@ -76,6 +121,10 @@ class MT_Client(metaclass=Singleton):
         omitted, the legacy ``TB_CHECK_*_THREAD`` environment variables are
         used. Valid keys are ``messages``, ``market_data``, ``bar_data``,
         ``open_orders``, ``historical_data`` and ``historical_trades``.
+      watch_files (bool, optional): Whether to replace the sleep polling of
+        the file pollers with an inotify watcher of the agent files folder.
+        Falls back to sleep polling when inotify is not available.
+        Defaults to False.
     """
     if historical_trades_refresh_seconds <= 0:
       raise ValueError('historical_trades_refresh_seconds must be positive')
@@ -83,12 +132,14 @@ class MT_Client(metaclass=Singleton):
     # Parameter attributes
     self.sleep_delay = sleep_delay
     self.max_retry_command_seconds = max_retry_command_seconds
-    self.historical_trades_refresh_seconds = (
-        historical_trades_refresh_seconds
-    )
+    self.historical_trades_refresh_seconds = historical_trades_refresh_seconds
     self.num_command_files = 50
     self.convert_to_utc = convert_to_utc
     self.pollers = self._build_pollers(pollers)
+    self.poll_intervals = self._build_poll_intervals()
+    self.watch_files = watch_files
+    self.atomic_writes = Config.atomic_writes
+    self.orders_stored_writer = self._build_orders_stored_writer()
 
     # Paths to output MT files
     self.prefix_files_path = files_subfolder
@@ -97,23 +148,54 @@ class MT_Client(metaclass=Singleton):
     # Control attributes
     self.event_handler = event_handler
     self.lock = Lock()
+    self.data_lock = threading.RLock()
     self._last_messages_millis = 0
     self.command_id = 0
     self.symbol_locks: Dict[str, threading.Lock] = {}
+    self.file_watcher: Union[FileWatcher, None] = None
+    self._written_symbols: Dict[str, None] = {}
+    self._written_symbols_lock = Lock()
+    self._written_symbols_worker: Union[ThreadPoolExecutor, None] = None
+    self._checking_written_symbols = False
+    self.poll_scheduler: Union[PollScheduler, None] = None
+    self._last_historical_trades_refresh: Union[datetime, None] = None
+    self.json_cache = JsonFileCache()
+    self.pending_commands: pending_commands_type = {}
+    self.command_batch_size = 100
+    self.commands_written = 0
+    self.command_files_written = 0
+    self._command_write_seconds = 0.0
+    self._command_batch = threading.local()
+    self._command_slots: Union[CommandSlots, None] = None
+    self._command_stats: command_stats_type = {}
+    self._commands_lock = Lock()
 
     # Data attributes
-    self.messages: messages_type = {'INFO': [], 'ERROR': []}
+    self._init_data_attributes()
+
+    # State attributes
+    self.activate()
+
+  def _init_data_attributes(self) -> None:
+    """Initialize the data read from the MT files."""
+    self.message_store = MessageStore()
+    self.updates = UpdateNotifier()
     self.open_orders: List[Order] = []
+    self._open_orders_snapshot: open_orders_snapshot_type = ([], {}, None)
     self.account_info: account_info_type = {}
     self.market_data: attributes_data_type = {}
+    self.tick_store: Union[TickStore, None] = TickStore()
+    self.bar_builder: Union[BarBuilder, None] = None
+    self.candle_store: Union[CandleStore, None] = None
     self.bar_data: attributes_data_type = {}
-    self.historical_data: historical_data_type = {}
+    self.historical_data = HistoricalDataFrames()
+    self.historical_ohlc: historical_data_type = {}
+    self.historical_requests = HistoricalRequests()
     self.historical_trades: List[Trade] = []
+    self.historical_trades_by_ticket: trades_by_ticket_type = {}
+    self._seen_trade_tickets: Set[int] = set()
     self._successful_symbols: Set[str] = set()
 
-    # State attributes
-    self.activate()
-
   def set_agent_paths(self) -> None:
     """Set the paths to the files generated by MQL."""
     mt_files_path = Config.mt_files_path
@@ -188,6 +270,47 @@ class MT_Client(metaclass=Singleton):
     """Set polling thread configuration for this client instance."""
     self.pollers = self._build_pollers(pollers)
 
+  def _build_orders_stored_writer(self) -> Union[OrdersStoredWriter, None]:
+    """Create the writer of Orders_Stored.json from the configuration.
+
+    No writer is created, so the file is written in the polling thread, when
+    ``Config.orders_stored_interval_ms`` is 0.
+    """
+    if Config.orders_stored_interval_ms <= 0:
+      return None
+    return OrdersStoredWriter(
+        Config.orders_stored_interval_ms, Config.orders_journal,
+        self.atomic_writes, Config.orders_journal_compact_entries,
+    )
+
+  def _build_poll_intervals(
+      self, poll_intervals: Union[poll_intervals_type, None] = None
+  ) -> poll_intervals_type:
+    """Merge explicit poll intervals with the ``sleep_delay`` defaults."""
+    result = {name: self.sleep_delay for name in self._default_pollers()}
+    if poll_intervals is None:
+      return result
+
+    unknown_keys = set(poll_intervals) - set(result)
+    if unknown_keys:
+      joined_keys = ', '.join(sorted(unknown_keys))
+      raise ValueError(f'Unknown poller(s): {joined_keys}')
+    if any(interval <= 0 for interval in poll_intervals.values()):
+      raise ValueError('Poll intervals must be positive')
+
+    result.update(poll_intervals)
+    return result
+
+  def set_poll_intervals(self, poll_intervals: poll_intervals_type) -> None:
+    """Set the seconds between two polls of each poller.
+
+    Every poller not included in ``poll_intervals`` uses ``sleep_delay``. For
+    example ``{'open_orders': 0.05, 'historical_trades': 1}`` keeps the ticks
+    at ``sleep_delay`` but polls the orders every 50 ms and the historical
+    trades every second.
+    """
+    self.poll_intervals = self._build_poll_intervals(poll_intervals)
+
   def _can_start_poller(
       self, poller_name: str, required_paths: List[str]
   ) -> bool:
@@ -213,48 +336,185 @@ class MT_Client(metaclass=Singleton):
     return thread
 
   def start(self) -> None:
-    """Start the background file-polling threads.
+    """Start the background file pollers.
 
-    These threads consume files written by the MetaTrader expert advisor. They
+    These pollers consume files written by the MetaTrader expert advisor. They
     do not all request data by themselves:
     - messages and open orders are written by the expert advisor continuously.
     - market data requires a previous ``subscribe_symbols`` command.
     - bar data requires a previous ``subscribe_symbols_bar_data`` command.
     - historical candles require previous ``get_historical_data`` commands.
     - historical trades are requested periodically by the historical trades
-      thread before reading ``Historical_Trades.json``.
+      poller before reading ``Historical_Trades.json``.
+
+    Every poller is a source of a single ``PollScheduler`` thread, polled at
+    its own interval (see ``set_poll_intervals``). The historical data and
+    trades pollers run on its worker threads, so neither the commands they
+    send nor ``on_historical_data`` delay the other pollers. When
+    ``watch_files`` is enabled, the file pollers (every one except historical
+    trades, which also sends periodic requests) are served by an inotify
+    watcher instead.
     """
     self.START = True
     self.send_reset_command_ids_command()
-    # Start the demand threads
-    if self.pollers['messages'] and self._can_start_poller(
-        'messages', ['path_messages']
-    ):
-      self.start_thread(self.start_thread_check_messages)
-    if self.pollers['market_data'] and self._can_start_poller(
-        'market_data', ['path_market_data']
-    ):
-      self.start_thread(self.start_thread_check_market_data)
-    if self.pollers['bar_data'] and self._can_start_poller(
-        'bar_data', ['path_bar_data']
-    ):
-      self.start_thread(self.start_thread_check_bar_data)
-    if self.pollers['open_orders'] and self._can_start_poller(
-        'open_orders', ['path_orders', 'path_orders_stored']
-    ):
-      self.start_thread(self.start_thread_check_open_orders)
-    if self.pollers['historical_data'] and self._can_start_poller(
-        'historical_data', ['path_historical_data_prefix']
-    ):
-      self.start_thread(self.start_thread_check_historical_data)
-    if self.pollers['historical_trades'] and self._can_start_poller(
-        'historical_trades', ['path_historical_trades']
-    ):
-      self.start_thread(self.start_thread_check_and_update_historical_trades)
+
+    pollers = self._poller_targets()
+    enabled_pollers = [
+        name for name, (required_paths, _) in pollers.items()
+        if self.pollers[name] and self._can_start_poller(name, required_paths)
+    ]
+    watched_pollers = (
+        self._start_file_watcher(enabled_pollers) if self.watch_files
+        else set()
+    )
+    self._start_poll_scheduler([
+        name for name in enabled_pollers if name not in watched_pollers
+    ])
+
+  def _poller_targets(self) -> poller_targets_type:
+    """Return the required path attributes and check method of each poller."""
+    return {
+        'messages': (['path_messages'], self.check_messages),
+        'market_data': (['path_market_data'], self.check_market_data),
+        'bar_data': (['path_bar_data'], self.check_bar_data),
+        'open_orders': (
+            ['path_orders', 'path_orders_stored'], self.check_open_orders
+        ),
+        'historical_data': (
+            ['path_historical_data_prefix'], self.check_historical_data
+        ),
+        'historical_trades': (
+            ['path_historical_trades'],
+            self._check_and_update_historical_trades,
+        ),
+    }
+
+  def _start_poll_scheduler(self, pollers: List[str]) -> None:
+    """Add the given pollers to the poll scheduler and start it.
+
+    A scheduler assigned to ``poll_scheduler`` before calling ``start`` is
+    reused, so several clients can share one polling thread. The scheduler
+    also resolves the handles of the commands consumed by the MQL side.
+    The ``BLOCKING_POLLERS`` run on worker threads of the scheduler, so the
+    polling thread only checks the files.
+    """
+    if self.poll_scheduler is None:
+      self.poll_scheduler = PollScheduler()
+    self.poll_scheduler.add_source(
+        self._commands_source_name(),
+        self._when_started(self.check_pending_commands),
+        self.sleep_delay,
+    )
+    targets = self._poller_targets()
+    for name in pollers:
+      self.poll_scheduler.add_source(
+          self._poll_source_name(name),
+          self._when_started(targets[name][1]),
+          self.poll_intervals[name],
+          blocking=name in BLOCKING_POLLERS,
+      )
+    self.poll_scheduler.start()
+
+  def _poll_source_name(self, poller_name: str) -> str:
+    """Return the scheduler source name of a poller of this client."""
+    return f'{self.prefix_files_path}/{poller_name}'
+
+  def _commands_source_name(self) -> str:
+    """Return the scheduler source name of the pending commands check."""
+    return f'{self.prefix_files_path}:pending_commands'
+
+  def poll_stats(self) -> poll_stats_type:
+    """Return the poll statistics of each poller served by the scheduler."""
+    if self.poll_scheduler is None:
+      return {}
+    prefix = self._poll_source_name('')
+    return {
+        name[len(prefix):]: stats
+        for name, stats in self.poll_scheduler.stats().items()
+        if name.startswith(prefix)
+    }
+
+  def _start_file_watcher(self, pollers: List[str]) -> Set[str]:
+    """Start an inotify watcher for the given pollers.
+
+    Returns the pollers served by the watcher, which is an empty set when
+    inotify is not available and polling must be used instead.
+    """
+    watcher = FileWatcher(poll_interval=self.sleep_delay)
+    watched_files = {
+        'messages': (self.path_messages, self.check_messages),
+        'market_data': (self.path_market_data, self.check_market_data),
+        'bar_data': (self.path_bar_data, self.check_bar_data),
+        'open_orders': (self.path_orders, self.check_open_orders),
+    }
+    watched = set()
+    for name in pollers:
+      if name in watched_files:
+        path, check = watched_files[name]
+        watcher.watch(path, self._when_started(check))
+        watched.add(name)
+    if 'historical_data' in pollers:
+      watcher.watch_prefix(
+          self.path_historical_data_prefix, self._on_historical_data_written
+      )
+      watched.add('historical_data')
+
+    if len(watched) == 0 or not watcher.start():
+      log.debug('File watcher not available, using polling')
+      return set()
+
+    self.file_watcher = watcher
+    return watched
+
+  def _when_started(self, check: Callable) -> Callable:
+    """Wrap a check method so it only runs while the client is started."""
+    def callback(*_) -> None:
+      if self.START:
+        check()
+    return callback
+
+  def _on_historical_data_written(self, file_path: Path) -> None:
+    """Queue the check of the symbol whose historical data file was written.
+
+    The checks run on a worker thread, so ``on_historical_data`` does not
+    delay the events of the other watched files. A new check is not started
+    while the previous one is running: that one also checks the symbols
+    written meanwhile.
+    """
+    prefix = Path(self.path_historical_data_prefix).name
+    if not self.START or file_path.suffix != '.json':
+      return
+    with self._written_symbols_lock:
+      self._written_symbols[file_path.stem[len(prefix):]] = None
+      if self._checking_written_symbols:
+        return
+      self._checking_written_symbols = True
+      if self._written_symbols_worker is None:
+        self._written_symbols_worker = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='historical_data_watcher'
+        )
+      self._written_symbols_worker.submit(self._check_written_symbols)
+
+  def _check_written_symbols(self) -> None:
+    """Check the historical data of the written symbols until none is left."""
+    while True:
+      with self._written_symbols_lock:
+        if len(self._written_symbols) == 0:
+          self._checking_written_symbols = False
+          return
+        symbol = next(iter(self._written_symbols))
+        del self._written_symbols[symbol]
+      try:
+        if self.START:
+          self.check_historical_data(symbol)
+      except Exception:  # noqa
+        log.error(traceback.format_exc())
 
   def stop(self) -> None:
-    """Stop the threads."""
+    """Stop the threads and write the pending orders data."""
     self.START = False
+    if self.orders_stored_writer is not None:
+      self.orders_stored_writer.flush()
 
   def activate(self) -> None:
     """Activate the threads."""
@@ -263,153 +523,230 @@ class MT_Client(metaclass=Singleton):
   def deactivate(self) -> None:
     """Deactivate the threads."""
     self.ACTIVE = False
+    if self.orders_stored_writer is not None:
+      self.orders_stored_writer.stop()
+    if self.file_watcher is not None:
+      self.file_watcher.stop()
+      log.debug(
+          f'File watcher avoided {self.file_watcher.reads_avoided} reads'
+      )
+      self.file_watcher = None
+    with self._written_symbols_lock:
+      worker, self._written_symbols_worker = self._written_symbols_worker, None
+    if worker is not None:
+      worker.shutdown(wait=False)
+    if self.poll_scheduler is not None:
+      for name in self.pollers:
+        self.poll_scheduler.remove_source(self._poll_source_name(name))
+      self.poll_scheduler.remove_source(self._commands_source_name())
+      if len(self.poll_scheduler.sources) == 0:
+        self.poll_scheduler.stop()
 
   def _get_lock(self, symbol: str) -> threading.Lock:
     """Retrieve or create a lock for a specific symbol."""
-    if symbol not in self.symbol_locks:
-      self.symbol_locks[symbol] = threading.Lock()
-    return self.symbol_locks[symbol]
+    lock = self.symbol_locks.get(symbol)
+    if lock is None:
+      # setdefault keeps the first lock if two threads create one
+      lock = self.symbol_locks.setdefault(symbol, threading.Lock())
+    return lock
 
-  def start_thread_check_messages(self) -> None:
-    """Start the thread to check MetaTrader messages.
+  def check_messages(self) -> MessagesView:
+    """Update and return the messages object.
 
-    No prior client command is required. The expert advisor writes
-    ``Messages.json`` when it emits info/error messages.
+    Only the entries newer than the last processed one are sorted and their
+    times converted.
     """
-    while self.ACTIVE:
-      sleep(self.sleep_delay)
-      if self.START:
-        self.check_messages()
-
-  def check_messages(self) -> messages_type:
-    """Update and return the messages object."""
-    data = try_load_json(self.path_messages)
-
-    if len(data) > 0 and data != self.messages:
-
-      for millis, message in sorted(data.items()):
-        if int(millis) > self._last_messages_millis:
-          self._last_messages_millis = int(millis)
-
-          message_content = list(message.values())
-          time = string_to_date_utc(
-              str_date=message_content[1],
-              date_format='%Y.%m.%d %H:%M:%S',
-              from_timezone=Config.broker_timezone
-          )
-          if self._is_current_datetime(time):
-            self._add_new_message(message_content, time)
+    data = self.json_cache.load_if_changed(self.path_messages)
+    if data is NOT_MODIFIED:
+      return self.messages
+
+    new_keys = sorted(
+        (int(millis), millis) for millis in data
+        if int(millis) > self._last_messages_millis
+    )
+    if new_keys:
+      self._last_messages_millis = new_keys[-1][0]
+    new_messages = [list(data[millis].values()) for _, millis in new_keys]
+    times = mt_dates_to_utc(
+        [message[1] for message in new_messages], Config.broker_timezone
+    )
+    for message_content, message_time in zip(new_messages, times):
+      if self._is_current_datetime(message_time):
+        self._add_new_message(message_content, message_time)
     return self.messages
 
+  @property
+  def messages(self) -> MessagesView:
+    """Return a live ``INFO`` and ``ERROR`` mapping of ``message_store``.
+
+    Only the last ``message_store.capacity`` messages of each kind are
+    kept. Assigning a dict with ``INFO`` and ``ERROR`` lists, assigning the
+    list of a kind or clearing the mapping changes the stored messages.
+    """
+    return MessagesView(self.message_store)
+
+  @messages.setter
+  def messages(self, messages: messages_type) -> None:
+    """Replace the stored messages."""
+    self.set_messages(
+        cast(List[MT_MessageInfo], messages.get('INFO', [])),
+        cast(List[MT_MessageError], messages.get('ERROR', [])),
+    )
+
   def _add_new_message(self, message: List, time: datetime) -> None:
     if 'ERROR' in message:
       error_type = message[2]
       description = message[3]
-      self.messages['ERROR'].append(
+      self.message_store.add_error(
           MT_MessageError(time, error_type, description)
       )
     else:
       message = message[2]
-      self.messages['INFO'].append(MT_MessageInfo(time, str(message)))
+      self.message_store.add_info(MT_MessageInfo(time, str(message)))
 
     if self.event_handler:
       self.event_handler.on_message(self, message)
 
-  def get_error_messages(self) -> List[MT_MessageError]:
-    """Return the error messages."""
-    return cast(List[MT_MessageError], self.messages['ERROR'])
+  def get_error_messages(
+      self, error_type: Union[str, None] = None
+  ) -> List[MT_MessageError]:
+    """Return the error messages, only of ``error_type`` if it is given."""
+    if error_type is not None:
+      return self.message_store.errors_of_type(error_type)
+    return list(self.message_store.errors)
 
   def get_info_messages(self) -> List[MT_MessageInfo]:
     """Return the info messages."""
-    return cast(List[MT_MessageInfo], self.messages['INFO'])
+    return list(self.message_store.info)
 
   def set_messages(
       self, info_messages: List[MT_MessageInfo],
       error_messages: List[MT_MessageError]
   ) -> None:
     """Set manually the messages object."""
-    self.messages['INFO'] = cast(
-        List[Union[MT_MessageInfo, MT_MessageError]], info_messages
-    )
-    self.messages['ERROR'] = cast(
-        List[Union[MT_MessageInfo, MT_MessageError]], error_messages
-    )
+    self.message_store.replace(info_messages, error_messages)
 
   def clean_messages(self):
     """Clean the messages object."""
     try_remove_file(self.path_messages)
-    self.messages = {'INFO': [], 'ERROR': []}
-
-  def start_thread_check_market_data(self) -> None:
-    """Start the thread to check subscribed market data.
-
-    Requires a previous ``subscribe_symbols`` call. Without that command, the
-    expert advisor has no symbols in its market-data subscription list.
-    """
-    while self.ACTIVE:
-      sleep(self.sleep_delay)
-      if self.START:
-        self.check_market_data()
+    self.message_store.clear()
 
   def check_market_data(self) -> Dict[str, Dict]:
-    """Update, trigger event if needed and return the market data object."""
-    data = try_load_json(self.path_market_data)
-
-    if len(data) > 0 and data != self.market_data:
+    """Update, trigger event if needed and return the market data object.
 
-      if self.event_handler:
-        for symbol in data.keys():
-          cond = symbol not in self.market_data
-          cond = cond or data[symbol] != self.market_data.get(symbol)
-          if cond:
-            self.event_handler.on_tick(
-                self, symbol, data[symbol]['bid'], data[symbol]['ask']
+    The file is read and the ticks are stored under ``data_lock``, so a tick
+    is stored and its events are triggered once even if several threads
+    (pollers, strategies calling ``get_bid_ask``) check the market data at
+    the same time. The events are triggered once the lock is released, so
+    a slow handler does not block the other threads.
+    """
+    events: List[tick_event_type] = []
+    with self.data_lock:
+      data = self.json_cache.load_if_changed(self.path_market_data)
+      if data is not NOT_MODIFIED and len(data) > 0 and (
+          data != self.market_data
+      ):
+        now = time.time()
+        changed = [
+            symbol for symbol, bid_ask in data.items()
+            if bid_ask != self.market_data.get(symbol)
+        ]
+        events = [
+            self._store_tick(
+                symbol, data[symbol]['bid'], data[symbol]['ask'], now
             )
-      self.market_data = data
+            for symbol in changed
+        ]
+        self.market_data = data
+        self.updates.notify([*changed, MARKET_DATA])
+      market_data = self.market_data
+
+    for event in events:
+      self._trigger_tick_events(*event)
+    return market_data
+
+  def _store_tick(
+      self, symbol: str, bid: float, ask: float, timestamp: float
+  ) -> tick_event_type:
+    """Store a new tick, build the bars and return the tick event."""
+    if self.tick_store is not None:
+      self.tick_store.append(symbol, bid, ask, timestamp)
+    bar_builder = self.bar_builder
+    closed_bars = [] if bar_builder is None else [
+        (time_frame, bar_builder.ohlc(symbol, time_frame))
+        for _, time_frame in bar_builder.update(symbol, timestamp, bid)
+    ]
+    return symbol, bid, ask, closed_bars
 
-    return self.market_data
+  def _trigger_tick_events(
+      self,
+      symbol: str,
+      bid: float,
+      ask: float,
+      closed_bars: List[Tuple[str, OHLC]],
+  ) -> None:
+    """Trigger ``on_tick`` and ``on_bar_close`` of a stored tick."""
+    if self.event_handler:
+      self.event_handler.on_tick(self, symbol, bid, ask)
+      for time_frame, ohlc in closed_bars:
+        self.event_handler.on_bar_close(self, symbol, time_frame, ohlc)
 
   def get_bid_ask(self,
                   symbol: str,
                   timeout: float = 5.0) -> Tuple[float, float]:
     """
-    Return the bid and ask price of a symbol, retrying if necessary.
+    Return the bid and ask price of a symbol, waiting for it if necessary.
+
+    If the symbol is not in the market data, it waits until the market data
+    poller notifies a tick of the symbol, checking the file again every
+    market data poll interval.
 
     Args:
       symbol: The symbol to look up.
-      timeout: Total time in seconds to keep retrying.
+      timeout: Total time in seconds to keep waiting.
 
     Returns:
       A tuple (bid, ask) with prices, or (0, 0) if not found.
     """
-    start_time = time.time()
-
-    while (time.time() - start_time) < timeout:
-      self.check_market_data()
-      try:
-        bid_ask = self.market_data[symbol]
-        return bid_ask['bid'], bid_ask['ask']
-      except KeyError:
-        time.sleep(1)
-
-    log.warning(f'Symbol {symbol} not found after {timeout}s.')
-    return 0, 0
-
-  def start_thread_check_bar_data(self) -> None:
-    """Start the thread to check subscribed bar data.
+    bid_ask = self._wait_for_update(
+        symbol, 'market_data',
+        lambda: self.check_market_data().get(symbol), timeout,
+    )
+    if bid_ask is None:
+      log.warning(f'Symbol {symbol} not found after {timeout}s.')
+      return 0, 0
+    return bid_ask['bid'], bid_ask['ask']
 
-    Requires a previous ``subscribe_symbols_bar_data`` call. Without that
-    command, the expert advisor has no instruments in its bar-data subscription
-    list.
+  def _wait_for_update(
+      self,
+      key: str,
+      poller: str,
+      read: Callable[[], T],
+      timeout: float,
+  ) -> Union[T, None]:
+    """Return the first value of ``read`` that is not None.
+
+    Between two reads it waits for an update of ``key`` notified by the
+    pollers, for the poll interval of ``poller`` at most, so the data is
+    also read when that poller is not running. None is returned after
+    ``timeout`` seconds.
     """
-    while self.ACTIVE:
-      sleep(self.sleep_delay)
-      if self.START:
-        self.check_bar_data()
+    deadline = time.monotonic() + timeout
+    while True:
+      version = self.updates.version(key)
+      value = read()
+      remaining = deadline - time.monotonic()
+      if value is not None or remaining <= 0:
+        return value
+      self.updates.wait(
+          key, version, min(remaining, self.poll_intervals[poller])
+      )
 
   def check_bar_data(self) -> Dict[str, Dict]:
     """Update, trigger event if needed and return the bar data object."""
-    data = try_load_json(self.path_bar_data)
+    data = self.json_cache.load_if_changed(self.path_bar_data)
+    if data is NOT_MODIFIED:
+      return self.bar_data
 
     if len(data) > 0 and data != self.bar_data:
 
@@ -433,127 +770,178 @@ class MT_Client(metaclass=Singleton):
                 ), data[st]['volume']
             )
       self.bar_data = data
+      self.updates.notify([BAR_DATA])
 
     return self.bar_data
 
-  def start_thread_check_open_orders(self) -> None:
-    """Start the thread to check open orders and account info.
+  def check_open_orders(self) -> List[Order]:
+    """Update, trigger event if needed and return the open orders object.
 
-    No prior client command is required. The expert advisor writes
-    ``Orders.json`` continuously from the current positions, pending orders,
-    and account state.
+    The open orders can be pending or filled. Like ``check_market_data``,
+    they are updated under ``data_lock`` and the events are triggered with
+    that snapshot once the lock is released.
     """
-    while self.ACTIVE:
-      sleep(self.sleep_delay)
-      if self.START:
-        self.check_open_orders()
+    with self.data_lock:
+      delta = self._update_open_orders()
+      account_info, open_orders = self.account_info, self.open_orders
 
-  def check_open_orders(self) -> List[Order]:
-    """Update, trigger event if needed and return the open orders object.
+    if delta is not None and self.event_handler:
+      if delta.opened_or_closed:
+        self.event_handler.on_order_event(self, account_info, open_orders)
+      if delta:
+        self.event_handler.on_order_delta(self, account_info, delta)
+    return open_orders
 
-    The open orders can be pending or filled.
+  def _update_open_orders(self) -> Union[OrderDelta, None]:
+    """Update the open orders if Orders.json has changed.
+
+    Returns the changes of the orders, or None if nothing has changed.
     """
-    data = try_load_json(self.path_orders)
+    data = self.json_cache.load_if_changed(self.path_orders)
+    if data is NOT_MODIFIED:
+      return None
+
     data_orders = data.get('orders')
     data_account_info = data.get('account_info')
-
-    len_data = len(data) > 0
-    data_orders_is_dict = isinstance(data_orders, Dict)
-    data_account_info_is_dict = isinstance(data_account_info, Dict)
-    changes = (
-        data_orders != self.open_orders or
-        data_account_info != self.account_info
-    )
-
+    if not (
+        len(data) > 0 and isinstance(data_orders, Dict) and
+        isinstance(data_account_info, Dict)
+    ):
+      return None
     if (
-        len_data and data_orders_is_dict and data_account_info_is_dict and
-        changes
+        data_orders == self._open_orders_json() and
+        data_account_info == self.account_info
     ):
+      return None
+
+    previous = {order.ticket: order for order in self.open_orders}
+    orders = self._transform_json_orders_to_orders(data_orders, previous)
+    delta = diff_orders(previous, {order.ticket: order for order in orders})
+    account_changed = data_account_info != self.account_info
+    self.account_info = data_account_info
+    self.open_orders = orders
+    self._open_orders_snapshot = (orders, data_orders, None)
+    self.updates.notify(
+        [OPEN_ORDERS, ACCOUNT_INFO] if account_changed else [OPEN_ORDERS]
+    )
 
-      orders = self._transform_json_orders_to_orders(data_orders)
+    self._write_orders_stored(data)
+    return delta
 
-      new_event = False
-      # If an existing open order is not in the new data, trigger an event
-      for order in self.open_orders:
-        if order not in orders:
-          new_event = True
-          break
+  @property
+  def order_book(self) -> OrderBook:
+    """Return the open orders as a columnar ``OrderBook``.
 
-      # If a new open order is not in the existing data, trigger an event
-      for order in orders:
-        if order not in self.open_orders:
-          new_event = True
-          break
+    It is built from the ``Orders.json`` data of ``open_orders`` the first
+    time it is used after they change, or from the Order objects when
+    ``open_orders`` has been assigned directly.
+    """
+    orders, json_orders, book = self._open_orders_snapshot
+    if orders is not self.open_orders:
+      orders, json_orders, book = self.open_orders, {}, None
+    if book is None:
+      book = (
+          OrderBook.from_json(json_orders) if json_orders
+          else OrderBook.from_orders(orders)
+      )
+      self._open_orders_snapshot = (orders, json_orders, book)
+    return book
 
-      self.account_info = data_account_info
-      self.open_orders = orders
+  def _write_orders_stored(self, data: Dict) -> None:
+    """Store the last orders data written by MQL.
 
+    With ``orders_stored_writer`` the data is handed to its thread, which
+    coalesces the writes. Otherwise it is written in the calling thread.
+    """
+    writer = self.orders_stored_writer
+    if writer is not None:
+      writer.atomic = self.atomic_writes
+      writer.submit(self.path_orders_stored, data)
+      return
+    text = get_codec().dumps(data)
+    if self.atomic_writes:
+      atomic_write_file(self.path_orders_stored, text)
+    else:
       with open(self.path_orders_stored, 'w') as f:
-        f.write(json.dumps(data))
-
-      if new_event and self.event_handler:
-        self.event_handler.on_order_event(
-            self, self.account_info, self.open_orders
-        )
+        f.write(text)
 
-    return self.open_orders
+  def _transform_json_orders_to_orders(
+      self,
+      json_orders: Dict,
+      previous: Union[orders_by_ticket_type, None] = None,
+  ) -> List[Order]:
+    """Return a list of open Order objects.
 
-  def _transform_json_orders_to_orders(self, json_orders: Dict) -> List[Order]:
-    """Return a list of open Order objects."""
+    The orders of ``previous`` (keyed by ticket) whose JSON data has not
+    changed since the last snapshot are reused instead of built again.
+    """
+    previous = previous or {}
+    previous_json = self._open_orders_json()
+    new_orders = {
+        t: o for t, o in json_orders.items()
+        if int(t) not in previous or previous_json.get(t) != o
+    }
+    str_open_times = [
+        o['open_time'] for o in new_orders.values()
+        if o.get('open_time') is not None
+    ]
+    open_times = dict(zip(
+        str_open_times,
+        mt_dates_to_utc(str_open_times, Config.broker_timezone),
+    ))
     return [
-        Order(
-            MutableOrderDetails(
-                OrderPrice(
-                    price=o['open_price'],
-                    stop_loss=o['SL'],
-                    take_profit=o['TP'],
-                ),
-                lots=o['lots'],
-            ),
-            ImmutableOrderDetails(
-                symbol=o['symbol'],
-                order_type=get_order_type_from_str(o['type']),
-                magic=o['magic'],
-                comment=o['comment'],
-                open_time=None
-                if o.get('open_time') is None else string_to_date_utc(
-                    str_date=o['open_time'],
-                    date_format='%Y.%m.%d %H:%M:%S',
-                    from_timezone=Config.broker_timezone,
-                ),
-            ),
-            ticket=int(t),
-            pnl=o['pnl'],
-        ) for t, o in json_orders.items()
+        self._json_order_to_order(t, o, open_times) if t in new_orders
+        else previous[int(t)]
+        for t, o in json_orders.items()
     ]
 
-  def start_thread_check_historical_data(self) -> None:
-    """Start the thread to check requested historical candle data.
+  def _open_orders_json(self) -> Dict[str, Dict]:
+    """Return the JSON data of ``open_orders``, empty if it was replaced."""
+    orders, json_orders, _ = self._open_orders_snapshot
+    return json_orders if orders is self.open_orders else {}
 
-    Requires previous ``get_historical_data`` calls. This thread only reads the
-    ``Historical_Data_<symbol>.json`` files generated by the expert advisor in
-    response to those commands.
-    """
-    while self.ACTIVE:
-      sleep(self.sleep_delay)
-      if self.START:
-        self.check_historical_data()
+  @staticmethod
+  def _json_order_to_order(
+      ticket: str, o: Dict, open_times: Dict[str, datetime]
+  ) -> Order:
+    """Return the Order of an entry of ``Orders.json``."""
+    return Order(
+        MutableOrderDetails(
+            OrderPrice(
+                price=o['open_price'],
+                stop_loss=o['SL'],
+                take_profit=o['TP'],
+            ),
+            lots=o['lots'],
+        ),
+        ImmutableOrderDetails(
+            symbol=o['symbol'],
+            order_type=get_order_type_from_str(o['type']),
+            magic=o['magic'],
+            comment=o['comment'],
+            open_time=open_times.get(o.get('open_time')),
+        ),
+        ticket=int(ticket),
+        pnl=o['pnl'],
+    )
 
   def check_historical_data(self, symbol: Union[str, None] = None) -> Dict:
     """Update historical_data, trigger event if needed and return that data."""
-    # "symbol" is None when it comes from "start_thread_check_historical_data"
-    # In this case, we need to get a random remaining symbol
+    # "symbol" is None when it comes from the historical data poller
+    # In this case, we take the next remaining symbol with a changed file
     if symbol is None:
-      remaining_symbols = self.get_remaining_symbols()
-      if len(remaining_symbols) == 0:
+      symbol = self._next_historical_data_symbol()
+      if symbol is None:
         return {}
-      symbol = remaining_symbols[randrange(len(remaining_symbols))]
     elif symbol in self.successful_symbols:
       return {}
 
     # We read the symbol file
-    file_path = Path(f'{self.path_historical_data_prefix}{symbol}.json')
-    data = try_load_json(file_path)
+    file_path = self._historical_data_path(symbol)
+    data = self.json_cache.load_if_changed(file_path)
+    if data is NOT_MODIFIED:
+      return {}
+    self.historical_requests.read(symbol)
 
     lock = self._get_lock(symbol)
     # If data is already loaded and there is no another thread running
@@ -562,40 +950,100 @@ class MT_Client(metaclass=Singleton):
         self._process_historical_data(symbol, data)
       finally:
         lock.release()
+    elif len(data) > 0:
+      # Another thread is processing the symbol, read it again next time
+      self.json_cache.invalidate(file_path)
 
     return data
 
+  def _next_historical_data_symbol(self) -> Union[str, None]:
+    """Return the remaining symbol whose response is expected first.
+
+    The symbols are sorted by ``historical_requests``. Files that have not
+    changed since they were last read are skipped with a single stat.
+    """
+    remaining_symbols = self.historical_requests.order(
+        sorted(self.get_remaining_symbols())
+    )
+    for symbol in remaining_symbols:
+      if self.json_cache.is_modified(self._historical_data_path(symbol)):
+        return symbol
+      self.historical_requests.skipped(symbol)
+    return None
+
+  def _historical_data_path(self, symbol: str) -> Path:
+    """Return the historical data file of a symbol."""
+    return Path(f'{self.path_historical_data_prefix}{symbol}.json')
+
+  def historical_data_wait_stats(self) -> poll_stats_type:
+    """Return the wait statistics of the historical data of each symbol.
+
+    See ``HistoricalRequests.stats``.
+    """
+    return self.historical_requests.stats()
+
   def _process_historical_data(self, symbol: str, data: Dict) -> None:
-    # The dataframe is built
-    df = DataFrame.from_dict(
-        data[f'{symbol}_{Config.timeframe}'], orient='index'
-    )  # type: ignore
-    self.historical_data[symbol] = df
+    candles = data[f'{symbol}_{Config.timeframe}']
+    if self.candle_store is not None:
+      # The whole window of the store is used, not only the new candles
+      stored = self.candle_store.merge(
+          symbol, Config.timeframe, parse_candles(candles)
+      )
+      epoch, prices = stored[EPOCH].astype(np.int64), stored[OPEN:]
+    else:
+      epoch, prices = parse_mt_candles(candles)
+    if len(epoch) == 0:
+      return
+    broker_ohlc = OHLC.from_arrays(epoch, *prices, utc=False)
+    self.historical_data.set_ohlc(symbol, broker_ohlc)
 
     # The date and time corresponding to the last load are calculated
-    last_date_from_df = string_to_date_utc(
-        str_date=df.index[-1],
-        from_timezone=Config.broker_timezone,
-    )
-    if self._is_current_datetime(last_date_from_df):
-      self.successful_symbols.add(symbol)
-      if self.event_handler:
-        if self.convert_to_utc:
-          ohlc = OHLC(df, convert_to_utc=Config.broker_timezone)
-        else:
-          ohlc = OHLC(df)
-        self.event_handler.on_historical_data(self, symbol, ohlc)
-
-      # We delete the command file(s) in case it hasn't been deleted.
-      command_files = self.command_file_exist(symbol)
-      for com in command_files:
-        try_remove_file(com)
+    utc_epoch = broker_epoch_to_utc(epoch, Config.broker_timezone)
+    last_date = datetime.fromtimestamp(utc_epoch[-1], Config.utc_timezone)
+    if self._is_current_datetime(last_date):
+      if self.convert_to_utc:
+        ohlc = OHLC.from_arrays(utc_epoch, *prices)
+      else:
+        ohlc = broker_ohlc
+      self._on_historical_data_current(symbol, ohlc)
     else:
       log.debug(
           f'Historical data for {symbol} not up to date: '
-          f'last date in data {last_date_from_df}'
+          f'last date in data {last_date}'
       )
 
+  def _on_historical_data_current(self, symbol: str, ohlc: OHLC) -> None:
+    """Mark a symbol as updated and trigger ``on_historical_data``."""
+    self.historical_requests.completed(symbol)
+    self.historical_ohlc[symbol] = ohlc
+    self.successful_symbols.add(symbol)
+    if self.event_handler:
+      self.event_handler.on_historical_data(self, symbol, ohlc)
+
+    # We delete the command file(s) in case it hasn't been deleted.
+    for file_path in self.command_file_exist(symbol):
+      self._cancel_historical_data_file(str(file_path), symbol)
+
+  def _cancel_historical_data_file(self, file_path: str, symbol: str) -> None:
+    """Delete a GET_HISTORICAL_DATA command file that has not been read.
+
+    Its commands are marked as failed (superseded) instead of consumed and
+    its slot is released. A batched file with other commands is kept.
+    """
+    with self._commands_lock:
+      handles = self.pending_commands.get(file_path, [])
+      if any(
+          h.command != 'GET_HISTORICAL_DATA' or command_key(h.content) != symbol
+          for h in handles
+      ):
+        return
+      self.pending_commands.pop(file_path, None)
+    for handle in handles:
+      if not handle.done():
+        handle.mark_failed(f'superseded by the historical data of {symbol}')
+    try_remove_file(Path(file_path))
+    self._get_command_slots().release(file_path)
+
   @staticmethod
   def _is_current_datetime(date_utc: datetime) -> bool:
     """Check if the historical data is up to date."""
@@ -610,40 +1058,67 @@ class MT_Client(metaclass=Singleton):
     end_range = rounded_now_date + timedelta(minutes=5)
     return (date_utc >= start_range and date_utc < end_range)
 
-  def start_thread_check_and_update_historical_trades(self) -> None:
-    """Start the thread to request and check historical trades.
+  def _check_and_update_historical_trades(self) -> None:
+    """Request historical trades if the refresh is due, then check them."""
+    now = datetime.now(Config.utc_timezone)
+    last_refresh = self._last_historical_trades_refresh
+    should_refresh = (
+        last_refresh is None or
+        (now - last_refresh).total_seconds() >=
+        self.historical_trades_refresh_seconds
+    )
+    if should_refresh:
+      self.get_historical_trades()
+      self._last_historical_trades_refresh = now
 
-    This thread periodically sends ``GET_HISTORICAL_TRADES`` through
-    ``get_historical_trades`` and then reads ``Historical_Trades.json`` through
-    ``check_historical_trades``. The request is throttled by
-    ``historical_trades_refresh_seconds`` to avoid flooding MetaTrader with
-    commands.
-    """
-    last_refresh: Union[datetime, None] = None
-    while self.ACTIVE:
-      sleep(self.sleep_delay)
-      if not self.START:
-        continue
+    self.check_historical_trades()
 
-      now = datetime.now(Config.utc_timezone)
-      should_refresh = (
-          last_refresh is None or
-          (now - last_refresh).total_seconds() >=
-          self.historical_trades_refresh_seconds
-      )
-      if should_refresh:
-        self.get_historical_trades()
-        last_refresh = now
+  def check_historical_trades(self) -> List[Trade]:
+    """Update and return the historical trades object.
 
-      self.check_historical_trades()
+    The file is skipped while its stat signature is unchanged. Otherwise
+    only the trades whose ticket was not in the previous file are built and
+    the others are reused from ``historical_trades_by_ticket``. The trades
+    never seen in any previous file are passed to ``on_historical_trades``,
+    so a snapshot with a longer lookback does not report old trades again.
+    """
+    data = self.json_cache.load_if_changed(self.path_historical_trades)
+    if not isinstance(data, Dict):
+      return self.historical_trades
 
-  def check_historical_trades(self) -> List[Trade]:
-    """Update and return the historical trades object."""
-    data = try_load_json(self.path_historical_trades)
-    if isinstance(data, Dict):
-      self.historical_trades = self._transform_json_trades_to_trades(data)
+    known = self.historical_trades_by_ticket
+    built_trades = self._transform_json_trades_to_trades(
+        {t: trade for t, trade in data.items() if int(t) not in known}
+    )
+    new_trades = [
+        trade for trade in built_trades
+        if trade.ticket not in self._seen_trade_tickets
+    ]
+    self._seen_trade_tickets.update(trade.ticket for trade in built_trades)
+    known = {**known, **{trade.ticket: trade for trade in built_trades}}
+    self.historical_trades = [known[int(t)] for t in data]
+    self.historical_trades_by_ticket = {
+        trade.ticket: trade for trade in self.historical_trades
+    }
+
+    if new_trades and self.event_handler:
+      self._on_historical_trades(new_trades)
     return self.historical_trades
 
+  def _on_historical_trades(self, new_trades: List[Trade]) -> None:
+    """Trigger ``on_historical_trades`` with the new trades.
+
+    Handlers that override it without the ``trades`` argument, written
+    before it was added, are called with the client only.
+    """
+    callback = self.event_handler.on_historical_trades
+    try:
+      inspect.signature(callback).bind(self, new_trades)
+    except TypeError:
+      callback(self)
+    else:
+      callback(self, new_trades)
+
   def ensure_historical_trades_current(
       self,
       timeout_seconds: int = 5,
@@ -663,21 +1138,16 @@ class MT_Client(metaclass=Singleton):
     the expert advisor to write a recent file and loads it through
     ``check_historical_trades``.
     """
-    if timeout_seconds <= 0:
-      raise ValueError('timeout_seconds must be positive')
-    if max_age_seconds <= 0:
-      raise ValueError('max_age_seconds must be positive')
-    if lookback_days <= 0:
-      raise ValueError('lookback_days must be positive')
-
+    self.validate_historical_trades_arguments(
+        timeout_seconds, max_age_seconds, lookback_days
+    )
     deadline = datetime.now(Config.utc_timezone) + timedelta(
         seconds=timeout_seconds
     )
     requested = False
 
     while datetime.now(Config.utc_timezone) < deadline:
-      self.check_historical_trades()
-      if self._historical_trades_file_is_current(max_age_seconds):
+      if self.check_historical_trades_current(max_age_seconds):
         return True
 
       if request_if_stale and not requested:
@@ -688,7 +1158,32 @@ class MT_Client(metaclass=Singleton):
 
     return False
 
-  def _historical_trades_file_is_current(self, max_age_seconds: int) -> bool:
+  @staticmethod
+  def validate_historical_trades_arguments(
+      timeout_seconds: float, max_age_seconds: float, lookback_days: int
+  ) -> None:
+    """Validate the arguments of ``ensure_historical_trades_current``.
+
+    Raises:
+      ValueError: If an argument is not positive.
+    """
+    if timeout_seconds <= 0:
+      raise ValueError('timeout_seconds must be positive')
+    if max_age_seconds <= 0:
+      raise ValueError('max_age_seconds must be positive')
+    if lookback_days <= 0:
+      raise ValueError('lookback_days must be positive')
+
+  def check_historical_trades_current(self, max_age_seconds: float) -> bool:
+    """Check the historical trades and return whether they are recent.
+
+    They are recent when ``Historical_Trades.json`` exists and has been
+    written in the last ``max_age_seconds``.
+    """
+    self.check_historical_trades()
+    return self._historical_trades_file_is_current(max_age_seconds)
+
+  def _historical_trades_file_is_current(self, max_age_seconds: float) -> bool:
     """Return True when Historical_Trades.json exists and is recent enough."""
     if not self.path_historical_trades.exists():
       return False
@@ -708,6 +1203,13 @@ class MT_Client(metaclass=Singleton):
 
   def _transform_json_trades_to_trades(self, json_trades: Dict) -> List[Trade]:
     """Return a list of historical trades objects."""
+    times = mt_dates_to_utc(
+        [trade['deal_time'] for trade in json_trades.values()]
+        + [trade['execution_time'] for trade in json_trades.values()],
+        Config.broker_timezone,
+    )
+    deal_times = times[:len(json_trades)]
+    execution_times = times[len(json_trades):]
     return [
         Trade(
             TradeMetadata(
@@ -725,38 +1227,34 @@ class MT_Client(metaclass=Singleton):
                 swap=trade['swap'],
             ),
             TradeTimes(
-                deal_time=string_to_date_utc(
-                    str_date=trade['deal_time'],
-                    date_format='%Y.%m.%d %H:%M:%S',
-                    from_timezone=Config.broker_timezone,
-                ),
-                execution_time=string_to_date_utc(
-                    str_date=trade['execution_time'],
-                    date_format='%Y.%m.%d %H:%M:%S',
-                    from_timezone=Config.broker_timezone,
-                ),
+                deal_time=deal_time,
+                execution_time=execution_time,
             ),
             ticket=int(ticket),
-        ) for ticket, trade in json_trades.items()
+        ) for (ticket, trade), deal_time, execution_time in zip(
+            json_trades.items(), deal_times, execution_times
+        )
     ]
 
-  def subscribe_symbols(self, symbols: List[str]) -> None:
+  def subscribe_symbols(self, symbols: List[str]) -> CommandHandle:
     """To send a SUBSCRIBE_SYMBOLS command to subscribe to market (tick) data.
 
     Args:
         symbols (list[str]): List of symbols to subscribe to.
 
     Returns:
-        None
+        CommandHandle: Handle of the command.
 
         The data will be stored in self.market_data.
         On receiving the data the event_handler.on_tick()
         function will be triggered.
 
     """
-    self.send_command('SUBSCRIBE_SYMBOLS', ','.join(symbols))
+    return self.send_command('SUBSCRIBE_SYMBOLS', ','.join(symbols))
 
-  def subscribe_symbols_bar_data(self, symbols: List[List[str]]) -> None:
+  def subscribe_symbols_bar_data(
+      self, symbols: List[List[str]]
+  ) -> CommandHandle:
     """To send a SUBSCRIBE_SYMBOLS_BAR_DATA command to subscribe to bar data.
 
     Kwargs:
@@ -765,7 +1263,7 @@ class MT_Client(metaclass=Singleton):
         symbols = [['EURUSD', 'M1'], ['GBPUSD', 'H1']]
 
     Returns:
-        None
+        CommandHandle: Handle of the command.
 
         The data will be stored in self.bar_data.
         On receiving the data the event_handler.on_bar_data()
@@ -773,11 +1271,11 @@ class MT_Client(metaclass=Singleton):
 
     """
     data = [f'{st[0]},{st[1]}' for st in symbols]
-    self.send_command(
+    return self.send_command(
         'SUBSCRIBE_SYMBOLS_BAR_DATA', ','.join(str(p) for p in data)
     )
 
-  def get_historical_data(self, symbol: str, time_frame: str) -> None:
+  def get_historical_data(self, symbol: str, time_frame: str) -> CommandHandle:
     """To send a GET_HISTORIC_DATA command to request historical data.
 
     Kwargs:
@@ -785,19 +1283,36 @@ class MT_Client(metaclass=Singleton):
         time_frame (str): Time frame for the requested data.
 
     Returns:
-        None
+        CommandHandle: Handle of the command.
 
-        The data will be stored in self.historical_data.
+        The data will be stored in self.historical_data, as a DataFrame,
+        and once it is current the OHLC given to
+        event_handler.on_historical_data() in self.historical_ohlc.
         On receiving the data the event_handler.on_historical_data()
         function will be triggered.
+
+        When ``self.candle_store`` is set, only the candles from the last
+        stored one onwards are requested.
     """
     # We add 10 hours because the way the library interprets this input requires
     # overshooting to ensure capturing up to the last record.
     end = datetime.now(Config.broker_timezone) + timedelta(hours=10)
     start = (end - timedelta(days=Config.lookback_days)).timestamp()
     end = end.timestamp()
+    if self.candle_store is not None:
+      # Only the candles from the last stored one, which may have been
+      # incomplete, are requested
+      last_epoch = self.candle_store.last_epoch(symbol, time_frame)
+      # The candle times are broker wall-clock times and ``start`` is UTC
+      if last_epoch is not None and broker_epoch_to_utc(
+          np.array([last_epoch]), Config.broker_timezone
+      )[0] > start:
+        start = last_epoch
     data = [symbol, time_frame, int(start), int(end)]
-    self.send_command('GET_HISTORICAL_DATA', ','.join(str(p) for p in data))
+    self.historical_requests.requested(symbol)
+    return self.send_command(
+        'GET_HISTORICAL_DATA', ','.join(str(p) for p in data)
+    )
 
   def request_historical_data(
       self, symbols: List[str], time_frame: str
@@ -816,42 +1331,146 @@ class MT_Client(metaclass=Singleton):
       symbols: List[str],
       timeout_seconds: float = 240,
       poll_interval_seconds: float = 0.1,
+      max_workers: Union[int, None] = None,
   ) -> List[str]:
     """Wait until requested historical data has been processed.
 
     The method polls ``Historical_Data_<symbol>.json`` files and calls
     ``check_historical_data`` so the configured event handler is triggered.
     It returns the symbols that could not be processed before the timeout.
+    See ``iter_historical_data`` for the arguments.
+    """
+    for _ in self.iter_historical_data(
+        symbols, timeout_seconds, poll_interval_seconds, max_workers
+    ):
+      pass
+    return self.get_remaining_symbols(list(dict.fromkeys(symbols)))
+
+  def iter_historical_data(
+      self,
+      symbols: List[str],
+      timeout_seconds: float = 240,
+      poll_interval_seconds: float = 0.1,
+      max_workers: Union[int, None] = None,
+  ) -> historical_data_iterator_type:
+    """Yield ``(symbol, OHLC)`` as the historical data of each symbol arrives.
+
+    The symbols whose data is already current are yielded first, and then
+    each symbol as soon as its ``Historical_Data_<symbol>.json`` file is
+    current, with the OHLC given to ``on_historical_data``. The iteration
+    stops when every symbol has been yielded or after ``timeout_seconds``.
+
+    With ``max_workers`` greater than 1 (``Config.historical_data_workers``
+    by default), the symbols of each round are checked on a thread pool, so
+    the candles are parsed and ``on_historical_data`` runs for several
+    symbols at the same time. The event handler must then be thread safe.
+    Commands are still written one at a time, under ``MT_Client.lock``.
     """
     if timeout_seconds < 0:
       raise ValueError('timeout_seconds cannot be negative')
     if poll_interval_seconds <= 0:
       raise ValueError('poll_interval_seconds must be positive')
+    workers = (
+        Config.historical_data_workers if max_workers is None else max_workers
+    )
+    if workers < 1:
+      raise ValueError('max_workers must be positive')
+    return self._iter_historical_data(
+        list(dict.fromkeys(symbols)),
+        timeout_seconds,
+        poll_interval_seconds,
+        workers,
+    )
 
-    remaining_symbols = self.get_remaining_symbols(list(dict.fromkeys(symbols)))
+  def _iter_historical_data(
+      self,
+      symbols: List[str],
+      timeout_seconds: float,
+      poll_interval_seconds: float,
+      workers: int,
+  ) -> historical_data_iterator_type:
+    """Generate the symbols of ``iter_historical_data`` and their OHLC.
+
+    A symbol is yielded once, whoever processed its data: this iterator or
+    another caller, such as the historical data poller.
+    """
+    remaining_symbols = self.get_remaining_symbols(symbols)
+    yielded: Set[str] = set()
+    yield from self._yield_current_historical_data(
+        [s for s in symbols if s not in remaining_symbols], yielded
+    )
     deadline = datetime.now(Config.utc_timezone) + timedelta(
         seconds=timeout_seconds
     )
 
-    while len(remaining_symbols) > 0:
-      for symbol in remaining_symbols:
-        self.check_historical_data(symbol)
+    with ExitStack() as stack:
+      executor = None
+      if workers > 1 and len(remaining_symbols) > 1:
+        executor = stack.enter_context(ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='historical_data'
+        ))
+      while len(remaining_symbols) > 0:
+        yield from self._yield_current_historical_data(
+            self._check_historical_data_of_symbols(remaining_symbols, executor),
+            yielded,
+        )
+        # Symbols completed by another caller while they were checked here
+        yield from self._yield_current_historical_data(
+            remaining_symbols, yielded
+        )
+        remaining_symbols = [
+            symbol for symbol in remaining_symbols if symbol not in yielded
+        ]
+        if (
+            len(remaining_symbols) == 0 or
+            datetime.now(Config.utc_timezone) >= deadline
+        ):
+          break
 
-      remaining_symbols = [
-          symbol for symbol in remaining_symbols
-          if symbol not in self.successful_symbols
-      ]
-      if (
-          len(remaining_symbols) == 0 or
-          datetime.now(Config.utc_timezone) >= deadline
-      ):
-        break
+        sleep(poll_interval_seconds)
 
-      sleep(poll_interval_seconds)
+  def _yield_current_historical_data(
+      self, symbols: Iterable[str], yielded: Set[str]
+  ) -> historical_data_iterator_type:
+    """Yield the symbols with current data that have not been yielded yet."""
+    for symbol in symbols:
+      if symbol not in yielded and self._has_current_historical_data(symbol):
+        yielded.add(symbol)
+        yield symbol, self.historical_ohlc[symbol]
 
-    return remaining_symbols
+  def _check_historical_data_of_symbols(
+      self,
+      symbols: List[str],
+      executor: Union[ThreadPoolExecutor, None],
+  ) -> Iterator[str]:
+    """Check the historical data of the symbols, in parallel if possible.
+
+    It yields the symbols whose data is current, as soon as they are.
+    """
+    if executor is None:
+      for symbol in symbols:
+        self.check_historical_data(symbol)
+        if self._has_current_historical_data(symbol):
+          yield symbol
+      return
 
-  def get_historical_trades(self, lookback_days: int = 30) -> None:
+    futures = {
+        executor.submit(self.check_historical_data, symbol): symbol
+        for symbol in symbols
+    }
+    for future in as_completed(futures):
+      # Exceptions of the workers are raised here, as in the serial loop
+      future.result()
+      if self._has_current_historical_data(futures[future]):
+        yield futures[future]
+
+  def _has_current_historical_data(self, symbol: str) -> bool:
+    """Return True if the data of a symbol is current and has an OHLC."""
+    return (
+        symbol in self.successful_symbols and symbol in self.historical_ohlc
+    )
+
+  def get_historical_trades(self, lookback_days: int = 30) -> CommandHandle:
     """To send a GET_HISTORIC_TRADES command to request historical trades.
 
     Kwargs:
@@ -859,15 +1478,15 @@ class MT_Client(metaclass=Singleton):
         The history must also be visible in MT4.
 
     Returns:
-        None
+        CommandHandle: Handle of the command.
 
         The data will be stored in self.historical_trades.
-        On receiving the data the event_handler.on_historical_trades()
-        function will be triggered.
+        On receiving new trades the event_handler.on_historical_trades()
+        function will be triggered with them.
     """
-    self.send_command('GET_HISTORICAL_TRADES', str(lookback_days))
+    return self.send_command('GET_HISTORICAL_TRADES', str(lookback_days))
 
-  def create_new_order(self, order: Order) -> None:
+  def create_new_order(self, order: Order) -> CommandHandle:
     """Create new order."""
     log.debug(f'Creating new order: {order}')
 
@@ -875,7 +1494,7 @@ class MT_Client(metaclass=Singleton):
       bid, ask = self.get_bid_ask(order.symbol)
       self._modify_pending_order(order, bid, ask)
 
-    self.send_open_order_command(order)
+    return self.send_open_order_command(order)
 
   @staticmethod
   def _modify_pending_order(order: Order, bid: float, ask: float) -> None:
@@ -891,18 +1510,18 @@ class MT_Client(metaclass=Singleton):
       elif ot.sell and order.price > bid:
         ot.value = OrderOperations.SELLLIMIT
 
-  def send_open_order_command(self, order: Order) -> None:
+  def send_open_order_command(self, order: Order) -> CommandHandle:
     """To send an OPEN_ORDER command to open an order."""
     data = [
         order.symbol, order.order_type.value.value, order.lots, order.price,
         order.stop_loss, order.take_profit, order.magic, order.comment,
         order.expiration
     ]
-    self.send_command('OPEN_ORDER', ','.join(str(p) for p in data))
+    return self.send_command('OPEN_ORDER', ','.join(str(p) for p in data))
 
   def send_modify_order_command(
       self, ticket: int, mod: MutableOrderDetails
-  ) -> None:
+  ) -> CommandHandle:
     """To send a MODIFY_ORDER command to modify an order.
 
     Args:
@@ -922,14 +1541,16 @@ class MT_Client(metaclass=Singleton):
         ticket, mod.lots, mod.price, mod.stop_loss, mod.take_profit,
         mod.expiration
     ]
-    self.send_command('MODIFY_ORDER', ','.join(str(p) for p in data))
+    return self.send_command('MODIFY_ORDER', ','.join(str(p) for p in data))
 
-  def place_break_even(self, order: Order, log_comment: str = '') -> None:
+  def place_break_even(
+      self, order: Order, log_comment: str = ''
+  ) -> CommandHandle:
     """Modify the order to place a break even."""
     pip = get_pip(order.symbol)
     buy = order.order_type.buy
     break_even = order.price + pip if buy else order.price - pip
-    self.send_modify_order_command(
+    handle = self.send_modify_order_command(
         order.ticket,
         MutableOrderDetails(
             prices=OrderPrice(
@@ -945,8 +1566,11 @@ class MT_Client(metaclass=Singleton):
             f'{log_comment}'
         )
     )
+    return handle
 
-  def send_close_order_command(self, ticket: int, lots: float = 0) -> None:
+  def send_close_order_command(
+      self, ticket: int, lots: float = 0
+  ) -> CommandHandle:
     """To send a CLOSE_ORDER command to close an order.
 
     Args:
@@ -958,22 +1582,22 @@ class MT_Client(metaclass=Singleton):
 
     """
     data = [ticket, lots]
-    self.send_command('CLOSE_ORDER', ','.join(str(p) for p in data))
+    return self.send_command('CLOSE_ORDER', ','.join(str(p) for p in data))
 
-  def send_close_all_orders_command(self) -> None:
+  def send_close_all_orders_command(self) -> CommandHandle:
     """To send a CLOSE_ALL_ORDERS command to close all orders."""
-    self.send_command('CLOSE_ALL_ORDERS', '')
+    return self.send_command('CLOSE_ALL_ORDERS', '')
 
-  def send_close_orders_by_symbol_command(self, symbol: str) -> None:
+  def send_close_orders_by_symbol_command(self, symbol: str) -> CommandHandle:
     """To send a CLOSE_ORDERS_BY_SYMBOL command to close all orders.
 
     Args:
         symbol (str): Symbol for which all orders should be closed.
 
     """
-    self.send_command('CLOSE_ORDERS_BY_SYMBOL', symbol)
+    return self.send_command('CLOSE_ORDERS_BY_SYMBOL', symbol)
 
-  def send_close_orders_by_magic_command(self, magic: str) -> None:
+  def send_close_orders_by_magic_command(self, magic: str) -> CommandHandle:
     """To send a CLOSE_ORDERS_BY_MAGIC command to close all orders.
 
     Args:
@@ -981,7 +1605,7 @@ class MT_Client(metaclass=Singleton):
             be closed.
 
     """
-    self.send_command('CLOSE_ORDERS_BY_MAGIC', magic)
+    return self.send_command('CLOSE_ORDERS_BY_MAGIC', magic)
 
   def send_reset_command_ids_command(self) -> None:
     """To send a RESET_COMMAND_IDS command to reset stored command IDs.
@@ -996,46 +1620,273 @@ class MT_Client(metaclass=Singleton):
     # sleep to make sure it is read before other commands.
     sleep(0.5)
 
-  def send_command(self, command: str, content: str) -> None:
+  def send_command(self, command: str, content: str) -> CommandHandle:
     """To send a command to the MQL side.
 
     Multiple command files are used to allow for fast execution
     of multiple commands in the correct chronological order.
 
+    Returns a handle that is resolved when the MQL side consumes (deletes)
+    the command file. If every command file is still busy after
+    ``max_retry_command_seconds``, the command is not delivered: the handle
+    fails and the error is logged. Inside a ``command_batch`` block the
+    command is only written when the block ends.
     """
-    # Acquire lock so that different threads do not use the same
-    # command_id or write at the same time.
-    self.lock.acquire()
+    handle = self._new_command_handle(command, content)
+    batch = getattr(self._command_batch, 'handles', None)
+    if batch is not None:
+      batch.append(handle)
+    else:
+      self._write_commands([handle])
+    return handle
+
+  def send_commands(
+      self, commands: List[Tuple[str, str]]
+  ) -> List[CommandHandle]:
+    """To send several ``(command, content)`` pairs to the MQL side.
 
-    self.command_id = (self.command_id + 1) % 100000
+    Up to ``command_batch_size`` commands are packed in each command file,
+    keeping their order. It requires the expert advisor of this version,
+    which executes every frame of a command file.
+    """
+    handles = [
+        self._new_command_handle(command, content)
+        for command, content in commands
+    ]
+    self._write_commands(handles)
+    return handles
+
+  @contextmanager
+  def command_batch(self) -> Iterator[List[CommandHandle]]:
+    """Pack the commands sent by this thread inside the block.
+
+    Every ``send_command`` call (and its wrappers) of the current thread is
+    queued and the commands are written, in order, with ``send_commands``
+    semantics when the block ends. It yields the list of queued handles.
+    """
+    if getattr(self._command_batch, 'handles', None) is not None:
+      # Nested blocks are written by the outermost one
+      yield self._command_batch.handles
+      return
+
+    self._command_batch.handles = []
+    try:
+      yield self._command_batch.handles
+    finally:
+      handles = self._command_batch.handles
+      self._command_batch.handles = None
+      self._write_commands(handles)
+
+  def _new_command_handle(self, command: str, content: str) -> CommandHandle:
+    """Return the handle of a new command with the next command id."""
+    # Acquire lock so that different threads do not use the same command_id
+    with self.lock:
+      self.command_id = (self.command_id + 1) % 100000
+      return CommandHandle(
+          self.command_id, command, content,
+          on_consumed=self._record_command_latency,
+      )
+
+  def _write_commands(self, handles: List[CommandHandle]) -> None:
+    """Write the commands in as few command files as possible."""
+    if len(handles) == 0:
+      return
+
+    started_at = time.monotonic()
+    written = 0
+    # Acquire lock so that different threads do not write at the same time.
+    with self.lock:
+      previous_slot: Union[int, None] = None
+      for i in range(0, len(handles), self.command_batch_size):
+        chunk = handles[i:i + self.command_batch_size]
+        previous_slot = self._write_command_chunk(chunk, previous_slot)
+        if previous_slot is None:
+          break
+        written += len(chunk)
+      self.commands_written += written
+      self._command_write_seconds += time.monotonic() - started_at
 
+    self._fail_commands(handles[written:])
+
+  def _write_command_chunk(
+      self, chunk: List[CommandHandle], previous_slot: Union[int, None]
+  ) -> Union[int, None]:
+    """Write the frames of the commands in one free command file.
+
+    While the file of the previous chunk has not been consumed, only the
+    following slots are used, so the MQL side reads the chunks in order.
+    Returns the slot used or None if every command file is still busy after
+    ``max_retry_command_seconds``.
+    """
     end_time = datetime.now(
         Config.utc_timezone
     ) + timedelta(seconds=self.max_retry_command_seconds)
-    now = datetime.now(Config.utc_timezone)
+    frames = ''.join(
+        f'<:{h.command_id}|{h.command}|{h.content}:>' for h in chunk
+    )
 
     # trying again for X seconds in case all files exist or are
     # currently read from mql side.
-    while now < end_time:
-      # using 10 different files to increase the execution speed
-      # for multiple commands.
-      success = False
-      for i in range(self.num_command_files):
-        # only send commend if the file does not exists so that we
-        # do not overwrite all commands.
-        file_path = f'{self.path_commands_prefix}{i}.txt'
-        if not exists(file_path):
-          with open(file_path, 'w') as f:
-            f.write(f'<:{self.command_id}|{command}|{content}:>')
-          success = True
-          break
-      if success:
-        break
+    while True:
+      first_slot = 0
+      if previous_slot is not None and exists(
+          f'{self.path_commands_prefix}{previous_slot}.txt'
+      ):
+        first_slot = previous_slot + 1
+      slot = self._write_command_file(frames, chunk, first_slot)
+      if slot is not None or datetime.now(Config.utc_timezone) >= end_time:
+        return slot
       sleep(self.sleep_delay)
-      now = datetime.now(Config.utc_timezone)
 
-    # release lock again
-    self.lock.release()
+  def _write_command_file(
+      self, frames: str, chunk: List[CommandHandle], first_slot: int
+  ) -> Union[int, None]:
+    """Write the frames in the first free command file from ``first_slot``.
+
+    Returns the slot used or None if every command file exists.
+    """
+    # using multiple files to increase the execution speed
+    # for multiple commands.
+    slots = self._get_command_slots()
+    while True:
+      slot = slots.acquire(first_slot)
+      if slot is None:
+        return None
+      file_path = slots.path(slot)
+      self._resolve_pending_commands(file_path)
+      # exclusive creation so that we do not overwrite a command written
+      # by someone else. The slot is left busy in that case.
+      if not self._create_command_file(file_path, frames):
+        continue
+      for handle in chunk:
+        handle.mark_written(Path(file_path))
+      slots.index.add(file_path, [(h.command, h.content) for h in chunk])
+      with self._commands_lock:
+        self.pending_commands[file_path] = chunk
+      self.command_files_written += 1
+      return slot
+
+  def _create_command_file(self, file_path: str, frames: str) -> bool:
+    """Create a command file. Returns False if it already exists.
+
+    In atomic mode the file is written to a temporary file first and then
+    linked, so the MQL side never reads a partially written command.
+    """
+    if self.atomic_writes:
+      return atomic_write_file(Path(file_path), frames, overwrite=False)
+    try:
+      with open(file_path, 'x') as f:
+        f.write(frames)
+    except FileExistsError:
+      return False
+    return True
+
+  def _get_command_slots(self) -> CommandSlots:
+    """Return the occupancy of the command files of the current prefix."""
+    slots = self._command_slots
+    if (
+        slots is None or slots.prefix != str(self.path_commands_prefix) or
+        slots.num_slots != self.num_command_files
+    ):
+      slots = CommandSlots(self.path_commands_prefix, self.num_command_files)
+      self._command_slots = slots
+    return slots
+
+  def command_slot_stats(self) -> Dict[str, float]:
+    """Return the pressure statistics of the command files."""
+    return self._get_command_slots().stats()
+
+  def _fail_commands(self, handles: List[CommandHandle]) -> None:
+    """Mark as failed the commands that could not be written."""
+    for handle in handles:
+      handle.mark_failed(
+          f'{handle.command} command {handle.command_id} not delivered: '
+          f'the {self.num_command_files} command files are busy'
+      )
+      self._update_command_stats(handle.command, failed=True)
+    if len(handles) > 0:
+      log.error(
+          handles[0].error if len(handles) == 1 else
+          f'{len(handles)} commands not delivered: '
+          f'the {self.num_command_files} command files are busy'
+      )
+
+  def command_throughput(self) -> Dict[str, float]:
+    """Return the number of commands and files written and the write rate."""
+    seconds = self._command_write_seconds
+    return {
+        'commands': self.commands_written,
+        'files': self.command_files_written,
+        'commands_per_file': (
+            self.commands_written / self.command_files_written
+            if self.command_files_written else 0.0
+        ),
+        'write_seconds': seconds,
+        'commands_per_second': (
+            self.commands_written / seconds if seconds else 0.0
+        ),
+    }
+
+  def _resolve_pending_commands(self, file_path: str) -> None:
+    """Resolve the previous commands of a command file that has been read."""
+    with self._commands_lock:
+      handles = self.pending_commands.pop(file_path, [])
+    for handle in handles:
+      handle.mark_consumed()
+
+  def check_pending_commands(self) -> int:
+    """Resolve the commands whose files have been consumed by the MQL side.
+
+    Returns the number of commands that are still pending.
+    """
+    with self._commands_lock:
+      pending = list(self.pending_commands.items())
+    for file_path, handles in pending:
+      if all(handle.done() for handle in handles):
+        with self._commands_lock:
+          if self.pending_commands.get(file_path) is handles:
+            del self.pending_commands[file_path]
+        if self._command_slots is not None:
+          self._command_slots.release(file_path)
+    with self._commands_lock:
+      return sum(len(h) for h in self.pending_commands.values())
+
+  def _record_command_latency(self, handle: CommandHandle) -> None:
+    """Add the latency of a consumed command to the command statistics."""
+    self._update_command_stats(handle.command, latency=handle.latency or 0.0)
+
+  def _update_command_stats(
+      self, command: str, latency: float = 0.0, failed: bool = False
+  ) -> None:
+    """Update the statistics of a command type."""
+    with self._commands_lock:
+      stats = self._command_stats.setdefault(
+          command,
+          {'count': 0, 'failed': 0, 'total_seconds': 0.0, 'max_seconds': 0.0},
+      )
+      if failed:
+        stats['failed'] += 1
+        return
+      stats['count'] += 1
+      stats['total_seconds'] += latency
+      stats['max_seconds'] = max(stats['max_seconds'], latency)
+
+  def command_stats(self) -> command_stats_type:
+    """Return the write-to-consume latency statistics of each command type.
+
+    ``count`` is the number of consumed commands and ``failed`` the number of
+    commands that could not be written.
+    """
+    with self._commands_lock:
+      return {
+          command: {
+              **stats,
+              'mean_seconds': (
+                  stats['total_seconds'] / stats['count']
+                  if stats['count'] else 0.0
+              ),
+          } for command, stats in self._command_stats.items()
+      }
 
   def clean_all_command_files(self) -> None:
     """Clean command files."""
@@ -1052,25 +1903,38 @@ class MT_Client(metaclass=Singleton):
       self.successful_symbols.discard(symbol)
 
   def command_file_exist(self, symbol: str) -> List[Path]:
-    """Return the command files that match request hist. data from symbol."""
-    g = glob.glob(f'{self.path_commands_prefix}*')
-    pattern = f'GET_HISTORICAL_DATA|{symbol}'
-    return [Path(f) for f in g if pattern in try_read_file(Path(f))]
+    """Return the command files that match request hist. data from symbol.
+
+    The files are looked up in the index of the commands not consumed yet
+    (``CommandSlots.index``), only the files found there are stat'ed.
+    """
+    files = self._get_command_slots().index.files(
+        'GET_HISTORICAL_DATA', symbol
+    )
+    return [Path(f) for f in files if exists(f)]
 
-  def get_balance(self) -> float:
+  def get_balance(self, timeout: float = 2.5) -> float:
     """Return the balance of the account.
 
-    Returns -1.0 if the balance is not a float.
+    If it is not available, it waits up to ``timeout`` seconds for the
+    open orders poller to notify new account info. Returns -1.0 if the
+    balance is not a float.
     """
-    max_retries = 5
-    for _ in range(max_retries):
-      self.check_open_orders()
-      balance = self.account_info.get('balance')
-      if isinstance(balance, float):
-        return balance
-      sleep(0.5)
-    log.warning(f'Balance is not a float: {balance}')
-    return -1.0
+    balance = self._wait_for_update(
+        ACCOUNT_INFO, 'open_orders', self._read_balance, timeout
+    )
+    if balance is None:
+      log.warning(
+          f'Balance is not a float: {self.account_info.get("balance")}'
+      )
+      return -1.0
+    return balance
+
+  def _read_balance(self) -> Union[float, None]:
+    """Update the account info and return its balance if it is a float."""
+    self.check_open_orders()
+    balance = self.account_info.get('balance')
+    return balance if isinstance(balance, float) else None
 
   def get_remaining_symbols(
       self, symbols: Union[List[str], None] = None
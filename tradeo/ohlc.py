@@ -1,10 +1,22 @@
 """OHLC class to encapsulate OHLC data."""
 
+from __future__ import annotations
+from itertools import chain
+from operator import itemgetter
 from pandas import DataFrame, DatetimeIndex, to_datetime
 import numpy as np
-from typing import Optional
+from typing import Dict, Optional, Tuple, Union
 import pytz
 
+from tradeo.utils import broker_epoch_to_utc, mt_times_to_epoch
+
+# Typing types
+mt_candles_type = Dict[str, Dict[str, float]]
+candle_arrays_type = Tuple[np.ndarray, np.ndarray]
+
+# Price columns of the candles written by MetaTrader
+_MT_CANDLE_COLUMNS = itemgetter('open', 'high', 'low', 'close', 'volume')
+
 
 class OHLC:
   """OHLC class for financial market data."""
@@ -74,7 +86,11 @@ class OHLC:
     df.index = datetime_index
 
     # Convert datetime to Python datetime objects
-    self.datetime = np.array(datetime_index.to_pydatetime())
+    self._datetime: Union[np.ndarray, None] = np.array(
+        datetime_index.to_pydatetime()
+    )
+    self._epoch: Union[np.ndarray, None] = None
+    self._utc = datetime_index.tz is not None
     self.open = df[open_column_name].to_numpy()
     self.high = df[high_column_name].to_numpy()
     self.low = df[low_column_name].to_numpy()
@@ -85,6 +101,93 @@ class OHLC:
         else np.zeros_like(self.open)
     )
 
+  @classmethod
+  def from_arrays(
+      cls: type,
+      epoch: np.ndarray,
+      open_prices: np.ndarray,
+      high: np.ndarray,
+      low: np.ndarray,
+      close: np.ndarray,
+      volume: Optional[np.ndarray] = None,
+      utc: bool = True,
+  ) -> OHLC:
+    """Build an OHLC from NumPy arrays without an intermediate DataFrame.
+
+    The arrays are not copied. The ``datetime`` objects are only created
+    when the attribute is first accessed.
+
+    Args:
+        epoch (np.ndarray): Unix time in seconds (int64) of each entry.
+        open_prices, high, low, close (np.ndarray): Prices of each entry.
+        volume (Optional[np.ndarray]): Volume of each entry. Zeros if None.
+        utc (bool): Whether the datetimes are UTC aware. When False, the epoch
+            holds naive wall-clock times (e.g. broker time).
+    """
+    ohlc = cls.__new__(cls)
+    ohlc._datetime = None
+    ohlc._epoch = epoch
+    ohlc._utc = utc
+    ohlc.open = open_prices
+    ohlc.high = high
+    ohlc.low = low
+    ohlc.close = close
+    ohlc.volume = np.zeros_like(open_prices) if volume is None else volume
+    return ohlc
+
+  @classmethod
+  def from_mt_candles(
+      cls: type,
+      candles: mt_candles_type,
+      convert_to_utc: Optional[str | pytz.BaseTzInfo] = None,
+  ) -> OHLC:
+    """Build an OHLC from the candles of a ``Historical_Data`` file.
+
+    ``candles`` maps MetaTrader times (``%Y.%m.%d %H:%M``) to the ``open``,
+    ``high``, ``low``, ``close`` and ``volume`` of each candle, as in
+    ``data[f'{symbol}_{time_frame}']``. The arrays are filled in a single
+    pass over the dict, without a DataFrame.
+
+    Args:
+        candles (Dict[str, Dict[str, float]]): Candles of a time frame.
+        convert_to_utc (Optional[str | pytz.BaseTzInfo]): If provided, the
+            timezone of the times, which are converted to UTC. Otherwise the
+            datetimes are naive.
+    """
+    epoch, prices = parse_mt_candles(candles)
+    if convert_to_utc is not None:
+      epoch = broker_epoch_to_utc(epoch, _to_timezone(convert_to_utc))
+    return OHLC.from_arrays(
+        epoch, prices[0], prices[1], prices[2], prices[3], prices[4],
+        utc=convert_to_utc is not None,
+    )
+
+  @property
+  def datetime(self) -> np.ndarray:
+    """Return the Python datetime objects of each entry."""
+    if self._datetime is None:
+      index = to_datetime(self.epoch, unit='s', utc=self._utc)
+      self._datetime = np.array(index.to_pydatetime())
+    return self._datetime
+
+  @datetime.setter
+  def datetime(self, value: np.ndarray) -> None:
+    """Set the datetime objects of each entry."""
+    self._datetime = value
+    self._epoch = None
+
+  @property
+  def epoch(self) -> np.ndarray:
+    """Return the int64 Unix time in seconds of each entry.
+
+    For naive datetimes it is the Unix time of the wall-clock time.
+    """
+    if self._epoch is None:
+      index = DatetimeIndex(self._datetime)
+      self._utc = index.tz is not None
+      self._epoch = index.as_unit('s').asi8
+    return self._epoch
+
   def __len__(self):
     """Return the number of OHLC entries."""
     return len(self.open)
@@ -123,3 +226,30 @@ class OHLC:
         f"- Close (min: {self.close.min()}, max: {self.close.max()})\n"
         f"- Volume: {'Available' if self.volume.size > 0 else 'Not available'}"
     )
+
+
+def parse_mt_candles(candles: mt_candles_type) -> candle_arrays_type:
+  """Parse the candles of a ``Historical_Data`` file.
+
+  Returns the int64 wall-clock Unix time of each candle and a contiguous
+  float64 array with the open, high, low, close and volume rows.
+  """
+  values = np.fromiter(
+      chain.from_iterable(map(_MT_CANDLE_COLUMNS, candles.values())),
+      dtype=np.float64,
+      count=5 * len(candles),
+  )
+  prices = np.ascontiguousarray(values.reshape(len(candles), 5).T)
+  return mt_times_to_epoch(list(candles)), prices
+
+
+def _to_timezone(timezone: str | pytz.BaseTzInfo) -> pytz.BaseTzInfo:
+  """Return the pytz timezone of a name, or the timezone itself."""
+  if isinstance(timezone, str):
+    return pytz.timezone(timezone)
+  if isinstance(timezone, pytz.BaseTzInfo):
+    return timezone
+  raise TypeError((
+    'convert_to_utc must be a pytz.BaseTzInfo'
+    ' or a str representing a timezone.'
+  ))
@@ -6,7 +6,7 @@ when they want to place a new order, and it is also used for currently open
 orders reported by MetaTrader.
 """
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from tradeo.order_type import OrderType
 
@@ -196,3 +196,72 @@ class Order:
     a = abs(self.take_profit - self.price)
     b = abs(self.price - self.stop_loss)
     return a / b if b > 0 else 0
+
+
+class OrderDelta:
+  """Changes between two snapshots of the open orders.
+
+  opened (List[Order]): Orders that were not open before.
+  closed (List[Order]): Orders that are no longer open (previous objects).
+  modified (List[Order]): Orders whose price, stop loss, take profit or lots
+      have changed.
+  pnl_changed (List[Order]): Orders where only the gain or loss has
+      changed.
+  """
+  def __init__(
+      self,
+      opened: Optional[List[Order]] = None,
+      closed: Optional[List[Order]] = None,
+      modified: Optional[List[Order]] = None,
+      pnl_changed: Optional[List[Order]] = None,
+  ):
+    """Initialize the lists of changed orders."""
+    self.opened = opened or []
+    self.closed = closed or []
+    self.modified = modified or []
+    self.pnl_changed = pnl_changed or []
+
+  def __bool__(self) -> bool:
+    """Return True if any order has changed."""
+    return bool(self.opened or self.closed or self.modified or self.pnl_changed)
+
+  def __repr__(self) -> str:
+    """Return the number of changes of each kind."""
+    return (
+        f'OrderDelta(opened={len(self.opened)}, closed={len(self.closed)}, '
+        f'modified={len(self.modified)}, '
+        f'pnl_changed={len(self.pnl_changed)})'
+    )
+
+  @property
+  def opened_or_closed(self) -> bool:
+    """Return True if an order has been opened or closed."""
+    return bool(self.opened or self.closed)
+
+
+def diff_orders(
+    previous: Dict[int, Order], current: Dict[int, Order]
+) -> OrderDelta:
+  """Return the changes between two snapshots of orders keyed by ticket.
+
+  It takes O(n) time. Orders that are the same object in both snapshots are
+  unchanged.
+  """
+  delta = OrderDelta(
+      opened=[o for t, o in current.items() if t not in previous],
+      closed=[o for t, o in previous.items() if t not in current],
+  )
+  for ticket, order in current.items():
+    before = previous.get(ticket)
+    if before is None or before is order:
+      continue
+    if _order_details(before) != _order_details(order):
+      delta.modified.append(order)
+    elif before.pnl != order.pnl:
+      delta.pnl_changed.append(order)
+  return delta
+
+
+def _order_details(order: Order) -> Tuple[float, float, float, float]:
+  """Return the fields of an order that can be modified."""
+  return (order.price, order.stop_loss, order.take_profit, order.lots)
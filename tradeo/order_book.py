@@ -0,0 +1,196 @@
+"""Columnar view of the open orders for exposure and risk queries."""
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+from tradeo.config import Config
+from tradeo.order import Order
+from tradeo.order_operations import OrderOperations
+from tradeo.utils import broker_epoch_to_utc, mt_times_to_epoch, timezone_type
+
+# Columns of an OrderBook
+ORDER_BOOK_COLUMNS = (
+    'ticket', 'symbol_id', 'order_type', 'magic', 'lots', 'price',
+    'stop_loss', 'take_profit', 'pnl', 'open_time',
+)
+
+# Codes of the ``order_type`` column
+ORDER_TYPES = tuple(op.value for op in OrderOperations)
+_BUY_TYPES = (
+    OrderOperations.BUY, OrderOperations.BUYLIMIT, OrderOperations.BUYSTOP
+)
+_MARKET_TYPES = (OrderOperations.BUY, OrderOperations.SELL)
+
+# Typing types
+json_orders_type = Dict[str, Dict]
+by_symbol_type = Dict[str, float]
+index_type = Dict[Union[int, str], np.ndarray]
+
+
+class OrderBook:
+  """Open orders stored as NumPy columns, one element per order.
+
+  The columns are ``ticket``, ``symbol_id`` (position in ``symbols``),
+  ``order_type`` (position in ``ORDER_TYPES``), ``magic``, ``lots``,
+  ``price``, ``stop_loss``, ``take_profit``, ``pnl`` and ``open_time`` (UTC
+  epoch seconds). The positions of the orders of each symbol and magic
+  number are indexed, so ``indices`` and ``count`` do not scan the orders,
+  and the aggregates by symbol are computed with ``np.bincount``.
+  """
+
+  def __init__(self, symbols: Sequence[str], **columns: Sequence):
+    """Initialize the book from its columns, which have the same length.
+
+    Args:
+      symbols (Sequence[str]): Symbols referenced by ``symbol_id``.
+      columns (Sequence): One sequence per name of ``ORDER_BOOK_COLUMNS``.
+    """
+    self.symbols = list(symbols)
+    self.ticket = np.asarray(columns['ticket'], dtype=np.int64)
+    self.symbol_id = np.asarray(columns['symbol_id'], dtype=np.int64)
+    self.order_type = np.asarray(columns['order_type'], dtype=np.int8)
+    self.magic = np.asarray(columns['magic'], dtype=np.int64)
+    self.lots = np.asarray(columns['lots'], dtype=np.float64)
+    self.price = np.asarray(columns['price'], dtype=np.float64)
+    self.stop_loss = np.asarray(columns['stop_loss'], dtype=np.float64)
+    self.take_profit = np.asarray(columns['take_profit'], dtype=np.float64)
+    self.pnl = np.asarray(columns['pnl'], dtype=np.float64)
+    self.open_time = np.asarray(columns['open_time'], dtype=np.int64)
+
+    buy_codes = [ORDER_TYPES.index(t) for t in _BUY_TYPES]
+    market_codes = [ORDER_TYPES.index(t) for t in _MARKET_TYPES]
+    self.direction = np.where(np.isin(self.order_type, buy_codes), 1, -1)
+    self.market = np.isin(self.order_type, market_codes)
+    self._symbol_ids = {s: i for i, s in enumerate(self.symbols)}
+    self._symbol_index = _group_indices(self.symbol_id)
+    self._magic_index = _group_indices(self.magic)
+
+  @classmethod
+  def from_json(
+      cls: type,
+      json_orders: json_orders_type,
+      from_timezone: timezone_type = Config.broker_timezone,
+  ) -> 'OrderBook':
+    """Build the book from the ``orders`` of an ``Orders.json`` file.
+
+    The open times, written in the ``from_timezone`` of the broker, are
+    converted to UTC. A missing open time is 0, as in ``from_orders``.
+    """
+    orders = list(json_orders.values())
+    symbols: Dict[str, int] = {}
+    symbol_id = [symbols.setdefault(o['symbol'], len(symbols)) for o in orders]
+    times = [o.get('open_time') for o in orders]
+    has_time = np.array([t is not None for t in times], dtype=bool)
+    open_time = np.zeros(len(orders), dtype=np.int64)
+    open_time[has_time] = broker_epoch_to_utc(
+        mt_times_to_epoch([t for t in times if t is not None]), from_timezone
+    )
+    return cls(
+        ticket=np.fromiter(json_orders, dtype=np.int64, count=len(orders)),
+        symbols=list(symbols),
+        symbol_id=symbol_id,
+        order_type=[ORDER_TYPES.index(o['type']) for o in orders],
+        magic=[int(o['magic']) for o in orders],
+        lots=[o['lots'] for o in orders],
+        price=[o['open_price'] for o in orders],
+        stop_loss=[o['SL'] for o in orders],
+        take_profit=[o['TP'] for o in orders],
+        pnl=[o['pnl'] for o in orders],
+        open_time=open_time,
+    )
+
+  @classmethod
+  def from_orders(cls: type, orders: List[Order]) -> 'OrderBook':
+    """Build the book from Order objects, such as ``open_orders``."""
+    symbols: Dict[str, int] = {}
+    symbol_id = [symbols.setdefault(o.symbol, len(symbols)) for o in orders]
+    return cls(
+        ticket=[o.ticket for o in orders],
+        symbols=list(symbols),
+        symbol_id=symbol_id,
+        order_type=[ORDER_TYPES.index(o.order_type.value) for o in orders],
+        magic=[int(o.magic) for o in orders],
+        lots=[o.lots for o in orders],
+        price=[o.price for o in orders],
+        stop_loss=[o.stop_loss for o in orders],
+        take_profit=[o.take_profit for o in orders],
+        pnl=[o.pnl for o in orders],
+        open_time=[
+            0 if o.open_time is None else int(o.open_time.timestamp())
+            for o in orders
+        ],
+    )
+
+  def __len__(self) -> int:
+    """Return the number of orders."""
+    return len(self.ticket)
+
+  def indices(
+      self,
+      symbol: Union[str, None] = None,
+      magic: Union[int, str, None] = None,
+  ) -> np.ndarray:
+    """Return the positions of the orders of a symbol and/or magic number."""
+    result = np.arange(len(self))
+    if symbol is not None:
+      symbol_id = self._symbol_ids.get(symbol, -1)
+      result = self._symbol_index.get(symbol_id, result[:0])
+    if magic is not None:
+      by_magic = self._magic_index.get(int(magic), result[:0])
+      result = by_magic if symbol is None else np.intersect1d(result, by_magic)
+    return result
+
+  def count(
+      self,
+      symbol: Union[str, None] = None,
+      magic: Union[int, str, None] = None,
+  ) -> int:
+    """Return the number of orders of a symbol and/or magic number."""
+    return len(self.indices(symbol, magic))
+
+  def tickets(
+      self,
+      symbol: Union[str, None] = None,
+      magic: Union[int, str, None] = None,
+  ) -> np.ndarray:
+    """Return the tickets of the orders of a symbol and/or magic number."""
+    return self.ticket[self.indices(symbol, magic)]
+
+  def net_exposure(self, include_pending: bool = False) -> by_symbol_type:
+    """Return the lots bought minus the lots sold of each symbol.
+
+    Only the filled orders are counted unless ``include_pending`` is True.
+    """
+    lots = self.direction * self.lots
+    if not include_pending:
+      lots = np.where(self.market, lots, 0)
+    return self._sum_by_symbol(lots)
+
+  def risk_to_stop_loss(self) -> by_symbol_type:
+    """Return the loss of each symbol if every stop loss is hit.
+
+    It is the distance from the price to the stop loss times the lots, in
+    price units: multiply it by the contract size of the symbol to get it in
+    the account currency. A stop loss beyond the price (locked profit) has
+    a negative risk and orders without stop loss are not counted.
+    """
+    risk = self.direction * (self.price - self.stop_loss) * self.lots
+    return self._sum_by_symbol(np.where(self.stop_loss != 0, risk, 0))
+
+  def pnl_by_symbol(self) -> by_symbol_type:
+    """Return the gain or loss of the orders of each symbol."""
+    return self._sum_by_symbol(self.pnl)
+
+  def _sum_by_symbol(self, values: np.ndarray) -> by_symbol_type:
+    """Return the sum of a column for each symbol."""
+    sums = np.bincount(
+        self.symbol_id, weights=values, minlength=len(self.symbols)
+    )
+    return dict(zip(self.symbols, sums.tolist()))
+
+
+def _group_indices(keys: np.ndarray) -> index_type:
+  """Return the positions of each key, in ascending order."""
+  order = np.argsort(keys, kind='stable')
+  unique, starts = np.unique(keys[order], return_index=True)
+  return dict(zip(unique.tolist(), np.split(order, starts[1:])))
@@ -0,0 +1,249 @@
+"""Background persistence of the orders data written by MQL."""
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+import threading
+import time
+import traceback
+
+from tradeo.files import atomic_write_file
+from tradeo.json_codec import get_codec
+from tradeo.log import log
+
+JOURNAL_FILE_NAME = 'Orders_Journal.jsonl'
+
+# Typing types
+pending_write_type = Union[Tuple[Path, Dict], None]
+writer_stats_type = Dict[str, int]
+
+
+class OrdersStoredWriter:
+  """Writer thread of ``Orders_Stored.json`` that coalesces the snapshots.
+
+  ``submit`` only keeps the snapshot, so the polling thread neither encodes
+  nor writes it. The thread writes at most once every ``interval_ms`` and
+  only the latest snapshot submitted meanwhile: the older ones are dropped.
+
+  In journal mode the snapshots are not written. Instead, a line with the
+  orders opened or changed, the tickets closed and the account info, when
+  it has changed, is appended to ``Orders_Journal.jsonl`` of the same
+  folder, and ``replay_orders_journal`` rebuilds the last snapshot. The
+  journal is compacted on the first snapshot of the writer, every
+  ``compact_entries`` lines and on ``stop``: the snapshot is written and the
+  journal is replaced by a single line that holds it, so it stays bounded.
+  """
+
+  def __init__(
+      self,
+      interval_ms: int = 500,
+      journal: bool = False,
+      atomic: bool = True,
+      compact_entries: int = 1000,
+  ):
+    """Initialize the writer.
+
+    Args:
+      interval_ms (int): Minimum milliseconds between two writes.
+      journal (bool): Whether to append deltas to ``Orders_Journal.jsonl``
+        instead of writing full snapshots.
+      atomic (bool): Whether snapshots are written through a temporary file
+        and a rename.
+      compact_entries (int): Lines of the journal after which it is
+        compacted.
+    """
+    if interval_ms < 0:
+      raise ValueError('interval_ms must not be negative')
+    if compact_entries <= 0:
+      raise ValueError('compact_entries must be positive')
+    self.interval_ms = interval_ms
+    self.journal = journal
+    self.atomic = atomic
+    self.compact_entries = compact_entries
+    self.submitted = 0
+    self.written = 0
+    self._pending: pending_write_type = None
+    self._last_write = float('-inf')
+    self._stopped = False
+    self._thread: Union[threading.Thread, None] = None
+    self._condition = threading.Condition()
+    self._write_lock = threading.Lock()
+    # Last snapshot and number of journal lines of each snapshot path
+    self._journaled: Dict[Path, Dict] = {}
+    self._journal_entries: Dict[Path, int] = {}
+
+  def submit(self, file_path: Path, data: Dict) -> None:
+    """Schedule the write of a snapshot, replacing any pending one."""
+    with self._condition:
+      self.submitted += 1
+      self._pending = (Path(file_path), data)
+      if self._thread is None:
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name='OrdersStoredWriter', daemon=True
+        )
+        self._thread.start()
+      self._condition.notify()
+
+  def flush(self) -> None:
+    """Write the pending snapshot, if any, in the calling thread."""
+    with self._write_lock:
+      with self._condition:
+        pending, self._pending = self._pending, None
+      if pending is not None:
+        self._write(*pending)
+
+  def stop(self) -> None:
+    """Stop the writer thread, write the pending snapshot and compact."""
+    with self._condition:
+      self._stopped = True
+      self._condition.notify()
+      thread, self._thread = self._thread, None
+    if thread is not None and thread is not threading.current_thread():
+      thread.join()
+    self.flush()
+    self._compact_journals()
+
+  def stats(self) -> writer_stats_type:
+    """Return the snapshots submitted, written and dropped (coalesced)."""
+    with self._condition:
+      pending = int(self._pending is not None)
+      return {
+          'submitted': self.submitted,
+          'written': self.written,
+          'coalesced': self.submitted - self.written - pending,
+      }
+
+  def _run(self) -> None:
+    """Write the pending snapshots until the writer is stopped."""
+    while True:
+      with self._condition:
+        self._condition.wait_for(
+            lambda: self._pending is not None or self._stopped
+        )
+        # Snapshots submitted until the next write replace this one
+        next_write = self._last_write + self.interval_ms / 1000
+        self._condition.wait_for(
+            lambda: self._stopped, timeout=next_write - time.monotonic()
+        )
+        if self._stopped:
+          return
+      try:
+        self.flush()
+      except Exception:  # noqa
+        # The thread must keep writing the following snapshots
+        log.error(traceback.format_exc())
+
+  def _write(self, file_path: Path, data: Dict) -> None:
+    """Write a snapshot, or append its delta to the journal."""
+    try:
+      if self.journal:
+        self._append_journal(file_path, data)
+      else:
+        text = get_codec().dumps(data)
+        if self.atomic:
+          atomic_write_file(file_path, text)
+        else:
+          with open(file_path, 'w') as f:
+            f.write(text)
+    except OSError as e:
+      log.error(f'Orders data could not be written to {file_path}: {e}')
+      return
+    finally:
+      self._last_write = time.monotonic()
+    self.written += 1
+
+  def _append_journal(self, file_path: Path, data: Dict) -> None:
+    """Append the changes since the previous snapshot to the journal."""
+    previous = self._journaled.get(file_path)
+    if (
+        previous is None or
+        self._journal_entries[file_path] >= self.compact_entries
+    ):
+      self._compact_journal(file_path, data)
+      return
+    record = orders_journal_record(previous, data)
+    if record is not None:
+      with open(file_path.with_name(JOURNAL_FILE_NAME), 'a') as f:
+        f.write(_journal_line(record))
+      self._journal_entries[file_path] += 1
+    self._journaled[file_path] = data
+
+  def _compact_journals(self) -> None:
+    """Compact the journals with lines appended since their compaction."""
+    with self._write_lock:
+      for file_path, data in list(self._journaled.items()):
+        if self._journal_entries[file_path] == 1:
+          continue
+        try:
+          self._compact_journal(file_path, data)
+        except OSError as e:
+          log.error(f'Orders journal could not be compacted: {e}')
+
+  def _compact_journal(self, file_path: Path, data: Dict) -> None:
+    """Write the snapshot and replace the journal by a line that holds it.
+
+    Both files are written through a temporary file and a rename.
+    """
+    atomic_write_file(file_path, get_codec().dumps(data))
+    atomic_write_file(
+        file_path.with_name(JOURNAL_FILE_NAME),
+        _journal_line(orders_journal_record(None, data) or {}),
+    )
+    self._journaled[file_path] = data
+    self._journal_entries[file_path] = 1
+
+
+def orders_journal_record(
+    previous: Union[Dict, None], data: Dict
+) -> Union[Dict, None]:
+  """Return the journal record from one orders snapshot to the next.
+
+  The record has the ``orders`` opened or changed by ticket, the ``closed``
+  tickets and the ``account_info`` if it has changed. Every order and the
+  account info are recorded when there is no previous snapshot. None is
+  returned when nothing has changed.
+  """
+  orders = data.get('orders') or {}
+  previous_orders = {} if previous is None else previous.get('orders') or {}
+  changed = {
+      ticket: order for ticket, order in orders.items()
+      if previous_orders.get(ticket) != order
+  }
+  closed: List[str] = [
+      ticket for ticket in previous_orders if ticket not in orders
+  ]
+  record: Dict = {}
+  if changed:
+    record['orders'] = changed
+  if closed:
+    record['closed'] = closed
+  account_info = data.get('account_info')
+  if previous is None or previous.get('account_info') != account_info:
+    record['account_info'] = account_info
+  return record or None
+
+
+def _journal_line(record: Dict) -> str:
+  """Return the line of a journal record, with the current time."""
+  record['time'] = round(time.time(), 3)
+  return get_codec().dumps(record) + '\n'
+
+
+def replay_orders_journal(journal_path: Path) -> Dict:
+  """Rebuild the last orders snapshot from an ``Orders_Journal.jsonl``.
+
+  A last line that is partially written is ignored.
+  """
+  codec = get_codec()
+  snapshot: Dict = {'orders': {}, 'account_info': {}}
+  with open(journal_path, 'rb') as f:
+    for line in f:
+      try:
+        record = codec.loads(line)
+      except codec.decode_errors:
+        break
+      snapshot['orders'].update(record.get('orders', {}))
+      for ticket in record.get('closed', []):
+        snapshot['orders'].pop(ticket, None)
+      if 'account_info' in record:
+        snapshot['account_info'] = record['account_info']
+  return snapshot
@@ -0,0 +1,289 @@
+"""Single-thread scheduler for the file sources polled by MT_Client."""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread, current_thread
+from typing import Callable, Dict, List, Tuple, Union
+import heapq
+import itertools
+import time
+import traceback
+
+from tradeo.log import log
+
+# Typing types
+poll_stats_type = Dict[str, Dict[str, float]]
+
+
+class PollSource:
+  """Source polled periodically by the scheduler."""
+
+  def __init__(
+      self,
+      name: str,
+      callback: Callable,
+      interval: float,
+      blocking: bool = False,
+  ):
+    """Initialize the source and its statistics."""
+    self.name = name
+    self.callback = callback
+    self.interval = interval
+    self.blocking = blocking
+    self.running = False
+    self.polls = 0
+    self.errors = 0
+    self.busy_seconds = 0.0
+    self.max_seconds = 0.0
+    self.max_delay_seconds = 0.0
+
+  def stats(self) -> Dict[str, float]:
+    """Return the poll statistics of the source."""
+    return {
+        'interval': self.interval,
+        'polls': self.polls,
+        'errors': self.errors,
+        'busy_seconds': self.busy_seconds,
+        'mean_seconds': self.busy_seconds / self.polls if self.polls else 0.0,
+        'max_seconds': self.max_seconds,
+        'max_delay_seconds': self.max_delay_seconds,
+    }
+
+
+class PollScheduler:
+  """Run the callbacks of every source from one thread.
+
+  Each source has its own interval. The next due source is taken from a heap,
+  so the thread only wakes up when there is something to poll. A scheduler
+  can be shared by several clients as long as the source names are unique.
+
+  The callbacks of ``blocking`` sources, which may wait for a command or run
+  user code, are run on worker threads so they do not delay the other
+  sources. Such a source is not polled again until its previous run ends.
+  """
+
+  def __init__(self, idle_timeout: float = 0.5):
+    """Initialize the scheduler.
+
+    Args:
+      idle_timeout (float): Seconds to wait when there are no sources before
+        checking again whether the scheduler has been stopped.
+    """
+    self.idle_timeout = idle_timeout
+    self.active = False
+    self._heap: List[Tuple[float, int, PollSource]] = []
+    self._sources: Dict[str, PollSource] = {}
+    self._counter = itertools.count()
+    self._lock = Lock()
+    self._wakeup = Event()
+    self._thread: Union[Thread, None] = None
+    self._workers: Union[ThreadPoolExecutor, None] = None
+
+  def add_source(
+      self,
+      name: str,
+      callback: Callable,
+      interval: float,
+      blocking: bool = False,
+  ) -> None:
+    """Add (or replace) a source that is polled every ``interval`` seconds.
+
+    A ``blocking`` source is run on a worker thread.
+    """
+    if interval <= 0:
+      raise ValueError('interval must be positive')
+    source = PollSource(name, callback, interval, blocking)
+    with self._lock:
+      self._sources[name] = source
+      heapq.heappush(
+          self._heap, (time.monotonic(), next(self._counter), source)
+      )
+    self._wakeup.set()
+
+  def remove_source(self, name: str) -> None:
+    """Remove a source. Its pending heap entry is discarded lazily."""
+    with self._lock:
+      self._sources.pop(name, None)
+
+  @property
+  def sources(self) -> List[str]:
+    """Return the names of the sources."""
+    return list(self._sources)
+
+  def start(self) -> None:
+    """Start the scheduler thread if it is not running yet."""
+    if self.active:
+      return
+    self.active = True
+    self._thread = Thread(target=self._run, args=(), daemon=True)
+    self._thread.start()
+
+  def stop(self) -> None:
+    """Stop the scheduler thread and its workers, once they are idle.
+
+    It waits for the thread to finish its current polls, so a ``start``
+    right after it never runs two threads over the same sources.
+    """
+    self.active = False
+    self._wakeup.set()
+    thread, self._thread = self._thread, None
+    if thread is not None and thread is not current_thread():
+      thread.join()
+    with self._lock:
+      workers, self._workers = self._workers, None
+    if workers is not None:
+      workers.shutdown(wait=False)
+
+  def _run(self) -> None:
+    """Poll the due sources until the scheduler is stopped."""
+    while self.active:
+      delay = self.run_pending()
+      if delay > 0:
+        self._wakeup.wait(delay)
+      self._wakeup.clear()
+
+  def run_pending(self) -> float:
+    """Run every due source once.
+
+    Returns the seconds until the next source is due. Sources that become
+    due while running are left for the next call, so it always returns.
+    """
+    started = time.monotonic()
+    while True:
+      with self._lock:
+        if len(self._heap) == 0:
+          return self.idle_timeout
+        due, _, source = self._heap[0]
+        now = time.monotonic()
+        if due > started:
+          return max(0.0, due - now)
+        heapq.heappop(self._heap)
+        if self._sources.get(source.name) is not source:
+          continue
+
+      if source.blocking:
+        self._poll_in_worker(source, due, now)
+      else:
+        self._poll(source, due, now)
+      with self._lock:
+        if self._sources.get(source.name) is source:
+          # Late polls are not caught up, the interval counts from the poll
+          heapq.heappush(
+              self._heap, (now + source.interval, next(self._counter), source)
+          )
+
+  def _poll_in_worker(self, source: PollSource, due: float, now: float) -> None:
+    """Run a blocking source on a worker unless its last run is not over."""
+    with self._lock:
+      if source.running:
+        return
+      source.running = True
+      if self._workers is None:
+        self._workers = ThreadPoolExecutor(thread_name_prefix='PollScheduler')
+      self._workers.submit(self._poll_blocking, source, due, now)
+
+  def _poll_blocking(self, source: PollSource, due: float, now: float) -> None:
+    """Run a blocking source in the current worker thread."""
+    try:
+      self._poll(source, due, now)
+    finally:
+      source.running = False
+
+  @staticmethod
+  def _poll(source: PollSource, due: float, now: float) -> None:
+    """Run the callback of a source and update its statistics."""
+    source.max_delay_seconds = max(source.max_delay_seconds, now - due)
+    try:
+      source.callback()
+    except Exception:  # noqa
+      source.errors += 1
+      log.error(traceback.format_exc())
+    elapsed = time.monotonic() - now
+    source.polls += 1
+    source.busy_seconds += elapsed
+    source.max_seconds = max(source.max_seconds, elapsed)
+
+  def stats(self) -> poll_stats_type:
+    """Return the poll statistics of every source."""
+    return {name: source.stats() for name, source in self._sources.items()}
+
+
+class HistoricalRequests:
+  """Request times and response latencies of the historical data.
+
+  ``MT_Client`` records when the historical data of each symbol is requested
+  and when it becomes current. The historical poller then reads first the
+  symbols whose response is expected first: the request time plus the
+  latency of the previous response.
+  """
+
+  def __init__(self):
+    """Initialize empty statistics."""
+    self._lock = Lock()
+    self._requested_at: Dict[str, float] = {}
+    self._latency: Dict[str, float] = {}
+    self._reads: Dict[str, int] = {}
+    self._skips: Dict[str, int] = {}
+
+  def requested(self, symbol: str, now: Union[float, None] = None) -> None:
+    """Record that the historical data of a symbol has been requested."""
+    with self._lock:
+      self._requested_at[symbol] = time.monotonic() if now is None else now
+
+  def completed(
+      self, symbol: str, now: Union[float, None] = None
+  ) -> Union[float, None]:
+    """Record that the requested data is current and return its latency."""
+    with self._lock:
+      requested_at = self._requested_at.pop(symbol, None)
+      if requested_at is None:
+        return None
+      now = time.monotonic() if now is None else now
+      self._latency[symbol] = now - requested_at
+      return self._latency[symbol]
+
+  def read(self, symbol: str) -> None:
+    """Count a read of the historical data file of a symbol."""
+    with self._lock:
+      self._reads[symbol] = self._reads.get(symbol, 0) + 1
+
+  def skipped(self, symbol: str) -> None:
+    """Count a poll that skipped the unchanged file of a symbol."""
+    with self._lock:
+      self._skips[symbol] = self._skips.get(symbol, 0) + 1
+
+  def order(self, symbols: List[str]) -> List[str]:
+    """Sort symbols by the time their response is expected.
+
+    Symbols without a pending request go last, in their original order.
+    """
+    with self._lock:
+      def expected_at(symbol: str) -> float:
+        requested_at = self._requested_at.get(symbol)
+        if requested_at is None:
+          return float('inf')
+        return requested_at + self._latency.get(symbol, 0.0)
+
+      return sorted(symbols, key=expected_at)
+
+  def stats(self, now: Union[float, None] = None) -> poll_stats_type:
+    """Return the wait statistics of every symbol.
+
+    ``waiting_seconds`` is the time since the pending request (0 if there is
+    none) and ``last_latency_seconds`` the time the previous request took.
+    """
+    now = time.monotonic() if now is None else now
+    with self._lock:
+      symbols = (
+          set(self._requested_at) | set(self._latency) | set(self._reads)
+          | set(self._skips)
+      )
+      return {
+          symbol: {
+              'waiting_seconds': (
+                  now - self._requested_at[symbol]
+                  if symbol in self._requested_at else 0.0
+              ),
+              'last_latency_seconds': self._latency.get(symbol, 0.0),
+              'reads': self._reads.get(symbol, 0),
+              'skips': self._skips.get(symbol, 0),
+          } for symbol in sorted(symbols)
+      }
@@ -52,9 +52,7 @@ class Strategy(ABC):
       if date is None:
           date = datetime.now(Config.utc_timezone)
 
-      symbol = order.symbol
-      orders = [o for o in self.mt_client.open_orders if o.symbol == symbol]
-      c1 = len(orders) == 0
+      c1 = self.mt_client.order_book.count(order.symbol) == 0
       c2 = order.risk_benefit() > min_risk_profit
       c3 = date.hour not in [22, 23, 0]
       return c1 and c2 and c3
@@ -0,0 +1,134 @@
+"""Fixed-capacity tick history of each symbol."""
+from typing import Dict, List, Union
+import time
+
+import numpy as np
+
+# Rows of the arrays returned by ``last_n``
+TICK_COLUMNS = ('timestamp', 'bid', 'ask', 'spread')
+TIMESTAMP, BID, ASK, SPREAD = range(len(TICK_COLUMNS))
+
+
+class TickBuffer:
+  """Ring buffer of the ticks of a symbol.
+
+  Every tick is written twice, at ``i`` and ``i + capacity`` of an array of
+  ``2 * capacity`` columns, so the last ``n`` ticks are always a contiguous
+  slice. Appending is O(1) and ``last_n`` returns a read-only view without
+  copying. The views are overwritten by the following appends once the
+  buffer is full, copy them to keep the values.
+  """
+
+  def __init__(self, capacity: int):
+    """Initialize an empty buffer of ``capacity`` ticks."""
+    if capacity <= 0:
+      raise ValueError('capacity must be positive')
+    self.capacity = capacity
+    self.count = 0
+    self._next = 0
+    self._data = np.zeros((len(TICK_COLUMNS), 2 * capacity), dtype=np.float64)
+    self._view = self._data.view()
+    self._view.flags.writeable = False
+
+  def __len__(self) -> int:
+    """Return the number of ticks stored."""
+    return min(self.count, self.capacity)
+
+  def append(self, timestamp: float, bid: float, ask: float) -> None:
+    """Add a tick, overwriting the oldest one when the buffer is full."""
+    i = self._next
+    self._data[:, i] = self._data[:, i + self.capacity] = (
+        timestamp, bid, ask, ask - bid
+    )
+    self._next = (i + 1) % self.capacity
+    self.count += 1
+
+  def last_n(self, n: Union[int, None] = None) -> np.ndarray:
+    """Return a view of the last ``n`` ticks (all of them by default).
+
+    The view has one row per column of ``TICK_COLUMNS`` and the ticks are
+    sorted from the oldest to the newest.
+    """
+    size = len(self) if n is None else min(n, len(self))
+    end = self._next + self.capacity
+    return self._view[:, end - size:end]
+
+  @property
+  def timestamps(self) -> np.ndarray:
+    """Return the time of the stored ticks, in epoch seconds."""
+    return self.last_n()[TIMESTAMP]
+
+  @property
+  def bids(self) -> np.ndarray:
+    """Return the bid prices of the stored ticks."""
+    return self.last_n()[BID]
+
+  @property
+  def asks(self) -> np.ndarray:
+    """Return the ask prices of the stored ticks."""
+    return self.last_n()[ASK]
+
+  @property
+  def spreads(self) -> np.ndarray:
+    """Return the spreads of the stored ticks."""
+    return self.last_n()[SPREAD]
+
+
+class TickStore:
+  """Tick history of every symbol received from ``Market_Data.json``.
+
+  ``MT_Client.check_market_data`` appends a tick for every symbol whose price
+  has changed, so the history is available in ``on_tick`` without keeping
+  lists that grow without bound.
+  """
+
+  def __init__(self, capacity: int = 4096):
+    """Initialize the store. ``capacity`` is the ticks kept per symbol."""
+    if capacity <= 0:
+      raise ValueError('capacity must be positive')
+    self.capacity = capacity
+    self._buffers: Dict[str, TickBuffer] = {}
+
+  def __contains__(self, symbol: str) -> bool:
+    """Return True if a tick of the symbol has been stored."""
+    return symbol in self._buffers
+
+  def append(
+      self,
+      symbol: str,
+      bid: float,
+      ask: float,
+      timestamp: Union[float, None] = None,
+  ) -> None:
+    """Add a tick of a symbol. The timestamp defaults to the current time."""
+    buffer = self._buffers.get(symbol)
+    if buffer is None:
+      buffer = self._buffers[symbol] = TickBuffer(self.capacity)
+    buffer.append(time.time() if timestamp is None else timestamp, bid, ask)
+
+  def last_n(self, symbol: str, n: Union[int, None] = None) -> np.ndarray:
+    """Return a view of the last ``n`` ticks of a symbol.
+
+    See ``TickBuffer.last_n``. An empty array is returned for unknown
+    symbols.
+    """
+    buffer = self._buffers.get(symbol)
+    if buffer is None:
+      return np.empty((len(TICK_COLUMNS), 0), dtype=np.float64)
+    return buffer.last_n(n)
+
+  def buffer(self, symbol: str) -> Union[TickBuffer, None]:
+    """Return the buffer of a symbol or None if it has no ticks."""
+    return self._buffers.get(symbol)
+
+  @property
+  def symbols(self) -> List[str]:
+    """Return the symbols with stored ticks."""
+    return list(self._buffers)
+
+  def clear(self, symbol: Union[str, None] = None) -> None:
+    """Remove the ticks of a symbol, or of every symbol if none is given."""
+    if symbol is None:
+      self._buffers.clear()
+    else:
+      self._buffers.pop(symbol, None)
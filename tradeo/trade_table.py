@@ -0,0 +1,234 @@
+"""Columnar analytics of the historical trades."""
+from datetime import date, datetime
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+from tradeo.config import Config
+from tradeo.trade import Trade
+from tradeo.utils import broker_epoch_to_utc, mt_times_to_epoch, timezone_type
+
+# Keys accepted by ``TradeTable.group_by``
+GROUP_KEYS = ('day', 'symbol', 'magic', 'comment')
+
+# Entry of the deals that open a position, without realized gain or loss
+ENTRY_IN = 'entry_in'
+
+# Typing types
+json_trades_type = Dict[str, Dict]
+group_key_type = Union[date, str, int]
+grouped_type = Dict[group_key_type, Dict[str, float]]
+rolling_type = Dict[str, np.ndarray]
+
+
+class TradeTable:
+  """Historical trades stored as NumPy columns, sorted by deal time.
+
+  The columns are ``ticket``, ``symbol_id``, ``magic``, ``comment_id``,
+  ``closing`` (whether the deal is not an ``entry_in``), ``deal_time`` (UTC
+  epoch seconds), ``lots``, ``price``, ``pnl``, ``commission`` and ``swap``.
+  ``net`` is the sum of the last three. The symbols and comments are the
+  positions in ``symbols`` and ``comments``.
+
+  The aggregates are computed with ``np.bincount`` and cumulative sums, so
+  a year of deals is summarized without a Python loop over the trades.
+  """
+
+  def __init__(
+      self,
+      symbols: Sequence[str],
+      comments: Sequence[str],
+      **columns: Sequence,
+  ):
+    """Initialize the table from its columns, which have the same length.
+
+    Args:
+      symbols (Sequence[str]): Symbols referenced by ``symbol_id``.
+      comments (Sequence[str]): Comments referenced by ``comment_id``.
+      columns (Sequence): The columns described in the class docstring, in
+        any order. They are sorted by ``deal_time``.
+    """
+    order = np.argsort(
+        np.asarray(columns['deal_time'], dtype=np.int64), kind='stable'
+    )
+    self.symbols = list(symbols)
+    self.comments = list(comments)
+    self.ticket = np.asarray(columns['ticket'], dtype=np.int64)[order]
+    self.symbol_id = np.asarray(columns['symbol_id'], dtype=np.int64)[order]
+    self.magic = np.asarray(columns['magic'], dtype=np.int64)[order]
+    self.comment_id = np.asarray(columns['comment_id'], dtype=np.int64)[order]
+    self.closing = np.asarray(columns['closing'], dtype=bool)[order]
+    self.deal_time = np.asarray(columns['deal_time'], dtype=np.int64)[order]
+    self.lots = np.asarray(columns['lots'], dtype=np.float64)[order]
+    self.price = np.asarray(columns['price'], dtype=np.float64)[order]
+    self.pnl = np.asarray(columns['pnl'], dtype=np.float64)[order]
+    self.commission = np.asarray(
+        columns['commission'], dtype=np.float64
+    )[order]
+    self.swap = np.asarray(columns['swap'], dtype=np.float64)[order]
+    self.net = self.pnl + self.commission + self.swap
+
+  @classmethod
+  def from_trades(cls: type, trades: List[Trade]) -> 'TradeTable':
+    """Build the table from Trade objects, such as ``historical_trades``."""
+    symbols: Dict[str, int] = {}
+    comments: Dict[str, int] = {}
+    symbol_id = [symbols.setdefault(t.symbol, len(symbols)) for t in trades]
+    comment_id = [
+        comments.setdefault(t.comment, len(comments)) for t in trades
+    ]
+    return cls(
+        symbols=list(symbols),
+        comments=list(comments),
+        ticket=[t.ticket for t in trades],
+        symbol_id=symbol_id,
+        magic=[int(t.magic) for t in trades],
+        comment_id=comment_id,
+        closing=[t.entry != ENTRY_IN for t in trades],
+        deal_time=[
+            0 if t.deal_time is None else int(t.deal_time.timestamp())
+            for t in trades
+        ],
+        lots=[t.lots for t in trades],
+        price=[t.deal_price for t in trades],
+        pnl=[t.pnl for t in trades],
+        commission=[t.commission for t in trades],
+        swap=[t.swap for t in trades],
+    )
+
+  @classmethod
+  def from_json(
+      cls: type,
+      json_trades: json_trades_type,
+      from_timezone: timezone_type = Config.broker_timezone,
+  ) -> 'TradeTable':
+    """Build the table from the data of a ``Historical_Trades.json`` file.
+
+    The deal times, written in the ``from_timezone`` of the broker, are
+    converted to UTC.
+    """
+    trades = list(json_trades.values())
+    symbols: Dict[str, int] = {}
+    comments: Dict[str, int] = {}
+    symbol_id = [
+        symbols.setdefault(t['symbol'], len(symbols)) for t in trades
+    ]
+    comment_id = [
+        comments.setdefault(t['comment'], len(comments)) for t in trades
+    ]
+    deal_time = broker_epoch_to_utc(
+        mt_times_to_epoch([t['deal_time'] for t in trades]), from_timezone
+    )
+    return cls(
+        symbols=list(symbols),
+        comments=list(comments),
+        ticket=np.fromiter(json_trades, dtype=np.int64, count=len(trades)),
+        symbol_id=symbol_id,
+        magic=[int(t['magic']) for t in trades],
+        comment_id=comment_id,
+        closing=[t['entry'] != ENTRY_IN for t in trades],
+        deal_time=deal_time,
+        lots=[t['lots'] for t in trades],
+        price=[t['deal_price'] for t in trades],
+        pnl=[t['pnl'] for t in trades],
+        commission=[t['commission'] for t in trades],
+        swap=[t['swap'] for t in trades],
+    )
+
+  def __len__(self) -> int:
+    """Return the number of deals."""
+    return len(self.ticket)
+
+  def group_by(self, key: str) -> grouped_type:
+    """Return the realized results of each day, symbol, magic or comment.
+
+    For each group it returns the ``pnl``, ``commission``, ``swap``, ``net``
+    and ``count`` of deals. The days are UTC dates.
+    """
+    if key not in GROUP_KEYS:
+      raise ValueError(f'Invalid group key: {key}, use one of {GROUP_KEYS}')
+    keys = self._group_keys(key)
+    unique, codes = np.unique(keys, return_inverse=True)
+    columns = {
+        'pnl': self.pnl, 'commission': self.commission, 'swap': self.swap,
+        'net': self.net, 'count': np.ones(len(self)),
+    }
+    sums = {
+        name: np.bincount(codes, weights=values, minlength=len(unique))
+        for name, values in columns.items()
+    }
+    return {
+        self._group_label(key, value): {
+            name: float(total[i]) for name, total in sums.items()
+        }
+        for i, value in enumerate(unique.tolist())
+    }
+
+  def win_rate(self) -> float:
+    """Return the share of closing deals with a positive net result."""
+    net = self.net[self.closing]
+    return float(np.mean(net > 0)) if net.size else 0.0
+
+  def profit_factor(self) -> float:
+    """Return the gross profit divided by the gross loss of closing deals.
+
+    It is ``inf`` when there are profits but no losses, and 0 without
+    closing deals.
+    """
+    net = self.net[self.closing]
+    profit = net[net > 0].sum()
+    loss = -net[net < 0].sum()
+    if loss == 0:
+      return float('inf') if profit > 0 else 0.0
+    return float(profit / loss)
+
+  def equity_curve(self) -> np.ndarray:
+    """Return the cumulative net result after each deal."""
+    return np.cumsum(self.net)
+
+  def max_drawdown(self) -> float:
+    """Return the largest fall of the equity curve from a previous peak."""
+    curve = np.concatenate(([0.0], self.equity_curve()))
+    return float(np.max(np.maximum.accumulate(curve) - curve))
+
+  def rolling(self, window: int) -> rolling_type:
+    """Return the ``net`` sum and ``win_rate`` of each window of deals.
+
+    The windows are ``window`` consecutive closing deals, so there are
+    ``n - window + 1`` values for ``n`` closing deals.
+    """
+    if window <= 0:
+      raise ValueError('window must be positive')
+    net = self.net[self.closing]
+    if len(net) < window:
+      return {'net': np.empty(0), 'win_rate': np.empty(0)}
+    return {
+        'net': _window_sums(net, window),
+        'win_rate': _window_sums((net > 0).astype(np.float64), window) / window,
+    }
+
+  def _group_keys(self, key: str) -> np.ndarray:
+    """Return the key of each deal for ``group_by``."""
+    if key == 'day':
+      return self.deal_time // 86400
+    if key == 'symbol':
+      return self.symbol_id
+    if key == 'magic':
+      return self.magic
+    return self.comment_id
+
+  def _group_label(self, key: str, value: int) -> group_key_type:
+    """Return the label of a key of ``_group_keys``."""
+    if key == 'day':
+      return datetime.fromtimestamp(value * 86400, Config.utc_timezone).date()
+    if key == 'symbol':
+      return self.symbols[value]
+    if key == 'magic':
+      return value
+    return self.comments[value]
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+  """Return the sums of the windows of consecutive values."""
+  totals = np.concatenate(([0.0], np.cumsum(values)))
+  return totals[window:] - totals[:-window]
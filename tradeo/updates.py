@@ -0,0 +1,53 @@
+"""Notifications of the data updated by the pollers of MT_Client."""
+from threading import Condition, Lock
+from typing import Dict, Iterable
+
+# Keys of the account info, market data, bar data and open orders updates
+ACCOUNT_INFO = 'account_info'
+MARKET_DATA = 'market_data'
+BAR_DATA = 'bar_data'
+OPEN_ORDERS = 'open_orders'
+
+
+class UpdateNotifier:
+  """Versioned condition variables, one per key (symbol or kind of data).
+
+  The pollers call ``notify`` with the keys of the data they have updated.
+  A getter reads the ``version`` of its key before checking the data and,
+  if it is not there yet, calls ``wait`` with that version: it returns as
+  soon as the key is notified, even if it happened between the check and
+  the wait, or when the timeout expires.
+  """
+
+  def __init__(self):
+    """Initialize the notifier without keys."""
+    self._lock = Lock()
+    self._conditions: Dict[str, Condition] = {}
+    self._versions: Dict[str, int] = {}
+
+  def version(self, key: str) -> int:
+    """Return the number of updates notified for a key."""
+    with self._lock:
+      return self._versions.get(key, 0)
+
+  def notify(self, keys: Iterable[str]) -> None:
+    """Increase the version of the keys and wake up their waiters."""
+    with self._lock:
+      for key in keys:
+        self._versions[key] = self._versions.get(key, 0) + 1
+        condition = self._conditions.get(key)
+        if condition is not None:
+          condition.notify_all()
+
+  def wait(self, key: str, version: int, timeout: float) -> bool:
+    """Wait until the key has a newer version than ``version``.
+
+    Returns whether the key has been updated before the timeout.
+    """
+    with self._lock:
+      condition = self._conditions.get(key)
+      if condition is None:
+        condition = self._conditions[key] = Condition(self._lock)
+      return condition.wait_for(
+          lambda: self._versions.get(key, 0) != version, timeout=timeout
+      )
@@ -1,8 +1,12 @@
 """Script to collect different utilities."""
 from datetime import datetime
+from functools import lru_cache
+import threading
 import typing as ty
+import pytz
 from pytz import BaseTzInfo
 from pytz.tzinfo import DstTzInfo, StaticTzInfo
+import numpy as np
 
 from tradeo.config import Config
 from tradeo.paths import get_default_path
@@ -10,6 +14,12 @@ from tradeo.files import Files
 from tradeo.files import write_file, try_read_file
 
 timezone_type = ty.Union[DstTzInfo, BaseTzInfo, StaticTzInfo]
+offsets_table_type = ty.Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+# Converted dates of mt_dates_to_utc, by timezone and MetaTrader time
+_UTC_DATES_CACHE_SIZE = 65536
+_utc_dates_cache: ty.Dict[ty.Tuple[str, str], datetime] = {}
+_utc_dates_lock = threading.Lock()
 
 
 def string_to_date_utc(
@@ -22,6 +32,85 @@ def string_to_date_utc(
   return r.astimezone(Config.utc_timezone)
 
 
+def mt_dates_to_utc(
+    str_dates: ty.Sequence[str],
+    from_timezone: timezone_type = Config.broker_timezone,
+) -> ty.List[datetime]:
+  """Convert MetaTrader times of a timezone to UTC datetime objects.
+
+  It is the batch version of ``string_to_date_utc`` for the
+  ``'%Y.%m.%d %H:%M:%S'`` (or ``'%Y.%m.%d %H:%M'``) times of the bridge
+  files. The dates already converted are memoized, and the rest are parsed
+  and converted at once with ``mt_times_to_epoch`` and
+  ``broker_epoch_to_utc``. It can be called from several threads.
+  """
+  zone = str(from_timezone)
+  unique_dates = set(str_dates)
+  with _utc_dates_lock:
+    dates = {
+        d: _utc_dates_cache[(zone, d)] for d in unique_dates
+        if (zone, d) in _utc_dates_cache
+    }
+  missing = [d for d in unique_dates if d not in dates]
+  if missing:
+    epoch = broker_epoch_to_utc(mt_times_to_epoch(missing), from_timezone)
+    converted = {
+        str_date: datetime.fromtimestamp(seconds, Config.utc_timezone)
+        for str_date, seconds in zip(missing, epoch.tolist())
+    }
+    dates.update(converted)
+    with _utc_dates_lock:
+      if len(_utc_dates_cache) + len(converted) > _UTC_DATES_CACHE_SIZE:
+        _utc_dates_cache.clear()
+      _utc_dates_cache.update({(zone, d): v for d, v in converted.items()})
+  # Built from the local dates: other threads may clear the cache meanwhile
+  return [dates[d] for d in str_dates]
+
+
+def mt_times_to_epoch(times: ty.Sequence[str]) -> np.ndarray:
+  """Convert MetaTrader times to the int64 Unix time of their wall clock.
+
+  The times are ``'%Y.%m.%d %H:%M'`` or ``'%Y.%m.%d %H:%M:%S'`` strings, as
+  written by ``TimeToString``. When all of them have the same format, their
+  digits are read at once from a single byte buffer.
+  """
+  if len(times) == 0:
+    return np.empty(0, dtype=np.int64)
+  epoch = _fixed_mt_times_to_epoch(times)
+  if epoch is None:
+    iso_times = [t.replace('.', '-').replace(' ', 'T') for t in times]
+    epoch = np.array(iso_times, dtype='datetime64[s]').astype(np.int64)
+  return epoch
+
+
+def broker_epoch_to_utc(
+    epoch: np.ndarray, from_timezone: timezone_type = Config.broker_timezone
+) -> np.ndarray:
+  """Convert wall-clock Unix times of a timezone to UTC Unix times.
+
+  The UTC offsets are taken from the transition table of the pytz timezone,
+  so the whole array is converted with a few vectorized operations. As
+  with ``localize``, ambiguous and non-existent times use the standard
+  (not daylight saving) offset.
+  """
+  if isinstance(from_timezone, str):
+    from_timezone = pytz.timezone(from_timezone)
+  epoch = np.asarray(epoch, dtype=np.int64)
+  local_start, local_end, offsets, dst = _utc_offsets_table(from_timezone)
+  period = np.searchsorted(local_start, epoch, side='right') - 1
+  period = np.clip(period, 0, len(offsets) - 1)
+  previous = np.maximum(period - 1, 0)
+
+  # Near a transition the time may also belong to the previous period
+  # (ambiguous) or to none of them (non-existent)
+  in_period = epoch < local_end[period]
+  in_previous = (period > 0) & (epoch < local_end[previous])
+  use_previous = (~in_period & ~dst[previous]) | (
+      in_previous & dst[period] & ~dst[previous]
+  )
+  return epoch - offsets[np.where(use_previous, previous, period)]
+
+
 def create_magic_number() -> str:
   """Create a magic number based on the current date and time."""
   return str(
@@ -60,3 +149,68 @@ def increment_consecutive_times_down() -> None:
   """Increment the consecutive times down."""
   write_file(Files.CONSECUTIVE_TIMES_DOWN.value,
              str(get_consecutive_times_down() + 1))
+
+
+def _fixed_mt_times_to_epoch(
+    times: ty.Sequence[str]
+) -> ty.Union[np.ndarray, None]:
+  """Parse times of a single fixed-width format, or return None."""
+  width = len(times[0])
+  data = ''.join(times).encode('ascii', errors='replace')
+  if width not in (16, 19) or len(data) != width * len(times):
+    return None
+  chars = np.frombuffer(data, dtype=np.uint8).reshape(len(times), width)
+  separators = [4, 7, 10, 13, 16][:4 if width == 16 else 5]
+  expected = np.frombuffer(b'.. ::'[:len(separators)], dtype=np.uint8)
+  if np.any(chars[:, separators] != expected):
+    return None
+
+  # Digits of YYYYMMDDhhmm[ss]
+  digits = np.delete(chars, separators, axis=1).astype(np.int64) - ord('0')
+  if np.any((digits < 0) | (digits > 9)):
+    return None
+
+  def number(start: int, end: int) -> np.ndarray:
+    value = np.zeros(len(times), dtype=np.int64)
+    for i in range(start, end):
+      value = value * 10 + digits[:, i]
+    return value
+
+  months = (number(0, 4) - 1970) * 12 + number(4, 6) - 1
+  days = months.astype('datetime64[M]').astype('datetime64[D]')
+  seconds = number(12, 14) if width == 19 else 0
+  return (
+      (days.astype(np.int64) + number(6, 8) - 1) * 86400
+      + number(8, 10) * 3600 + number(10, 12) * 60 + seconds
+  )
+
+
+@lru_cache(maxsize=None)
+def _utc_offsets_table(timezone: timezone_type) -> offsets_table_type:
+  """Return the periods of constant UTC offset of a pytz timezone.
+
+  For each period it returns the wall-clock time of its start and end, its
+  offset in seconds and whether it is daylight saving time.
+  """
+  if not isinstance(timezone, DstTzInfo):
+    offset = timezone.utcoffset(datetime(2000, 1, 1))
+    seconds = int(offset.total_seconds()) if offset else 0
+    return (
+        np.array([np.iinfo(np.int64).min // 2], dtype=np.int64),
+        np.array([np.iinfo(np.int64).max // 2], dtype=np.int64),
+        np.array([seconds], dtype=np.int64),
+        np.array([False]),
+    )
+
+  utc_start = np.array([
+      int((t - datetime(1970, 1, 1)).total_seconds())
+      for t in timezone._utc_transition_times  # type: ignore
+  ], dtype=np.int64)
+  utc_start[0] = np.iinfo(np.int64).min // 2
+  info = timezone._transition_info  # type: ignore
+  offsets = np.array(
+      [int(i[0].total_seconds()) for i in info], dtype=np.int64
+  )
+  utc_end = np.append(utc_start[1:], np.iinfo(np.int64).max // 2)
+  dst = np.array([bool(i[1]) for i in info])
+  return utc_start + offsets, utc_end + offsets, offsets, dst